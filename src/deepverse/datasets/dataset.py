@@ -12,6 +12,7 @@ from .wireless_datasets import RadarDataset
 from .wireless_datasets import CommunicationDataset
 
 from copy import deepcopy
+import threading
 from tqdm import tqdm
 import time
 
@@ -21,13 +22,27 @@ class Dataset:
     Main class for loading and accessing the multi-modal dataset.
     This class manages different modality-specific datasets and provides a unified interface for data access.
     """
-    def __init__(self, config):
+    # Attributes of the modality-specific datasets by modality name
+    modality_attributes = {'cam': 'camera_dataset',
+                           'lidar': 'lidar_dataset',
+                           'mobility': 'mobility_dataset',
+                           'comm': 'comm_dataset',
+                           'radar': 'radar_dataset'}
+    
+    def __init__(self, config, streaming=False, lazy=False, prefetch=False):
         """
         Initializes the Dataset object.
 
         Args:
             config_path (str): Path to the configuration file (e.g., YAML, JSON).
+            streaming (bool, optional): If True, the comm and radar scenes are not generated at the
+                initialization, and the dataset is consumed scene by scene with iter_scenes(). Defaults to False.
+            lazy (bool, optional): If True, the modality-specific datasets are not generated at the
+                initialization, but on their first access, e.g., through get_modality() or get_sample(). Defaults to False.
+            prefetch (bool, optional): If True with lazy, the enabled modalities are generated in a background
+                thread after the initialization. An access to a modality being generated waits for it. Defaults to False.
         """
+        self.streaming = streaming
         
         # Load Parameters
         if isinstance(config, str):
@@ -45,42 +60,80 @@ class Dataset:
         self.scenario_path = os.path.join(self.params['dataset_folder'], self.params['scenario'])
         self.scenario = ScenarioManager(self.scenario_path)
 
-        # Initialize modality-specific datasets based on the scenario configuration
+        # Modality-specific datasets to generate based on the scenario configuration
         # TODO: Add an enumerator class, load by name and also update scenario manager to use the enumerator.
+        builders = {}
         if 'camera' in self.scenario.sensors and self.params['camera']:
-            start_time = time.perf_counter()
-            tqdm.write("Generating camera dataset: ⏳ In progress")
-            self.camera_dataset = CameraDataset(self.params, self.scenario.sensors['camera'])
-            end_time = time.perf_counter()
-            tqdm.write(f"\033[F\033[KGenerating camera dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
-        
+            builders['cam'] = lambda: CameraDataset(self.params, self.scenario.sensors['camera'])
         if 'LiDAR' in self.scenario.sensors and self.params['lidar']:
-            tqdm.write("Generating LiDAR dataset: ⏳ In progress")
-            start_time = time.perf_counter()
-            self.lidar_dataset = LiDARDataset(self.params, self.scenario.sensors['LiDAR'])
-            end_time = time.perf_counter()
-            tqdm.write(f"\033[F\033[KGenerating LiDAR dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
-        
+            builders['lidar'] = lambda: LiDARDataset(self.params, self.scenario.sensors['LiDAR'])
         if self.params['position']:
-            tqdm.write("Generating mobility dataset: ⏳ In progress")
-            start_time = time.perf_counter()
-            self.mobility_dataset = MobilityDataset(self.params, self.scenario.moving_objects)
-            end_time = time.perf_counter()
-            tqdm.write(f"\033[F\033[KGenerating mobility dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
-        
+            builders['mobility'] = lambda: MobilityDataset(self.params, self.scenario.moving_objects)
         if self.params['comm']['enable']:
-            tqdm.write("Generating comm dataset: ⏳ In progress")
-            start_time = time.perf_counter()
-            self.comm_dataset = CommunicationDataset(self.param_manager.get_filtered_params('comm'))
-            end_time = time.perf_counter()
-            tqdm.write(f"\033[F\033[KGenerating comm dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
-
+            builders['comm'] = lambda: CommunicationDataset(self.param_manager.get_filtered_params('comm'), generate=not streaming,
+                                                            moving_objects=self.scenario.moving_objects)
         if self.params['radar']['enable']:
-            tqdm.write("Generating radar dataset: ⏳ In progress")
-            start_time = time.perf_counter()
-            self.radar_dataset = RadarDataset(self.param_manager.get_filtered_params('radar'))
-            end_time = time.perf_counter()
-            tqdm.write(f"\033[F\033[KGenerating radar dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
+            builders['radar'] = lambda: RadarDataset(self.param_manager.get_filtered_params('radar'), generate=not streaming)
+        self._modality_builders = builders
+        self._modality_locks = {modality: threading.Lock() for modality in builders}
+        
+        self._modality_errors = {}
+        self._prefetch_thread = None
+        if not lazy:
+            for modality in builders:
+                self._build_modality(modality)
+        elif prefetch:
+            self._prefetch_thread = threading.Thread(target=self._prefetch_modalities, daemon=True)
+            self._prefetch_thread.start()
+
+    def __getattr__(self, name):
+        # Generates the lazy modality datasets on the first access of their attributes
+        builders = self.__dict__.get('_modality_builders', {})
+        for modality, attribute in self.modality_attributes.items():
+            if attribute == name and modality in builders:
+                return self._build_modality(modality)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _build_modality(self, modality):
+        """
+        Generates the dataset of a modality unless it is already generated.
+
+        Args:
+            modality (str): The modality name ('cam', 'lidar', 'mobility', 'comm' or 'radar').
+
+        Returns:
+            The dataset of the modality.
+
+        Raises:
+            Exception: The error of the background generation of the modality, if it failed.
+        """
+        attribute = self.modality_attributes[modality]
+        with self._modality_locks[modality]:
+            if modality in self._modality_errors:
+                raise self._modality_errors[modality]
+            if attribute not in self.__dict__:
+                name = {'cam': 'camera', 'lidar': 'LiDAR'}.get(modality, modality)
+                tqdm.write(f"Generating {name} dataset: ⏳ In progress")
+                start_time = time.perf_counter()
+                self.__dict__[attribute] = self._modality_builders[modality]()
+                end_time = time.perf_counter()
+                tqdm.write(f"\033[F\033[KGenerating {name} dataset: ✅ Completed ({(end_time-start_time):.2f}s)")
+        return self.__dict__[attribute]
+
+    def _prefetch_modalities(self):
+        # Background generation of the lazy modalities, the errors are raised again on their first access
+        for modality in self._modality_builders:
+            try:
+                self._build_modality(modality)
+            except Exception as error:
+                self._modality_errors[modality] = error
+
+    def wait_prefetch(self):
+        """
+        Waits for the background generation of the modalities to complete.
+        """
+        if self._prefetch_thread is not None:
+            self._prefetch_thread.join()
 
     def get_sample(self, modality, index=None, device_index=None, ue_idx=None, bs_idx=None, object_id=None):
         """
@@ -99,6 +152,8 @@ class Dataset:
         Raises:
             ValueError: If required arguments are missing or the modality is invalid.
         """
+        if self.streaming and modality in ['radar', 'comm-ue', 'comm-bs', 'loc-ue', 'loc-bs']:
+            raise RuntimeError("The wireless samples of a streaming dataset are only available through iter_scenes().")
         if modality == 'cam':
             if device_index is None:
                 raise ValueError("device_index must be specified for camera modality")
@@ -132,6 +187,40 @@ class Dataset:
         else:
             raise ValueError("Invalid modality")
 
+    def iter_scenes(self):
+        """
+        Iterates over the scenes, yielding the data of all enabled modalities one scene at a time.
+
+        In the streaming mode, the comm and radar data of each scene are generated when the scene is
+        requested and released once the consumer moves on to the next scene.
+
+        Yields:
+            dict: A dictionary with the 'scene' index and the available modalities of the scene:
+                'comm' and 'radar' (scene data of the wireless datasets), 'mobility' (properties of the
+                objects in the scene by object ID), 'cam' and 'lidar' (sample file paths by sensor ID).
+        """
+        wireless_iterators = {}
+        if hasattr(self, 'comm_dataset'):
+            wireless_iterators['comm'] = self.comm_dataset.iter_scenes()
+        if hasattr(self, 'radar_dataset'):
+            wireless_iterators['radar'] = self.radar_dataset.iter_scenes()
+        
+        for t, scene_idx in enumerate(self.params['scenes']):
+            sample = {'scene': scene_idx}
+            for modality, iterator in wireless_iterators.items():
+                _, sample[modality] = next(iterator)
+            if hasattr(self, 'mobility_dataset'):
+                sample['mobility'] = {object_id: obj.get_properties_at_time(scene_idx)
+                                      for object_id, obj in self.mobility_dataset.objects.items()
+                                      if scene_idx in obj.time}
+            if hasattr(self, 'camera_dataset'):
+                sample['cam'] = {sensor_id: self.camera_dataset.get_sample(sensor_id, t)
+                                 for sensor_id in self.camera_dataset.sensor_id}
+            if hasattr(self, 'lidar_dataset'):
+                sample['lidar'] = {sensor_id: self.lidar_dataset.get_sample(sensor_id, t)
+                                   for sensor_id in self.lidar_dataset.sensor_id}
+            yield sample
+            
     def visualize(self, modality, device_index, sample_index):
         """
         Visualizes a data sample from a specific modality.
@@ -170,15 +259,18 @@ class Dataset:
             raise ValueError("Setting visualization backend is not supported for this modality")
 
     def get_modality(self, modality):
-        if modality == 'cam':
-            return self.camera_dataset
-        elif modality == 'lidar':
-            return self.lidar_dataset
-        elif modality == 'mobility':
-            return self.mobility_dataset
-        elif modality == 'radar':
-            return self.radar_dataset
-        elif modality == 'comm':
-            return self.comm_dataset
-        else:
-            raise KeyError(f'The modality {modality} is not available.')
\ No newline at end of file
+        """
+        Returns the dataset of a modality, generating it on the first access for a lazy dataset.
+
+        Args:
+            modality (str): The modality name ('cam', 'lidar', 'mobility', 'comm' or 'radar').
+
+        Returns:
+            The dataset of the modality.
+
+        Raises:
+            KeyError: If the modality is not available.
+        """
+        if modality not in self._modality_builders:
+            raise KeyError(f'The modality {modality} is not available.')
+        return self._build_modality(modality)
@@ -2,20 +2,267 @@
 import os
 import numpy as np
 from tqdm import tqdm
-from ..wireless.process_params import create_antennas, find_users_from_rows
-from ..wireless.RayTracingLoader import RayTracingLoader
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from ..wireless.process_params import create_antennas, create_steering_cache, find_users_from_rows
+from ..wireless.RayTracingLoader import RayTracingLoader, RT_INDEX_FILE, build_ray_tracing_index, load_ray_tracing_index, ray_data_hash
 
 from ..wireless import consts as c
-from ..wireless.Paths import Paths
-from ..wireless.Channel import OFDMChannel, RadarChannel
+from ..wireless.Paths import PathsBatch
+from ..wireless.Channel import OFDMChannel, OFDMChannelBatch, TDChannel, TDChannelBatch, RadarChannel, RadarChannelBatch
 from ..wireless.Waveform import FMCW
+from ..wireless.utils import precision_dtypes, rx_filter_type
+from ..wireless.RadarProcessing import RadarProcessor, RADAR_MAPS
+from ..wireless.Codebook import DFTCodebook, create_codebook
+from ..wireless.Antenna import AntennaSet
+from ..scenario.moving_object import scene_orientation_index
 
-class RadarDataset:
-    def __init__(self, params):
+class WirelessDataset:
+    """
+    Base class for the ray-tracing based wireless datasets.
+    Scenes are independent of each other and can be generated serially or over a process pool.
+    """
+    _rt_index = None
+    
+    def __init__(self, params, executor=None, generate=True):
+        """
+        Initializes and generates the wireless dataset.
+
+        Args:
+            params (dict): A dictionary of parameters. The optional 'num_workers' entry sets the
+                number of worker processes used for the scene generation (serial if not set or 1).
+                In the serial generation and the streaming, the optional 'prefetch_scenes' entry sets the
+                number of scenes of which the ray-tracing files are read ahead of the scene being
+                generated, over 'prefetch_workers' I/O threads (defaults to 4).
+            executor (concurrent.futures.Executor, optional): An executor to distribute the scenes over.
+                If given, it is used instead of creating a process pool from 'num_workers'.
+            generate (bool, optional): If False, the scenes are not generated at the initialization
+                and can be streamed one at a time with iter_scenes(). Defaults to True.
+        """
         self.params = params
+        self.progress = True
+        self._bs_links = {}
+        # Without a seed, the base seed is drawn once from the global generator, so that the scenes
+        # generated over the workers are independent and match the serial generation
+        self._seed = params.get(c.PARAMSET_SEED, None)
+        if self._seed is None:
+            self._seed = int(np.random.randint(np.iinfo(np.int32).max))
         self._validate_parameters(self.params)
-        self.data = self._generate_data(params[c.PARAMSET_DYNAMIC_SCENES])
+        self._ray_tracing_index() # Loaded (or built) once before the scenes are distributed over the workers
+        self.data = self._generate_data(params[c.PARAMSET_DYNAMIC_SCENES], executor=executor) if generate else None
+        
+    def iter_scenes(self):
+        """
+        Iterates over the scenes of the dataset.
+
+        If the dataset was initialized with generate=False, each scene is generated when it is requested
+        and is not kept by the dataset, so its memory is released as soon as the consumer drops it.
+
+        Yields:
+            tuple: The scene index and the scene data in the format of the elements of self.data.
+        """
+        if self.data is not None:
+            yield from zip(self.params[c.PARAMSET_DYNAMIC_SCENES], self.data)
+            return
+        for scene_idx, rt_loader in self._scene_loaders(self.params[c.PARAMSET_DYNAMIC_SCENES]):
+            yield scene_idx, self._generate_scene_data(scene_idx=scene_idx, rt_loader=rt_loader)
+        
+    def _scene_loaders(self, scenes):
+        """
+        Iterates over the scenes with their ray-tracing loaders. With the 'prefetch_scenes' parameter, the files
+        of the next scenes are read by a thread pool while the current scene is generated. At most
+        'prefetch_scenes' scenes are read ahead, and the next scene is only submitted while the outstanding
+        reads of the queued scenes stay within the reads of 'prefetch_scenes' + 1 scenes, so that the memory
+        of the prefetched files is bounded. The reads of a scene not consumed by its generation are dropped.
 
+        Yields:
+            tuple: The scene index and its RayTracingLoader, or None without the prefetching.
+        """
+        depth = int(self.params.get(c.PARAMSET_PREFETCH, 0) or 0)
+        if depth < 0:
+            raise ValueError("The number of prefetched scenes must be non-negative.")
+        if depth == 0:
+            for scene_idx in scenes:
+                yield scene_idx, None
+            return
+        
+        scenes = iter(scenes)
+        queue = deque()
+        max_pending = None
+        with ThreadPoolExecutor(max_workers=self.params.get(c.PARAMSET_PREFETCH_WORKERS, 4)) as executor:
+            try:
+                while True:
+                    # The current scene and up to `depth` next scenes are submitted, within the outstanding
+                    # reads of depth + 1 scenes as measured on the first scene
+                    while not queue or (len(queue) <= depth and
+                                        sum(rt_loader.num_prefetched for _, rt_loader in queue) < max_pending):
+                        scene_idx = next(scenes, None)
+                        if scene_idx is None:
+                            break
+                        rt_loader = self._get_ray_tracing_loader(scene_idx)
+                        self._prefetch_scene(rt_loader, executor)
+                        queue.append((scene_idx, rt_loader))
+                        if max_pending is None:
+                            max_pending = max(1, (depth + 1) * rt_loader.num_prefetched)
+                    if not queue:
+                        return
+                    scene_idx, rt_loader = queue.popleft()
+                    yield scene_idx, rt_loader
+                    rt_loader.release_prefetched()
+            finally:
+                # The reads of the scenes that are not consumed are dropped
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _prefetch_scene(self, rt_loader, executor):
+        # Files of the active BSs read by the scene generation
+        tx_idx = np.asarray(self.params[c.PARAMSET_ACTIVE_BS]) - 1
+        rt_loader.prefetch(executor, tx_idx, user=True)
+        rt_loader.prefetch(executor, tx_idx, user=False)
+        
+    def _validate_parameters(self, params):
+        raise NotImplementedError("Subclasses should implement this method")
+    
+    def _generate_scene_data(self, scene_idx, rt_loader=None):
+        raise NotImplementedError("Subclasses should implement this method")
+    
+    def _shared_bs_links(self, i, raydata):
+        """
+        Returns the BS-BS links of the i-th active BS generated for the previous scene if the BS-BS ray data
+        of the BS has the same content, and None otherwise, e.g., for a moving BS. The links of the static
+        BSs are thus generated once and shared by the scenes, unless 'deduplicate_bs_links' is False.
+
+        Returns:
+            tuple: The content hash of the ray data and the shared links (or None).
+        """
+        if not self.params.get(c.PARAMSET_BS_DEDUP, True):
+            return None, None
+        key = ray_data_hash(raydata)
+        cached = self._bs_links.get(i)
+        return key, (cached[1] if cached is not None and cached[0] == key else None)
+    
+    def _share_bs_links(self, i, key, links):
+        # Only the links of the last content of each BS are kept
+        if key is not None:
+            self._bs_links[i] = (key, links)
+    
+    def _scene_rng(self, scene_idx):
+        """
+        Random generator of a scene. The generator of each scene is seeded with (seed, scene_idx), so that the
+        scenes are reproducible in any order and over any workers. Without the 'seed' parameter, the seed is
+        drawn from the global numpy generator at the initialization.
+        """
+        return np.random.default_rng([self._seed, scene_idx])
+    
+    def _device_rng(self, group):
+        """
+        Random generator of a group of static devices, e.g., 0 for the BS (or radar TX) antennas and 1 for
+        the UE (or radar RX) antennas. Each group has its own stream, independent of the scene generators.
+        """
+        return np.random.default_rng(np.random.SeedSequence(self._seed, spawn_key=(group, )))
+    
+    def _get_ray_tracing_loader(self, scene_idx):
+        """
+        Creates the ray-tracing loader of a scene.
+
+        The optional 'raytracing_cache' parameter enables the persistent ray-tracing cache. If True, the
+        cache is stored in a 'cache' folder in each scene folder. If a path is given, the cache of each
+        scene is stored under <path>/<scenario>/scene_<idx>.
+        
+        The optional 'raytracing_index' parameter enables the ray-tracing index of the scenario, which lists the
+        files of all scenes, so that the scene folders are not listed. If True, the index is the RT_INDEX_FILE of
+        the wireless folder. If a path is given, the index is read from that file. A missing index is built at the
+        first use, and the scenes that are not in the index are listed.
+
+        Args:
+            scene_idx (int): Index of the scene.
+
+        Returns:
+            RayTracingLoader: The loader of the scene folder.
+        """
+        scene_name = 'scene_' + str(scene_idx)
+        scene_folder = os.path.join(os.path.abspath(self.params[c.PARAMSET_DATASET_FOLDER]), 
+                                    self.params[c.PARAMSET_SCENARIO],
+                                    'wireless',
+                                    scene_name
+                                   )
+        cache = self.params.get(c.PARAMSET_RT_CACHE, None)
+        if cache is None or cache is False:
+            cache_dir = None
+        elif cache is True:
+            cache_dir = os.path.join(scene_folder, 'cache')
+        else:
+            cache_dir = os.path.join(os.path.abspath(cache), self.params[c.PARAMSET_SCENARIO], scene_name)
+        
+        index = self._ray_tracing_index()
+        files = None if index is None else index['scenes'].get(scene_name)
+        return RayTracingLoader(scene_folder, cache_dir=cache_dir, files=files)
+    
+    def _ray_tracing_index(self):
+        # The index is loaded (or built) once and shared by the loaders of all scenes
+        index_file = self.params.get(c.PARAMSET_RT_INDEX, None)
+        if index_file is None or index_file is False:
+            return None
+        if self._rt_index is None:
+            wireless_folder = os.path.join(os.path.abspath(self.params[c.PARAMSET_DATASET_FOLDER]), 
+                                           self.params[c.PARAMSET_SCENARIO], 'wireless')
+            if index_file is True:
+                index_file = os.path.join(wireless_folder, RT_INDEX_FILE)
+            if os.path.exists(index_file):
+                self._rt_index = load_ray_tracing_index(index_file)
+            else:
+                self._rt_index = build_ray_tracing_index(wireless_folder, index_file)
+        return self._rt_index
+    
+    def _generate_data(self, scenes, executor=None):
+        num_workers = self.params.get(c.PARAMSET_NUM_WORKERS, None)
+        if executor is None and (num_workers is None or num_workers <= 1):
+            dataset = []
+            for scene_idx, rt_loader in tqdm(self._scene_loaders(scenes), total=len(scenes), desc="Processing Scenes", leave=False):
+                dataset.append(self._generate_scene_data(scene_idx=scene_idx, rt_loader=rt_loader))
+            return dataset
+        
+        if executor is None:
+            # The dataset is sent once to each worker, and only the scene indices are sent with the tasks
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_scene_worker, initargs=(self, )) as executor:
+                return self._generate_data_parallel(scenes, executor, initialized=True)
+        return self._generate_data_parallel(scenes, executor)
+    
+    def _generate_data_parallel(self, scenes, executor, initialized=False):
+        # Futures are kept in the scene order, the progress is updated as they complete
+        # The dataset is sent with each scene to the executors that are not initialized with it
+        if initialized:
+            futures = [executor.submit(_generate_scene_worker, scene_idx) for scene_idx in scenes]
+        else:
+            futures = [executor.submit(_generate_scene_worker, scene_idx, self) for scene_idx in scenes]
+        for _ in tqdm(as_completed(futures), total=len(futures), desc="Processing Scenes", leave=False):
+            pass
+        return [future.result() for future in futures]
+
+
+def _same_geometry(antennas):
+    # The array responses depend only on the shape and the spacing of the antennas
+    return len({(tuple(np.ravel(ant.shape)), ant.spacing) for ant in antennas}) <= 1
+
+
+# Dataset of the worker processes, set by the pool initializer
+_worker_dataset = None
+
+
+def _init_scene_worker(dataset):
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _generate_scene_worker(scene_idx, dataset=None):
+    # The nested progress bars are disabled in the workers,
+    # the aggregated scene progress is reported by the main process
+    if dataset is None:
+        dataset = _worker_dataset
+    dataset.progress = False
+    return dataset._generate_scene_data(scene_idx=scene_idx)
+
+
+class RadarDataset(WirelessDataset):
     def _validate_parameters(self, params):
         
         params['user_rows'] = np.array([0]) # Dynamic scenarios
@@ -32,66 +279,197 @@ class RadarDataset:
             
         # BS antenna format
         params['tx_ant_objs'] = create_antennas(ant_params=params[c.PARAMSET_ANT_TX], 
-                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]))
+                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]), rng=self._device_rng(0))
             
         params['rx_ant_objs'] = create_antennas(ant_params=params[c.PARAMSET_ANT_RX], 
-                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]))
+                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]), rng=self._device_rng(1))
+        
+        self.steering_cache = create_steering_cache(params.get(c.PARAMSET_STEERING_CACHE), 
+                                                    [params['tx_ant_objs'], params['rx_ant_objs']])
+        
+        params[c.PARAMSET_PRECISION] = params.get(c.PARAMSET_PRECISION, 'double')
+        precision_dtypes(params[c.PARAMSET_PRECISION]) # Validates the precision
+        
+        # Radar processing stage
+        processing = dict(params.get(c.PARAMSET_RADAR_PROCESSING) or {})
+        self.cache_maps = processing.pop('cache', False)
+        self.maps = processing.pop('maps', RADAR_MAPS)
+        rx_shapes = {tuple(int(n) for n in np.ravel(ant.shape)) for ant in params['rx_ant_objs']}
+        if len(rx_shapes) == 1:
+            processing.setdefault('rx_shape', rx_shapes.pop())
+        elif any(min(shape) > 1 for shape in rx_shapes):
+            raise ValueError("The radar processing requires the planar RX antennas to have the same shape.")
+        self.processor = RadarProcessor(**processing)
+        
+        # Only the paths are stored, the channels are not generated
+        params[c.PARAMSET_PATHS_ONLY] = bool(params.get(c.PARAMSET_PATHS_ONLY, False))
         
         return params
 
-    def _generate_data(self, scenes):
-        dataset = []
-        for i, scene_idx in enumerate(tqdm(scenes, desc="Processing Scenes", leave=False)):
-            dataset.append(self._generate_scene_data(scene_idx=scene_idx))
-            
-        return dataset
-    
-    def _generate_scene_data(self, scene_idx):
+    def _generate_scene_data(self, scene_idx, rt_loader=None):
         params = self.params.copy()
         
         # TODO: Move these to dataset object initialization
         carrier_freq = params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF]
         waveform = FMCW(**params['FMCW'], f_0=carrier_freq)
         
-        scene_folder = os.path.join(os.path.abspath(params[c.PARAMSET_DATASET_FOLDER]), 
-                                    params[c.PARAMSET_SCENARIO],
-                                    'wireless',
-                                    'scene_' + str(scene_idx)
-                                   )
-        rt_loader = RayTracingLoader(scene_folder)
+        if rt_loader is None:
+            rt_loader = self._get_ray_tracing_loader(scene_idx)
         num_active_bs = len(params[c.PARAMSET_ACTIVE_BS])
-        dataset = []
+        bs_indx = params[c.PARAMSET_ACTIVE_BS]
+        
+        # Paths of all (tx BS, rx BS) links of the scene
+        # The BSs with the ray data of the previous scene share its paths and channels
+        links, batches, keys = [], [], []
+        dataset = [None] * num_active_bs
         for i in range(num_active_bs):
-            bs_indx = params[c.PARAMSET_ACTIVE_BS]
-            
             raydata, _ = rt_loader.load_data(tx_idx=bs_indx[i]-1, rx_idx=bs_indx-1, user=False)
-            bs_channels = []
-            n_bs = len(raydata['paths'])
-            for j in tqdm(range(n_bs), desc=f'Generating BS{bs_indx[i]} channels', leave=False):
-                paths = Paths(raydata['paths'][j], carrier_freq, params['num_paths']).apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=params['rx_ant_objs'][j])
-                    
-                channel = RadarChannel(tx_antenna=params['tx_ant_objs'][i],
-                                       rx_antenna=params['rx_ant_objs'][j],
-                                       paths=paths, 
+            key, shared = self._shared_bs_links(i, raydata)
+            keys.append(key)
+            if shared is not None:
+                batches.append(shared[0])
+                dataset[i] = shared[1]
+                continue
+            n_bs = len(raydata[c.OUT_PATH_OFFSETS]) - 1
+            batch = PathsBatch.from_ray_data(raydata[c.OUT_PATH], raydata[c.OUT_PATH_OFFSETS], carrier_freq, params['num_paths'])
+            batch.apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=params['rx_ant_objs'][:n_bs])
+            batches.append(batch)
+            dataset[i] = []
+            links += [(i, j, batch[j]) for j in range(n_bs)]
+        
+        if params[c.PARAMSET_PATHS_ONLY]:
+            for i in range(num_active_bs):
+                self._share_bs_links(i, keys[i], (batches[i], None))
+            return batches
+        
+        tx_antennas = [params['tx_ant_objs'][i] for i, _, _ in links]
+        rx_antennas = [params['rx_ant_objs'][j] for _, j, _ in links]
+        if len(links) == 0:
+            channels = []
+        elif _same_geometry(tx_antennas) and _same_geometry(rx_antennas):
+            # All links of the scene are generated at once
+            channels = RadarChannelBatch(tx_antennas=tx_antennas,
+                                         rx_antennas=rx_antennas,
+                                         paths=[paths for _, _, paths in links],
+                                         carrier_freq=carrier_freq,
+                                         waveform=waveform,
+                                         params=params,
+                                         max_memory=params.get(c.PARAMSET_MAX_MEMORY),
+                                         precision=params[c.PARAMSET_PRECISION]
+                                        )
+            channels.generate()
+            maps = self.processor.process(channels.coeffs, maps=self.maps) if self.cache_maps else None
+            channels = [channels[k] for k in range(len(channels))]
+            if maps is not None:
+                for k, channel in enumerate(channels):
+                    channel.maps = {map_type: maps[map_type][k] for map_type in maps}
+        else:
+            channels = []
+            for k in tqdm(range(len(links)), desc='Generating radar channels', leave=False, disable=not self.progress):
+                channel = RadarChannel(tx_antenna=tx_antennas[k],
+                                       rx_antenna=rx_antennas[k],
+                                       paths=links[k][2], 
                                        carrier_freq=carrier_freq, 
                                        waveform=waveform, 
-                                       params=params
+                                       params=params,
+                                       max_memory=params.get(c.PARAMSET_MAX_MEMORY),
+                                       precision=params[c.PARAMSET_PRECISION]
                                       )
                 channel.generate()
-                bs_channels.append(channel)
-            dataset.append(bs_channels)
+                if self.cache_maps:
+                    channel.maps = self.processor.process(channel.coeffs, maps=self.maps)
+                channels.append(channel)
+        
+        for (i, _, _), channel in zip(links, channels):
+            dataset[i].append(channel)
+        for i in range(num_active_bs):
+            self._share_bs_links(i, keys[i], (batches[i], dataset[i]))
         return dataset
     
+    def _prefetch_scene(self, rt_loader, executor):
+        rt_loader.prefetch(executor, np.asarray(self.params[c.PARAMSET_ACTIVE_BS]) - 1, user=False)
+    
     def get_sample(self, tx_bs_idx, rx_bs_idx, sample_idx):
+        if self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The channels are not generated in the paths only mode. Use get_paths() instead.")
+        return self.data[sample_idx][tx_bs_idx][rx_bs_idx]
+    
+    def get_paths(self, tx_bs_idx, rx_bs_idx, sample_idx):
+        """
+        Returns the paths of a radar link after the antenna rotation and FoV filtering, in the paths only mode.
+        """
+        if not self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The paths are only stored in the paths only mode.")
         return self.data[sample_idx][tx_bs_idx][rx_bs_idx]
+    
+    def get_map(self, map_type, tx_bs_idx, rx_bs_idx, sample_idx):
+        """
+        Retrieves the range-Doppler or range-angle map of a radar link.
 
+        The map is read from the cache if the maps were computed with the channels ('cache' in the
+        processing parameters), and is computed on the fly otherwise.
 
-class CommunicationDataset:
-    def __init__(self, params):
-        self.params = params
-        self._validate_parameters(self.params)
-        self.data = self._generate_data(params[c.PARAMSET_DYNAMIC_SCENES])
+        Args:
+            map_type (str): 'range_doppler' or 'range_angle'.
+            tx_bs_idx (int): Index of the transmitting BS.
+            rx_bs_idx (int): Index of the receiving BS.
+            sample_idx (int): Index of the scene.
+
+        Returns:
+            numpy.ndarray: The map of the link.
+        """
+        channel = self.get_sample(tx_bs_idx, rx_bs_idx, sample_idx)
+        if channel.maps is not None and map_type in channel.maps:
+            return channel.maps[map_type]
+        return self.processor.process(channel.coeffs, maps=[map_type])[map_type]
+    
+    def get_maps(self, map_type, scenes=None):
+        """
+        Retrieves the maps of all radar links of the given scenes.
+
+        The maps that are not cached are computed with a single batched FFT over all links and scenes,
+        which requires the same antenna shapes for all links.
+
+        Args:
+            map_type (str): 'range_doppler' or 'range_angle'.
+            scenes (list of int, optional): Indices of the scenes. Defaults to all scenes.
+
+        Returns:
+            numpy.ndarray: The maps of shape (num_scenes, num_tx_bs, num_rx_bs, ...).
+        """
+        if self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The radar maps are not available in the paths only mode.")
+        if self.data is None:
+            raise RuntimeError("The radar maps of a streamed dataset are available through iter_scenes().")
+        scenes = range(len(self.data)) if scenes is None else scenes
+        channels = [self.data[t] for t in scenes]
+        if all(channel.maps is not None and map_type in channel.maps for scene in channels for row in scene for channel in row):
+            return np.array([[[channel.maps[map_type] for channel in row] for row in scene] for scene in channels])
         
+        IF_signal = np.array([[[channel.coeffs for channel in row] for row in scene] for scene in channels])
+        return self.processor.process(IF_signal, maps=[map_type])[map_type]
+
+
+class CommunicationDataset(WirelessDataset):
+    storage = None
+    _storage_files = None
+    cache_hits = 0
+    cache_misses = 0
+    
+    def __init__(self, params, executor=None, generate=True, moving_objects=None):
+        """
+        Initializes and generates the communication dataset.
+
+        Args:
+            params (dict): A dictionary of parameters. See WirelessDataset.
+            executor (concurrent.futures.Executor, optional): See WirelessDataset.
+            generate (bool, optional): See WirelessDataset.
+            moving_objects (dict, optional): The MovingObject instances of the scenario by object ID, used to
+                orient the UE antennas along the object headings with the 'ue_orientation': 'mobility' parameter.
+        """
+        self.moving_objects = moving_objects
+        super().__init__(params, executor=executor, generate=generate)
+    
     def _validate_parameters(self, params):
         
         params['user_rows'] = np.array([0]) # Dynamic scenarios
@@ -108,35 +486,164 @@ class CommunicationDataset:
             
         # BS antenna format
         params['tx_ant_objs'] = create_antennas(ant_params=params[c.PARAMSET_ANT_BS], 
-                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]))
+                                                n_ant=len(params[c.PARAMSET_ACTIVE_BS]), rng=self._device_rng(0))
             
         # TODO: Fix number of active users..
         params[c.PARAMSET_ACTIVE_UE] = [0]
         params['rx_ant_objs'] = create_antennas(ant_params=params[c.PARAMSET_ANT_UE], 
-                                                n_ant=len(params[c.PARAMSET_ACTIVE_UE]))
+                                                n_ant=len(params[c.PARAMSET_ACTIVE_UE]), rng=self._device_rng(1))
+        
+        self.steering_cache = create_steering_cache(params.get(c.PARAMSET_STEERING_CACHE), 
+                                                    [params['tx_ant_objs'], params['rx_ant_objs']])
+        
+        # UE antenna orientations: static, or the static rotation relative to the heading of the moving objects
+        params[c.PARAMSET_UE_ORIENTATION] = params.get(c.PARAMSET_UE_ORIENTATION, 'static')
+        if params[c.PARAMSET_UE_ORIENTATION] not in ['static', 'mobility']:
+            raise ValueError("The UE orientation must be 'static' or 'mobility'.")
+        self._orientation_index = None
+        if params[c.PARAMSET_UE_ORIENTATION] == 'mobility':
+            if self.moving_objects is None:
+                raise ValueError("The moving objects must be given for the 'mobility' UE orientation.")
+            self._orientation_index = scene_orientation_index(self.moving_objects, params[c.PARAMSET_DYNAMIC_SCENES])
+        
+        params[c.PARAMSET_PRECISION] = params.get(c.PARAMSET_PRECISION, 'double')
+        precision_dtypes(params[c.PARAMSET_PRECISION]) # Validates the precision
+        
+        # Computation of the channels over the subcarriers
+        params[c.PARAMSET_SC_STRATEGY] = params.get(c.PARAMSET_SC_STRATEGY, 'direct')
+        if params[c.PARAMSET_SC_STRATEGY] not in ['auto', 'direct', 'fft']:
+            raise ValueError("The subcarrier strategy must be 'auto', 'direct' or 'fft'.")
+        params[c.PARAMSET_FFT_THRESHOLD] = params.get(c.PARAMSET_FFT_THRESHOLD, 1.)
+        
+        # OFDM or time-domain (sampled CIR taps) channels, with the receive filter
+        params[c.PARAMSET_FDTD] = params.get(c.PARAMSET_FDTD, 1)
+        params[c.PARAMSET_OFDM_LPF] = rx_filter_type(params.get(c.PARAMSET_OFDM_LPF, 0))
+        params[c.PARAMSET_OFDM_LPF_ROLLOFF] = params.get(c.PARAMSET_OFDM_LPF_ROLLOFF, 0.)
+        if not 0 <= params[c.PARAMSET_OFDM_LPF_ROLLOFF] <= 1:
+            raise ValueError("The RX filter roll-off factor must be in [0, 1].")
+        if not params[c.PARAMSET_FDTD]:
+            td = {c.PARAMSET_TD_TAPS: params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_NUM],
+                  c.PARAMSET_TD_FS: params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_BW]}
+            td.update(params.get(c.PARAMSET_TD) or {})
+            params[c.PARAMSET_TD] = td
+        
+        params[c.PARAMSET_STORAGE] = params.get(c.PARAMSET_STORAGE, 'memory')
+        if params[c.PARAMSET_STORAGE] not in ['memory', 'memmap']:
+            raise ValueError("The comm storage parameter must be 'memory' or 'memmap'.")
+        
+        # Only the paths are stored, the channels are not generated
+        params[c.PARAMSET_PATHS_ONLY] = bool(params.get(c.PARAMSET_PATHS_ONLY, False))
+        if params[c.PARAMSET_PATHS_ONLY] and (params[c.PARAMSET_STORAGE] != 'memory' or params.get(c.PARAMSET_BEAMSPACE)):
+            raise ValueError("The paths only mode does not support the memmap storage and the beamspace outputs.")
+        
+        # On-demand generation of the requested links, kept in an LRU cache
+        on_demand = params.get(c.PARAMSET_ON_DEMAND, False)
+        if on_demand:
+            if params[c.PARAMSET_STORAGE] != 'memory' or params[c.PARAMSET_PATHS_ONLY] or params.get(c.PARAMSET_BEAMSPACE):
+                raise ValueError("The on-demand mode does not support the memmap storage, the paths only mode and the beamspace outputs.")
+            on_demand = {c.PARAMSET_ON_DEMAND_CACHE: 1024, c.PARAMSET_ON_DEMAND_SCENES: 4, 
+                         **(on_demand if isinstance(on_demand, dict) else {})}
+            if on_demand[c.PARAMSET_ON_DEMAND_CACHE] < 1 or on_demand[c.PARAMSET_ON_DEMAND_SCENES] < 1:
+                raise ValueError("The on-demand cache sizes must be at least 1.")
+        params[c.PARAMSET_ON_DEMAND] = on_demand or None
+        self._link_cache = OrderedDict()
+        self._on_demand_scenes = OrderedDict()
+        
+        # Beamspace outputs with DFT codebooks
+        if params.get(c.PARAMSET_BEAMSPACE):
+            if not params[c.PARAMSET_FDTD]:
+                raise ValueError("The beamspace outputs require the OFDM channels.")
+            beamspace = {'output': 'power', 'bs_oversampling': [1, 1], 'ue_oversampling': [1, 1], 'element_channels': False}
+            beamspace.update(params[c.PARAMSET_BEAMSPACE] if isinstance(params[c.PARAMSET_BEAMSPACE], dict) else {})
+            if beamspace['output'] not in ['power', 'channel']:
+                raise ValueError("The beamspace output must be 'power' or 'channel'.")
+            params[c.PARAMSET_BEAMSPACE] = beamspace
+            params['bs_codebooks'] = [DFTCodebook(ant.shape, beamspace['bs_oversampling']) for ant in params['tx_ant_objs']]
+            params['ue_codebook'] = DFTCodebook(params['rx_ant_objs'][0].shape, beamspace['ue_oversampling'])
+        else:
+            params[c.PARAMSET_BEAMSPACE] = None
         
         return params
     
+    def _generate_data(self, scenes, executor=None):
+        if self.params[c.PARAMSET_ON_DEMAND] is not None:
+            return None # The links are generated when they are requested
+        
+        if self.params[c.PARAMSET_STORAGE] == 'memmap':
+            self._allocate_storage(scenes)
+        
+        dataset = super()._generate_data(scenes, executor=executor)
+        
+        if self.params[c.PARAMSET_STORAGE] == 'memmap':
+            self.storage = self._open_storage(mode='r')
+        return dataset
+    
+    def _allocate_storage(self, scenes):
+        """
+        Preallocates the on-disk channel arrays of the memmap storage mode.
+
+        The channels are stored in the 'storage_path' folder as .npy files with the layouts
+        (scene, bs, ue, rx, tx, subcarrier) for the BS-UE channels and (scene, tx bs, rx bs, rx, tx, subcarrier)
+        for the BS-BS channels, with the taps instead of the subcarriers for the time-domain channels. The UE dimension is sized for the scene with the largest number of UEs,
+        and the number of UEs of each scene and BS is stored in num_ue.npy. The channels are stored in the
+        complex type of the generation precision, unless another 'storage_dtype' is given.
 
+        Args:
+            scenes (list): Indices of the scenes to be generated.
+        """
+        storage_path = self.params.get(c.PARAMSET_STORAGE_PATH, None)
+        if storage_path is None:
+            raise ValueError("The storage_path parameter must be set for the memmap storage.")
+        os.makedirs(storage_path, exist_ok=True)
+        
+        num_bs_elements = {int(ant.num_elements()) for ant in self.params['tx_ant_objs']}
+        if len(num_bs_elements) > 1:
+            raise ValueError("The memmap storage requires the BS antennas to have the same number of elements.")
+        N_bs = num_bs_elements.pop()
+        N_ue = int(self.params['rx_ant_objs'][0].num_elements())
+        if self.params[c.PARAMSET_FDTD]:
+            N_sc = len(self.params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_SAMP])
+        else:
+            N_sc = int(self.params[c.PARAMSET_TD][c.PARAMSET_TD_TAPS])
+        num_active_bs = len(self.params[c.PARAMSET_ACTIVE_BS])
+        max_num_ue = int(max([self._scene_num_ue(scene_idx) for scene_idx in scenes], default=0))
+        dtype = np.dtype(self.params.get(c.PARAMSET_STORAGE_DTYPE) or precision_dtypes(self.params[c.PARAMSET_PRECISION])[1])
+        
+        self._scene_position = {scene_idx: t for t, scene_idx in enumerate(scenes)}
+        self._storage_files = {key: os.path.join(os.path.abspath(storage_path), key + '.npy') 
+                               for key in ['ue_channels', 'bs_channels', 'num_ue']}
+        np.lib.format.open_memmap(self._storage_files['ue_channels'], mode='w+', dtype=dtype,
+                                  shape=(len(scenes), num_active_bs, max_num_ue, N_ue, N_bs, N_sc))
+        np.lib.format.open_memmap(self._storage_files['bs_channels'], mode='w+', dtype=dtype,
+                                  shape=(len(scenes), num_active_bs, num_active_bs, N_bs, N_bs, N_sc))
+        np.lib.format.open_memmap(self._storage_files['num_ue'], mode='w+', dtype=int,
+                                  shape=(len(scenes), num_active_bs))
     
-    def _generate_data(self, scenes):
-        dataset = []
-        for i, scene_idx in enumerate(tqdm(scenes, desc="Processing Scenes", leave=False)):
-            dataset.append(self._generate_scene_data(scene_idx=scene_idx))
-            
-        return dataset
+    def _scene_num_ue(self, scene_idx):
+        # Number of UEs of a scene, from the ray-tracing index if it lists the scene
+        index = self._ray_tracing_index()
+        scene_name = 'scene_' + str(scene_idx)
+        if index is not None and scene_name in index['scenes']:
+            return index['scenes'][scene_name]['num_ue']
+        return self._get_ray_tracing_loader(scene_idx).num_ue
     
+    def _open_storage(self, mode):
+        return {key: np.load(file, mmap_mode=mode) for key, file in self._storage_files.items()}
     
-    def _generate_scene_data(self, scene_idx):
+    def _generate_scene_data(self, scene_idx, rt_loader=None):
         params = self.params.copy()
         carrier_freq = params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF]
         
-        scene_folder = os.path.join(os.path.abspath(params[c.PARAMSET_DATASET_FOLDER]), 
-                                    params[c.PARAMSET_SCENARIO],
-                                    'wireless',
-                                    'scene_' + str(scene_idx)
-                                   )
-        rt_loader = RayTracingLoader(scene_folder)
+        # Channels are written into the on-disk arrays instead of being kept in the scene data
+        # Streamed scenes (without preallocated storage) are kept in memory
+        storage = None
+        if self._storage_files is not None:
+            storage = self._open_storage(mode='r+')
+            t = self._scene_position[scene_idx]
+        
+        if rt_loader is None:
+            rt_loader = self._get_ray_tracing_loader(scene_idx)
+        ue_antennas = self._ue_antennas(scene_idx, rt_loader.num_ue)
         num_active_bs = len(params[c.PARAMSET_ACTIVE_BS])
         dataset = []
         for i in range(num_active_bs):
@@ -145,63 +652,445 @@ class CommunicationDataset:
             bs_indx = params[c.PARAMSET_ACTIVE_BS]
             
             #%%
-            # TODO: When adding the feature for static users, fix None for rx_idx
-            # rx_idx=None to generate all users
-            raydata, bs_data['bs_loc'] = rt_loader.load_data(tx_idx=bs_indx[i]-1, rx_idx=None, user=True)
-
-            ue_channels = []
-            n_ue = len(raydata['paths'])
-            for j in tqdm(range(n_ue), desc=f'Generating BS{bs_indx[i]}-UE channels', leave=False):
-                # TODO: Fix selecting a single antenna - antennas need to be defined for each dynamic object & static object
-                paths = Paths(raydata['paths'][j], carrier_freq, params['num_paths']).apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=params['rx_ant_objs'][0])
-                channel = OFDMChannel(tx_antenna=params['tx_ant_objs'][i], 
-                                      rx_antenna=params['rx_ant_objs'][0], 
-                                      paths=paths, 
-                                      carrier_freq=carrier_freq, 
-                                      bandwidth=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_BW]* c.PARAMSET_OFDM_BW_MULT, 
-                                      num_subcarriers=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_NUM],
-                                      select_subcarriers=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_SAMP],
-                                      rx_filter=None, #params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_LPF],
-                                      params=params,
-                                      doppler_shift=params['enable_Doppler']
-                                     )
-                channel.generate()
-                ue_channels.append(channel)
-            bs_data['ue'] = ue_channels
+            raydata, bs_data['bs_loc'], ue_paths = self._load_ue_paths(rt_loader, i, params, ue_antennas)
+            n_ue = len(ue_paths)
+            if params[c.PARAMSET_PATHS_ONLY]:
+                bs_data['ue_paths'] = ue_paths
+            else:
+                ue_channels = self._ue_channel_batch(i, ue_paths, params)
+                beamspace = params[c.PARAMSET_BEAMSPACE]
+                if beamspace is not None:
+                    bs_data['ue_beamspace'] = ue_channels.generate_beamspace(tx_codebook=params['bs_codebooks'][i],
+                                                                             rx_codebook=params['ue_codebook'],
+                                                                             power=beamspace['output'] == 'power')
+                if storage is None:
+                    # The element-domain channels are skipped if only the beamspace outputs are requested
+                    if beamspace is None or beamspace['element_channels']:
+                        ue_channels.generate()
+                        bs_data['ue'] = ue_channels
+                else:
+                    ue_channels.generate(out=storage['ue_channels'][t, i, :n_ue])
+                    storage['num_ue'][t, i] = n_ue
             bs_data['ue_loc'] = np.asarray(raydata['location']).reshape((-1, 3))
             
             #%%
-            raydata, _ = rt_loader.load_data(tx_idx=bs_indx[i]-1, rx_idx=bs_indx-1, user=False)
+            bs_paths, bs_channels = self._generate_bs_links(rt_loader, i, params)
+            if params[c.PARAMSET_PATHS_ONLY]:
+                bs_data['bs_paths'] = bs_paths
+                dataset.append(bs_data)
+                continue
+            
+            if storage is None:
+                bs_data['bs'] = bs_channels
+            else:
+                for j, channel in enumerate(bs_channels):
+                    if channel.coeffs is not None:
+                        storage['bs_channels'][t, i, j] = channel.coeffs
+            dataset.append(bs_data)
+        
+        if storage is not None:
+            for array in storage.values():
+                array.flush()
+        return dataset
+    
+    def _generate_bs_links(self, rt_loader, i, params):
+        """
+        Generates the links between the i-th active BS and the active BSs of a scene, or returns the links
+        of the previous scene if the BS-BS ray data of the BS is unchanged.
+
+        Returns:
+            tuple: The PathsBatch of the BS-BS paths and the list of the channels (None in the paths only mode).
+        """
+        carrier_freq = params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF]
+        bs_indx = params[c.PARAMSET_ACTIVE_BS]
+        raydata, _ = rt_loader.load_data(tx_idx=bs_indx[i]-1, rx_idx=bs_indx-1, user=False)
+        key, shared = self._shared_bs_links(i, raydata)
+        if shared is not None:
+            return shared
+        
+        n_bs = len(raydata[c.OUT_PATH_OFFSETS]) - 1
+        bs_paths = PathsBatch.from_ray_data(raydata[c.OUT_PATH], raydata[c.OUT_PATH_OFFSETS], carrier_freq, params['num_paths'])
+        bs_paths.apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=params['tx_ant_objs'][:n_bs])
+        bs_channels = None
+        if not params[c.PARAMSET_PATHS_ONLY]:
             bs_channels = []
-            n_bs = len(raydata['paths'])
-            for j in tqdm(range(n_bs), desc=f'Generating BS{bs_indx[i]}-BS channels', leave=False):
-                paths = Paths(raydata['paths'][j], carrier_freq, params['num_paths']).apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=params['tx_ant_objs'][j])
-                channel = OFDMChannel(tx_antenna=params['tx_ant_objs'][i], 
-                                      rx_antenna=params['tx_ant_objs'][j], 
-                                      paths=paths, 
-                                      carrier_freq=carrier_freq, 
-                                      bandwidth=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_BW]* c.PARAMSET_OFDM_BW_MULT, 
-                                      num_subcarriers=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_NUM],
-                                      select_subcarriers=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_SAMP],
-                                      rx_filter=None, #params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_LPF],
-                                      params=params,
-                                      doppler_shift=params['enable_Doppler']
-                                     )
+            for j in tqdm(range(n_bs), desc=f'Generating BS{bs_indx[i]}-BS channels', leave=False, disable=not self.progress):
+                channel = self._bs_channel(i, j, bs_paths[j], params)
                 channel.generate()
                 bs_channels.append(channel)
-            bs_data['bs'] = bs_channels
-            
-        dataset.append(bs_data)
-        return dataset
+        self._share_bs_links(i, key, (bs_paths, bs_channels))
+        return bs_paths, bs_channels
+    
+    def _ue_antennas(self, scene_idx, num_ue):
+        """
+        Creates the antennas of the UEs of a scene, with one device per UE. The random rotations
+        are drawn from the generator of the scene.
+        
+        With the 'mobility' UE orientation, the heading angle and the slope of the moving object of each UE
+        are added to the azimuth (Alpha) and the tilt (Beta) rotations of its antenna, in degrees. The
+        objects are mapped to the UEs of the scene with the orientation index (see scene_orientation_index).
+        """
+        antennas = create_antennas(ant_params=self.params[c.PARAMSET_ANT_UE], n_ant=int(num_ue), rng=self._scene_rng(scene_idx))
+        if self._orientation_index is None or scene_idx not in self._orientation_index:
+            return antennas
+        
+        objects = self._orientation_index[scene_idx]
+        ue = objects['ue']
+        invalid = (ue < 0) | (ue >= len(antennas))
+        if np.any(invalid):
+            object_id = objects['object_id'][np.argmax(invalid)]
+            raise ValueError(f"The moving object {object_id} of the scene {scene_idx} is mapped to the UE {ue[invalid][0]}, "
+                             f"but the scene has {len(antennas)} UEs.")
+        rotations = np.nan_to_num(antennas.rotations)
+        rotations[ue, 2] += objects['angle']
+        rotations[ue, 1] += objects['slope']
+        return AntennaSet(antennas.antennas, antennas.device_antenna, rotations=rotations, FoVs=antennas.FoVs)
+    
+    def _load_ue_paths(self, rt_loader, i, params, ue_antennas, rx_idx=None):
+        """
+        Loads the paths between the i-th active BS and the UEs of a scene, with the
+        rotation and the FoV of each UE given by the UE AntennaSet of the scene. All UEs
+        are loaded if rx_idx is None, and ue_antennas holds the antennas of the loaded UEs.
+
+        Returns:
+            tuple: The ray-tracing data, the BS location and the PathsBatch of the UE paths.
+        """
+        carrier_freq = params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF]
+        bs_indx = params[c.PARAMSET_ACTIVE_BS]
+        
+        # TODO: When adding the feature for static users, fix None for rx_idx
+        # rx_idx=None to generate all users
+        raydata, bs_loc = rt_loader.load_data(tx_idx=bs_indx[i]-1, rx_idx=rx_idx, user=True)
+
+        ue_paths = PathsBatch.from_ray_data(raydata[c.OUT_PATH], raydata[c.OUT_PATH_OFFSETS], carrier_freq, params['num_paths'])
+        ue_paths.apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][i], RX_antenna=ue_antennas[:len(ue_paths)])
+        return raydata, bs_loc, ue_paths
+    
+    def _ue_channel_batch(self, i, ue_paths, params, select_subcarriers=None):
+        """
+        Creates the OFDMChannelBatch (or the TDChannelBatch of the time-domain channels) of the i-th
+        active BS and the UEs with the given paths. The OFDM selected subcarriers are used if
+        select_subcarriers is None.
+        """
+        # The UEs share the geometry of the UE antenna, their rotations and FoVs are already applied to the paths
+        if not params[c.PARAMSET_FDTD]:
+            return TDChannelBatch(tx_antenna=params['tx_ant_objs'][i], 
+                                  rx_antenna=params['rx_ant_objs'][0], 
+                                  paths=ue_paths, 
+                                  **self._td_channel_params(params))
+        return OFDMChannelBatch(tx_antenna=params['tx_ant_objs'][i], 
+                                rx_antenna=params['rx_ant_objs'][0], 
+                                paths=ue_paths, 
+                                **self._ofdm_channel_params(params, select_subcarriers))
+    
+    def _bs_channel(self, i, j, paths, params):
+        """
+        Creates the channel between the i-th and j-th active BSs with the given paths.
+        """
+        if not params[c.PARAMSET_FDTD]:
+            return TDChannel(tx_antenna=params['tx_ant_objs'][i], 
+                             rx_antenna=params['tx_ant_objs'][j], 
+                             paths=paths, 
+                             **self._td_channel_params(params))
+        return OFDMChannel(tx_antenna=params['tx_ant_objs'][i], 
+                           rx_antenna=params['tx_ant_objs'][j], 
+                           paths=paths, 
+                           **self._ofdm_channel_params(params))
+    
+    def _ofdm_channel_params(self, params, select_subcarriers=None):
+        if select_subcarriers is None:
+            select_subcarriers = params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_SAMP]
+        return dict(carrier_freq=params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF], 
+                    bandwidth=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_BW]* c.PARAMSET_OFDM_BW_MULT, 
+                    num_subcarriers=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_SC_NUM],
+                    select_subcarriers=select_subcarriers,
+                    rx_filter=params[c.PARAMSET_OFDM_LPF],
+                    rolloff=params[c.PARAMSET_OFDM_LPF_ROLLOFF],
+                    params=params,
+                    doppler_shift=params['enable_Doppler'],
+                    precision=params[c.PARAMSET_PRECISION],
+                    strategy=params[c.PARAMSET_SC_STRATEGY],
+                    fft_threshold=params[c.PARAMSET_FFT_THRESHOLD])
+    
+    def _td_channel_params(self, params):
+        return dict(carrier_freq=params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF], 
+                    bandwidth=params[c.PARAMSET_OFDM][c.PARAMSET_OFDM_BW]* c.PARAMSET_OFDM_BW_MULT, 
+                    num_taps=int(params[c.PARAMSET_TD][c.PARAMSET_TD_TAPS]),
+                    sampling_rate=params[c.PARAMSET_TD][c.PARAMSET_TD_FS]* c.PARAMSET_OFDM_BW_MULT,
+                    rx_filter=params[c.PARAMSET_OFDM_LPF],
+                    rolloff=params[c.PARAMSET_OFDM_LPF_ROLLOFF],
+                    params=params,
+                    doppler_shift=params['enable_Doppler'],
+                    precision=params[c.PARAMSET_PRECISION])
+    
+    def _on_demand_scene(self, time_idx):
+        # Ray-tracing loader and UE antennas of a scene, kept for the later links of the
+        # 'scene_cache_size' most recently used scenes
+        scene_idx = self.params[c.PARAMSET_DYNAMIC_SCENES][time_idx]
+        if scene_idx in self._on_demand_scenes:
+            self._on_demand_scenes.move_to_end(scene_idx)
+            return self._on_demand_scenes[scene_idx]
+        
+        rt_loader = self._get_ray_tracing_loader(scene_idx)
+        self._on_demand_scenes[scene_idx] = (rt_loader, self._ue_antennas(scene_idx, rt_loader.num_ue))
+        if len(self._on_demand_scenes) > self.params[c.PARAMSET_ON_DEMAND][c.PARAMSET_ON_DEMAND_SCENES]:
+            self._on_demand_scenes.popitem(last=False)
+        return self._on_demand_scenes[scene_idx]
+    
+    def _cached_link(self, key, generate):
+        """
+        Returns the cached value of a link, generating it with generate() on a miss. The least
+        recently used links are evicted beyond the 'cache_size' of the on-demand parameters.
+        """
+        if key in self._link_cache:
+            self.cache_hits += 1
+            self._link_cache.move_to_end(key)
+            return self._link_cache[key]
+        
+        self.cache_misses += 1
+        value = generate()
+        self._link_cache[key] = value
+        if len(self._link_cache) > self.params[c.PARAMSET_ON_DEMAND][c.PARAMSET_ON_DEMAND_CACHE]:
+            self._link_cache.popitem(last=False)
+        return value
+    
+    def _generate_ue_link(self, ue_idx, bs_idx, time_idx):
+        """
+        Generates the channel between a BS and a UE from the ray-tracing file holding the UE.
+        """
+        params = self.params
+        rt_loader, ue_antennas = self._on_demand_scene(time_idx)
+        if not 0 <= ue_idx < len(ue_antennas):
+            raise IndexError(f"UE index {ue_idx} is out of range for the BS {bs_idx} at the time index {time_idx}.")
+        _, _, ue_paths = self._load_ue_paths(rt_loader, bs_idx, params, ue_antennas[ue_idx:ue_idx+1], rx_idx=np.array([ue_idx]))
+        if len(ue_paths) == 0:
+            raise IndexError(f"UE index {ue_idx} is out of range for the BS {bs_idx} at the time index {time_idx}.")
+        ue_channels = self._ue_channel_batch(bs_idx, ue_paths, params)
+        ue_channels.generate()
+        return ue_channels[0]
+    
+    def _generate_bs_link(self, tx_idx, rx_idx, time_idx):
+        # Generates the channel between two BSs from the BS-BS file of the transmitter
+        params = self.params
+        carrier_freq = params[c.PARAMSET_SCENARIO_PARAMS][c.PARAMSET_SCENARIO_PARAMS_CF]
+        bs_indx = params[c.PARAMSET_ACTIVE_BS]
+        rt_loader, _ = self._on_demand_scene(time_idx)
+        raydata, _ = rt_loader.load_data(tx_idx=bs_indx[tx_idx]-1, rx_idx=bs_indx[[rx_idx]]-1, user=False)
+        bs_paths = PathsBatch.from_ray_data(raydata[c.OUT_PATH], raydata[c.OUT_PATH_OFFSETS], carrier_freq, params['num_paths'])
+        if len(bs_paths) == 0:
+            raise IndexError(f"BS index {rx_idx} is not available for the BS {tx_idx} at the time index {time_idx}.")
+        bs_paths.apply_antenna_parameters(TX_antenna=params['tx_ant_objs'][tx_idx], RX_antenna=params['tx_ant_objs'][rx_idx:rx_idx+1])
+        channel = self._bs_channel(tx_idx, rx_idx, bs_paths[0], params)
+        channel.generate()
+        return channel
+    
+    def cache_info(self):
+        """
+        Returns the statistics of the on-demand link cache.
+
+        Returns:
+            dict: The number of cache 'hits' and 'misses', and the current and maximum number of cached links.
+        """
+        max_size = None if self.params[c.PARAMSET_ON_DEMAND] is None else self.params[c.PARAMSET_ON_DEMAND][c.PARAMSET_ON_DEMAND_CACHE]
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 
+                'size': len(self._link_cache), 'max_size': max_size}
+    
+    def clear_cache(self):
+        """
+        Clears the on-demand link cache and resets its statistics.
+        """
+        self._link_cache.clear()
+        self.cache_hits = self.cache_misses = 0
     
     def get_ue_channel(self, ue_idx, bs_idx, time_idx):
+        """
+        Returns the channel between a BS and a UE. In the memmap storage mode, the channel is
+        returned as a zero-copy (rx, tx, subcarrier) memory-mapped slice instead of an OFDMChannel.
+        In the on-demand mode, only the requested link is generated and it is kept in the LRU cache.
+        """
+        if self.params[c.PARAMSET_ON_DEMAND] is not None:
+            return self._cached_link(('ue', time_idx, bs_idx, ue_idx), 
+                                     lambda: self._generate_ue_link(ue_idx, bs_idx, time_idx))
+        if self.storage is not None:
+            if ue_idx >= self.storage['num_ue'][time_idx, bs_idx]:
+                raise IndexError(f"UE index {ue_idx} is out of range for the BS {bs_idx} at the time index {time_idx}.")
+            return self.storage['ue_channels'][time_idx, bs_idx, ue_idx]
+        if self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The channels are not generated in the paths only mode. Use get_ue_paths() instead.")
+        if 'ue' not in self.data[time_idx][bs_idx]:
+            raise RuntimeError("The element-domain UE channels are not generated. Set 'element_channels' in the beamspace parameters to keep them.")
         return self.data[time_idx][bs_idx]['ue'][ue_idx]
     
+    def get_ue_paths(self, ue_idx, bs_idx, time_idx):
+        """
+        Returns the paths between a BS and a UE after the antenna rotation and FoV filtering, in the paths only mode.
+        """
+        if not self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The paths are only stored in the paths only mode.")
+        return self.data[time_idx][bs_idx]['ue_paths'][ue_idx]
+    
+    def get_bs_paths(self, tx_idx, rx_idx, time_idx):
+        """
+        Returns the paths between two BSs after the antenna rotation and FoV filtering, in the paths only mode.
+        """
+        if not self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The paths are only stored in the paths only mode.")
+        return self.data[time_idx][tx_idx]['bs_paths'][rx_idx]
+    
+    def get_ue_beamspace(self, ue_idx, bs_idx, time_idx):
+        """
+        Returns the beamspace output between a BS and a UE, i.e., the (ue beam, bs beam) received powers
+        or the (ue beam, bs beam, subcarrier) beamspace channel depending on the beamspace 'output' parameter.
+        """
+        if self.params[c.PARAMSET_BEAMSPACE] is None:
+            raise RuntimeError("The beamspace parameters are not set.")
+        return self.data[time_idx][bs_idx]['ue_beamspace'][ue_idx]
+    
     def get_bs_channel(self, tx_idx, rx_idx, time_idx):
+        """
+        Returns the channel between two BSs. In the memmap storage mode, the channel is
+        returned as a zero-copy (rx, tx, subcarrier) memory-mapped slice instead of an OFDMChannel.
+        """
+        if self.params[c.PARAMSET_ON_DEMAND] is not None:
+            return self._cached_link(('bs', time_idx, tx_idx, rx_idx), 
+                                     lambda: self._generate_bs_link(tx_idx, rx_idx, time_idx))
+        if self.storage is not None:
+            return self.storage['bs_channels'][time_idx, tx_idx, rx_idx]
+        if self.params[c.PARAMSET_PATHS_ONLY]:
+            raise RuntimeError("The channels are not generated in the paths only mode. Use get_bs_paths() instead.")
         return self.data[time_idx][tx_idx]['bs'][rx_idx]
     
     def get_ue_location(self, ue_idx, bs_idx, time_idx):
+        if self.params[c.PARAMSET_ON_DEMAND] is not None:
+            # Read from the ray-tracing file holding the UE, without generating the channel
+            rt_loader, ue_antennas = self._on_demand_scene(time_idx)
+            if not 0 <= ue_idx < len(ue_antennas):
+                raise IndexError(f"UE index {ue_idx} is out of range for the BS {bs_idx} at the time index {time_idx}.")
+            raydata, _ = rt_loader.load_data(tx_idx=self.params[c.PARAMSET_ACTIVE_BS][bs_idx]-1, rx_idx=np.array([ue_idx]), user=True)
+            return np.asarray(raydata[c.OUT_LOC]).reshape(3)
         return self.data[time_idx][bs_idx]['ue_loc'][ue_idx]
     
     def get_bs_location(self, bs_idx, time_idx):
-        return self.data[time_idx][bs_idx]['bs_loc']
\ No newline at end of file
+        if self.params[c.PARAMSET_ON_DEMAND] is not None:
+            rt_loader, _ = self._on_demand_scene(time_idx)
+            return rt_loader.load_data(tx_idx=self.params[c.PARAMSET_ACTIVE_BS][bs_idx]-1, rx_idx=np.zeros(0, dtype=int), user=True)[1]
+        return self.data[time_idx][bs_idx]['bs_loc']
+
+
+class BeamSweepDataset(CommunicationDataset):
+    """
+    Communication dataset of the beam sweep received powers between the BSs and the UEs.
+
+    For each scene, BS and UE, the received power of every (UE beam, BS beam) pair of the codebooks is
+    reduced over the selected subcarriers, and only the top-k beam pairs and their powers are kept.
+    """
+    REDUCTIONS = {'mean': np.mean, 'sum': np.sum, 'max': np.max}
+    
+    def _validate_parameters(self, params):
+        """
+        Validates the parameters, with the beam sweep parameters given in the 'beam_sweep' entry:
+            bs_codebook, ue_codebook: Codebooks of the BS and UE antennas, given as the (num_elements, num_beams)
+                beam vectors, the path of a .npy file, or a dictionary with the DFT 'oversampling' (DFT if None).
+            subcarriers (list): Subcarriers of the power reduction. Defaults to the selected OFDM subcarriers.
+            reduction (str): 'mean', 'sum' or 'max' over the subcarriers. Defaults to 'mean'.
+            top_k (int): Number of the strongest beam pairs kept for each UE. Defaults to 8.
+            batch_size (int): Number of UEs of which the beamspace channels are computed at once. Defaults to 256.
+        """
+        params = super()._validate_parameters(params)
+        if params[c.PARAMSET_STORAGE] != 'memory':
+            raise ValueError("The beam sweep dataset only supports the memory storage.")
+        if not params[c.PARAMSET_FDTD] or params[c.PARAMSET_PATHS_ONLY]:
+            raise ValueError("The beam sweep dataset requires the OFDM channels.")
+        if params[c.PARAMSET_ON_DEMAND] is not None:
+            raise ValueError("The beam sweep dataset does not support the on-demand mode.")
+        
+        sweep = {'bs_codebook': None, 'ue_codebook': None, 'subcarriers': None, 
+                 'reduction': 'mean', 'top_k': 8, 'batch_size': 256}
+        sweep.update(params.get(c.PARAMSET_BEAM_SWEEP) or {})
+        if sweep['reduction'] not in self.REDUCTIONS:
+            raise ValueError(f"The beam sweep reduction must be one of {list(self.REDUCTIONS.keys())}.")
+        params[c.PARAMSET_BEAM_SWEEP] = sweep
+        
+        params['bs_codebooks'] = [create_codebook(sweep['bs_codebook'], ant) for ant in params['tx_ant_objs']]
+        params['ue_codebook'] = create_codebook(sweep['ue_codebook'], params['rx_ant_objs'][0])
+        num_beams = [codebook.num_beams() for codebook in params['bs_codebooks'] + [params['ue_codebook']]]
+        if max(num_beams) > np.iinfo(np.int16).max:
+            raise ValueError("The beam indices of the codebooks must fit in int16.")
+        return params
+    
+    def _generate_scene_data(self, scene_idx, rt_loader=None):
+        params = self.params.copy()
+        sweep = params[c.PARAMSET_BEAM_SWEEP]
+        reduce = self.REDUCTIONS[sweep['reduction']]
+        
+        if rt_loader is None:
+            rt_loader = self._get_ray_tracing_loader(scene_idx)
+        ue_antennas = self._ue_antennas(scene_idx, rt_loader.num_ue)
+        num_active_bs = len(params[c.PARAMSET_ACTIVE_BS])
+        dataset = []
+        for i in range(num_active_bs):
+            bs_data = {}
+            raydata, bs_data['bs_loc'], ue_paths = self._load_ue_paths(rt_loader, i, params, ue_antennas)
+            
+            n_ue = len(ue_paths)
+            num_bs_beams = params['bs_codebooks'][i].num_beams()
+            k = min(sweep['top_k'], num_bs_beams * params['ue_codebook'].num_beams())
+            beams = np.zeros((n_ue, k, 2), dtype=np.int16)
+            power = np.zeros((n_ue, k), dtype=np.float16)
+            for start in tqdm(range(0, n_ue, sweep['batch_size']), desc=f'Sweeping BS{params[c.PARAMSET_ACTIVE_BS][i]}-UE beams', leave=False, disable=not self.progress):
+                end = min(start + sweep['batch_size'], n_ue)
+                ue_channels = self._ue_channel_batch(i, ue_paths[start:end], params, select_subcarriers=sweep['subcarriers'])
+                beamspace = ue_channels.generate_beamspace(tx_codebook=params['bs_codebooks'][i],
+                                                           rx_codebook=params['ue_codebook'])
+                beam_power = reduce(np.abs(beamspace)**2, axis=-1).reshape((end-start, -1))
+                
+                # Top-k (UE beam, BS beam) pairs in descending power
+                top = np.argpartition(-beam_power, k-1, axis=1)[:, :k]
+                top_power = np.take_along_axis(beam_power, top, axis=1)
+                order = np.argsort(-top_power, axis=1)
+                top, top_power = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_power, order, axis=1)
+                
+                beams[start:end, :, 0], beams[start:end, :, 1] = np.divmod(top, num_bs_beams)
+                with np.errstate(divide='ignore'):
+                    power[start:end] = 10 * np.log10(top_power)
+            
+            bs_data['beams'] = beams
+            bs_data['power'] = power
+            bs_data['ue_loc'] = np.asarray(raydata['location']).reshape((-1, 3))
+            dataset.append(bs_data)
+        return dataset
+    
+    def _prefetch_scene(self, rt_loader, executor):
+        rt_loader.prefetch(executor, np.asarray(self.params[c.PARAMSET_ACTIVE_BS]) - 1, user=True)
+    
+    def get_scene(self, scene_idx):
+        """
+        Returns the beam sweep table of a scene.
+
+        Args:
+            scene_idx (int): Index of the scene, as given in the scenes parameter.
+
+        Returns:
+            list: For each active BS, a dictionary with the (num_ue, top_k, 2) int16 'beams' of the
+                (UE beam, BS beam) pairs, their (num_ue, top_k) float16 'power' in dB in descending order,
+                and the 'bs_loc' and 'ue_loc' locations.
+        """
+        if self.data is None:
+            raise RuntimeError("The scenes of a streamed dataset are available through iter_scenes().")
+        scenes = list(self.params[c.PARAMSET_DYNAMIC_SCENES])
+        if scene_idx not in scenes:
+            raise IndexError(f"The scene {scene_idx} is not in the dataset.")
+        return self.data[scenes.index(scene_idx)]
+    
+    def get_top_beams(self, ue_idx, bs_idx, time_idx):
+        """
+        Returns the top-k (UE beam, BS beam) pairs between a BS and a UE and their powers in dB.
+        """
+        bs_data = self.data[time_idx][bs_idx]
+        return bs_data['beams'][ue_idx], bs_data['power'][ue_idx]
+    
+    def get_ue_channel(self, ue_idx, bs_idx, time_idx):
+        raise RuntimeError("The beam sweep dataset does not keep the channels.")
+    
+    def get_bs_channel(self, tx_idx, rx_idx, time_idx):
+        raise RuntimeError("The beam sweep dataset does not keep the channels.")
@@ -1,3 +1,3 @@
 from .sensor import CameraSensor, LidarSensor
 from .scenario_manager import ScenarioManager
-from .moving_object import MovingObject
\ No newline at end of file
+from .moving_object import MovingObject, scene_orientation_index
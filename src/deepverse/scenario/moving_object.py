@@ -110,4 +110,43 @@ class MovingObject:
         Returns:
             str: A string representation of the object.
         """
-        return f"MovingObject(id={self.object_id}, num_time_samples={len(self.time)}, time_interval={self.time[0]},{self.time[-1]})"
\ No newline at end of file
+        return f"MovingObject(id={self.object_id}, num_time_samples={len(self.time)}, time_interval={self.time[0]},{self.time[-1]})"
+
+def scene_orientation_index(moving_objects, scenes):
+    """
+    Builds the index of the object orientations of the given scenes, keyed by the scene index.
+
+    The time samples of the objects are matched to the scenes by their time stamp, which is the index
+    of the scene of the sample (as in MobilityDataset.get_sample). Each object is mapped to the UE
+    given by its position in the time sample (object_scene_id), which is the index of the object in
+    the ray-tracing receivers of the scene.
+
+    Args:
+        moving_objects (dict): A dictionary of MovingObject instances by object ID.
+        scenes (list): The scene indices to index.
+
+    Returns:
+        dict: For each scene with objects, a dictionary with the 'object_id', the 'ue' (int array) index,
+            and the 'angle' and 'slope' (float arrays) of the objects of the scene.
+
+    Raises:
+        ValueError: If two objects of a scene are mapped to the same UE.
+    """
+    scenes = set(int(scene) for scene in scenes)
+    samples = {}
+    for object_id, obj in moving_objects.items():
+        for time, ue, angle, slope in zip(obj.time, obj.object_scene_id, obj.angle, obj.slope):
+            if int(time) in scenes:
+                samples.setdefault(int(time), []).append((object_id, ue, angle, slope))
+    
+    index = {}
+    for scene, sample in samples.items():
+        object_id, ue, angle, slope = zip(*sample)
+        ue = np.array(ue, dtype=int)
+        if len(np.unique(ue)) < len(ue):
+            raise ValueError(f"Several moving objects of the scene {scene} are mapped to the same UE.")
+        index[scene] = {'object_id': list(object_id),
+                        'ue': ue,
+                        'angle': np.array(angle, dtype=float),
+                        'slope': np.array(slope, dtype=float)}
+    return index
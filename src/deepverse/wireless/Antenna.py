@@ -1,8 +1,10 @@
+import copy
 import numpy as np
+from collections import OrderedDict
 from scipy.spatial.transform import Rotation as R
 from scipy.special import sindg, cosdg
 class Antenna:
-    def __init__(self, shape, rotation, FoV, spacing, **kwargs):
+    def __init__(self, shape, rotation, FoV, spacing, separable=False, **kwargs):
         """
         Initialize the Antenna object.
 
@@ -16,14 +18,20 @@ class Antenna:
             Field of View (FoV_azimuth, FoV_elevation) in degrees.
         spacing : float
             Spacing between antenna elements.
+        separable : bool, optional
+            If True, the array response is computed from the per-axis responses of the planar array.
         """
         self.shape = shape
         self.rotation = rotation
         self.FoV = FoV
         self.spacing = spacing
+        self.separable = separable
         
         self._element_idx = self._idx_map()
         self._kd = 2 * np.pi * self.spacing
+        
+        # Optional SteeringVectorCache shared by the antennas
+        self.cache = None
     
     def __str__(self):
         """
@@ -34,29 +42,85 @@ class Antenna:
                 f"FoV: {self.FoV} "
                 f"Spacing: {self.spacing}")
     
-    def array_response_vector(self, theta, phi):
+    def array_response_vector(self, theta, phi, dtype=np.complex128):
         """
         Compute the array response vector for the antenna.
 
         Parameters:
         ----------
         theta : numpy.ndarray
-            Elevation angles of the paths in radians.
+            Elevation angles of the paths in radians. May be of any shape,
+            e.g., (num_paths,) or (num_links, num_paths) for batched links.
         phi : numpy.ndarray
-            Azimuth angles of the paths in radians.
+            Azimuth angles of the paths in radians, with the same shape as theta.
+        dtype : numpy.dtype, optional
+            Complex type of the array response, np.complex128 or np.complex64.
 
         Returns:
         -------
         array_response : numpy.ndarray
-            The computed array response vector.
+            The computed array response vector of shape (num_elements, *theta.shape).
         """
-        gamma = 1j * self._kd * np.array([np.sin(theta) * np.cos(phi),
+        if self.cache is not None:
+            return self.cache.array_response_vector(self, theta, phi, dtype=dtype)
+        return self._array_response_vector(theta, phi, dtype=dtype)
+    
+    def _array_response_vector(self, theta, phi, dtype=np.complex128):
+        if self.separable:
+            e_y, e_z = self.array_response_factors(theta, phi, dtype=dtype)
+            return (e_z[:, None] * e_y[None, :]).reshape((self.num_elements(), ) + e_y.shape[1:])
+        elif np.dtype(dtype) == np.complex128:
+            gamma = 1j * self._kd * np.array([np.sin(theta) * np.cos(phi),
+                                              np.sin(theta) * np.sin(phi),
+                                              np.cos(theta)])
+            
+            array_response = np.exp(np.tensordot(self._element_idx, gamma, axes=(1, 0)))
+        else:
+            # The per-path direction cosines are computed in double precision, the per-element phases in single
+            gamma = (self._kd * np.array([np.sin(theta) * np.cos(phi),
                                           np.sin(theta) * np.sin(phi),
-                                          np.cos(theta)])
-
-        array_response = np.exp(np.dot(self._element_idx, gamma))
+                                          np.cos(theta)])).astype(np.float32)
+            
+            array_response = np.exp(1j * np.tensordot(self._element_idx.astype(np.float32), gamma, axes=(1, 0)))
         return array_response
 
+    def array_response_factors(self, theta, phi, dtype=np.complex128):
+        """
+        Compute the per-axis array responses of the planar array.
+
+        The array response of element k = z * num_rows + y is e_z[z] * e_y[y], i.e., the array
+        response vector is kron(e_z, e_y), with num_rows + num_cols exponentials per path.
+
+        Parameters:
+        ----------
+        theta : numpy.ndarray
+            Elevation angles of the paths in radians, of any shape.
+        phi : numpy.ndarray
+            Azimuth angles of the paths in radians, with the same shape as theta.
+        dtype : numpy.dtype, optional
+            Complex type of the array responses, np.complex128 or np.complex64.
+
+        Returns:
+        -------
+        e_y : numpy.ndarray
+            Array response along the y axis of shape (num_rows, *theta.shape).
+        e_z : numpy.ndarray
+            Array response along the z axis of shape (num_cols, *theta.shape).
+        """
+        real_dtype = np.float32 if np.dtype(dtype) == np.complex64 else np.float64
+        y, z = self.shape
+        gamma_y = (self._kd * np.sin(theta) * np.sin(phi)).astype(real_dtype)
+        gamma_z = (self._kd * np.cos(theta)).astype(real_dtype)
+        e_y = np.exp(1j * np.multiply.outer(np.arange(y, dtype=real_dtype), gamma_y))
+        e_z = np.exp(1j * np.multiply.outer(np.arange(z, dtype=real_dtype), gamma_z))
+        return e_y, e_z
+    
+    def geometry(self):
+        """
+        Geometry of the array that determines its array response, i.e., its shape and spacing.
+        """
+        return (tuple(int(n) for n in self.shape), float(self.spacing))
+
     def _idx_map(self):
         """
         Generate the antenna channel map for the 3D antenna array.
@@ -88,13 +152,7 @@ class Antenna:
         path_inclusion : numpy.ndarray
             A boolean array indicating whether each path is within the antenna's field of view.
         """
-        FoV_azimuth, FoV_elevation = np.radians(self.FoV)
-        FoV_azimuth, FoV_elevation = FoV_azimuth / 2, FoV_elevation / 2
-        
-        azimuth_inclusion = (phi >= -FoV_azimuth) & (phi <= FoV_azimuth)
-        elevation_inclusion = (theta >= (np.pi/2 - FoV_elevation)) & (theta <= (np.pi/2 + FoV_elevation))
-        path_inclusion = azimuth_inclusion & elevation_inclusion
-        return path_inclusion
+        return FoV_inclusion(theta, phi, self.FoV)
     
     def apply_rotation(self, theta, phi):
         """
@@ -114,30 +172,326 @@ class Antenna:
         Phi2 : numpy.ndarray
             Rotated azimuth angles in radians.
         """
-        # Convert angles to degrees
-        theta_deg = np.degrees(theta)
-        phi_deg = np.degrees(phi)
-        Gamma, Beta, Alpha = self.rotation
+        return rotate_angles(theta, phi, self.rotation)
+    
+    def num_elements(self):
+        return np.prod(self.shape)
+
+
+def FoV_inclusion(theta, phi, FoV):
+    """
+    Determine if paths are within the field of view (FoV).
+
+    Parameters:
+    ----------
+    theta : numpy.ndarray
+        Elevation angles of the paths in radians.
+    phi : numpy.ndarray
+        Azimuth angles of the paths in radians.
+    FoV : array_like
+        (FoV_azimuth, FoV_elevation) in degrees, of shape (2,) or (2, *theta.shape) for per-path FoVs.
+
+    Returns:
+    -------
+    path_inclusion : numpy.ndarray
+        A boolean array indicating whether each path is within the field of view.
+    """
+    FoV_azimuth, FoV_elevation = np.radians(FoV)
+    FoV_azimuth, FoV_elevation = FoV_azimuth / 2, FoV_elevation / 2
+    
+    azimuth_inclusion = (phi >= -FoV_azimuth) & (phi <= FoV_azimuth)
+    elevation_inclusion = (theta >= (np.pi/2 - FoV_elevation)) & (theta <= (np.pi/2 + FoV_elevation))
+    path_inclusion = azimuth_inclusion & elevation_inclusion
+    return path_inclusion
+
+def rotate_angles(theta, phi, rotation):
+    """
+    Rotate the given zenith (theta) and azimuth (phi) angles.
 
-        cosTheta = cosdg(theta_deg)
-        sinTheta = sindg(theta_deg)
-        cosPhiAlpha = cosdg(phi_deg - Alpha)
-        sinPhiAlpha = sindg(phi_deg - Alpha)
-        cosBeta = cosdg(Beta)
-        sinBeta = sindg(Beta)
-        cosGamma = cosdg(Gamma)
-        sinGamma = sindg(Gamma)
+    Parameters:
+    ----------
+    theta : numpy.ndarray
+        Initial zenith angles in radians.
+    phi : numpy.ndarray
+        Initial azimuth angles in radians.
+    rotation : array_like
+        Rotation angles (Gamma, Beta, Alpha) in degrees, of shape (3,) or (3, *theta.shape) for per-path rotations.
 
-        Theta2 = np.arccos(cosBeta * cosGamma * cosTheta + 
-                           sinTheta * (sinBeta * cosGamma * cosPhiAlpha - sinGamma * sinPhiAlpha))
+    Returns:
+    -------
+    Theta2 : numpy.ndarray
+        Rotated zenith angles in radians.
+    Phi2 : numpy.ndarray
+        Rotated azimuth angles in radians.
+    """
+    # Convert angles to degrees
+    theta_deg = np.degrees(theta)
+    phi_deg = np.degrees(phi)
+    Gamma, Beta, Alpha = rotation
 
-        Phi2_real = cosBeta * sinTheta * cosPhiAlpha - sinBeta * cosTheta
-        Phi2_imag = cosBeta * sinGamma * cosTheta + sinTheta * (sinBeta * sinGamma * cosPhiAlpha + cosGamma * sinPhiAlpha)
-        Phi2 = np.angle(Phi2_real + 1j * Phi2_imag)
+    cosTheta = cosdg(theta_deg)
+    sinTheta = sindg(theta_deg)
+    cosPhiAlpha = cosdg(phi_deg - Alpha)
+    sinPhiAlpha = sindg(phi_deg - Alpha)
+    cosBeta = cosdg(Beta)
+    sinBeta = sindg(Beta)
+    cosGamma = cosdg(Gamma)
+    sinGamma = sindg(Gamma)
 
-        return Theta2, Phi2
+    Theta2 = np.arccos(cosBeta * cosGamma * cosTheta + 
+                       sinTheta * (sinBeta * cosGamma * cosPhiAlpha - sinGamma * sinPhiAlpha))
 
+    Phi2_real = cosBeta * sinTheta * cosPhiAlpha - sinBeta * cosTheta
+    Phi2_imag = cosBeta * sinGamma * cosTheta + sinTheta * (sinBeta * sinGamma * cosPhiAlpha + cosGamma * sinPhiAlpha)
+    Phi2 = np.angle(Phi2_real + 1j * Phi2_imag)
 
+    return Theta2, Phi2
+
+
+class AntennaSet:
+    """
+    The antennas of multiple devices, with the per-device rotations and FoVs stored as arrays.
+
+    The devices share a small number of antenna templates, which set their shapes, spacings and
+    array responses. The rotations and FoV filters of the paths of many devices are applied with
+    single vectorized operations, with the device of each path given as an index array.
+    """
+    def __init__(self, antennas, device_antenna=None, rotations=None, FoVs=None):
+        """
+        Initialize the AntennaSet object.
+
+        Parameters:
+        ----------
+        antennas : list of Antenna
+            Antenna templates of the devices.
+        device_antenna : numpy.ndarray, optional
+            Index of the template of each device. Defaults to one device per template.
+        rotations : numpy.ndarray, optional
+            Rotation angles (Gamma, Beta, Alpha) in degrees of each device, of shape (num_devices, 3),
+            with NaN rows for the devices without rotation. Defaults to the rotations of the templates.
+        FoVs : numpy.ndarray, optional
+            FoVs (FoV_azimuth, FoV_elevation) in degrees of each device, of shape (num_devices, 2),
+            with NaN rows for the devices without FoV. Defaults to the FoVs of the templates.
+        """
+        self.antennas = list(antennas)
+        self.device_antenna = np.arange(len(self.antennas)) if device_antenna is None else np.asarray(device_antenna, dtype=int)
+        
+        def per_device(values, attr, size):
+            if values is None:
+                values = np.array([np.full(size, np.nan) if getattr(ant, attr) is None else np.ravel(getattr(ant, attr))
+                                   for ant in self.antennas], dtype=float).reshape((-1, size))[self.device_antenna]
+            return np.asarray(values, dtype=float).reshape((-1, size))
+        
+        self.rotations = per_device(rotations, 'rotation', 3)
+        self.FoVs = per_device(FoVs, 'FoV', 2)
+        self.shapes = np.array([np.ravel(ant.shape) for ant in self.antennas], dtype=int).reshape((-1, 2))[self.device_antenna]
+        
+        # Per-device Antenna objects, created when requested
+        self._devices = {}
     
-    def num_elements(self):
-        return np.prod(self.shape)
\ No newline at end of file
+    def __len__(self):
+        return len(self.device_antenna)
+    
+    def __getitem__(self, idx):
+        """
+        Antenna of a device, or the AntennaSet of a range of devices.
+        """
+        if isinstance(idx, slice):
+            return AntennaSet(self.antennas, self.device_antenna[idx], self.rotations[idx], self.FoVs[idx])
+        idx = range(len(self))[idx]
+        if idx not in self._devices:
+            antenna = copy.copy(self.antennas[self.device_antenna[idx]])
+            antenna.rotation = None if np.isnan(self.rotations[idx]).any() else self.rotations[idx]
+            antenna.FoV = None if np.isnan(self.FoVs[idx]).any() else self.FoVs[idx]
+            self._devices[idx] = antenna
+        return self._devices[idx]
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_devices'] = {}
+        return state
+    
+    def set_cache(self, cache):
+        """
+        Set the SteeringVectorCache of the antennas of all devices.
+        """
+        for antenna in self.antennas + list(self._devices.values()):
+            antenna.cache = cache
+    
+    def apply_rotation(self, theta, phi, device):
+        """
+        Rotate the angles of the paths with the rotations of their devices.
+
+        Parameters:
+        ----------
+        theta : numpy.ndarray
+            Initial zenith angles in radians.
+        phi : numpy.ndarray
+            Initial azimuth angles in radians.
+        device : numpy.ndarray
+            Device index of each path, with the same shape as theta.
+
+        Returns:
+        -------
+        Theta2 : numpy.ndarray
+            Rotated zenith angles in radians. The angles of the devices without rotation are not changed.
+        Phi2 : numpy.ndarray
+            Rotated azimuth angles in radians.
+        """
+        rotations = self.rotations[np.unique(device)]
+        if len(rotations) == 0 or np.isnan(rotations).all():
+            return theta, phi
+        if (rotations == rotations[0]).all():
+            # A single rotation for all paths
+            return rotate_angles(theta, phi, rotations[0])
+        
+        rotation = np.moveaxis(self.rotations[device], -1, 0)
+        Theta2, Phi2 = rotate_angles(theta, phi, np.nan_to_num(rotation))
+        no_rotation = np.isnan(rotation[0])
+        return np.where(no_rotation, theta, Theta2), np.where(no_rotation, phi, Phi2)
+    
+    def is_in_FoV(self, theta, phi, device):
+        """
+        Determine if the paths are within the FoVs of their devices.
+
+        Parameters:
+        ----------
+        theta : numpy.ndarray
+            Elevation angles of the paths in radians.
+        phi : numpy.ndarray
+            Azimuth angles of the paths in radians.
+        device : numpy.ndarray
+            Device index of each path, with the same shape as theta.
+
+        Returns:
+        -------
+        path_inclusion : numpy.ndarray
+            A boolean array indicating whether each path is within the FoV of its device.
+            All paths of the devices without FoV are included.
+        """
+        FoV = np.moveaxis(self.FoVs[device], -1, 0)
+        no_FoV = np.isnan(FoV[0])
+        return FoV_inclusion(theta, phi, np.nan_to_num(FoV)) | no_FoV
+
+
+class SteeringVectorCache:
+    """
+    An LRU cache of array response vectors keyed by the antenna geometry and the path angles.
+    
+    The angles are quantized to the given resolution, with the array response computed at the
+    quantized angles, or used exactly if no resolution is given. In both cases, identical angles
+    within a batch are computed once. The cache can be shared by antennas of different geometries.
+    """
+    def __init__(self, max_size=100000, resolution=None):
+        """
+        Initialize the steering vector cache.
+
+        Parameters:
+        ----------
+        max_size : int, optional
+            Maximum number of cached array response vectors. With 0, the cache only deduplicates
+            the angles within each batch.
+        resolution : float, optional
+            Angle quantization step in degrees. If None, the angles are not quantized (exact mode).
+        """
+        self.max_size = max_size
+        self.resolution = resolution
+        self._step = None if resolution is None else np.radians(resolution)
+        self._vectors = OrderedDict()
+        self.reset_stats()
+    
+    def __len__(self):
+        return len(self._vectors)
+    
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def stats(self):
+        """
+        Hit-rate statistics of the cache, counted per requested array response vector.
+
+        Returns:
+        -------
+        dict
+            Number of hits, misses and evictions, the hit rate and the number of cached vectors.
+        """
+        requests = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests > 0 else 0.,
+                'evictions': self.evictions,
+                'size': len(self)}
+    
+    def clear(self):
+        self._vectors.clear()
+    
+    def array_response_vector(self, antenna, theta, phi, dtype=np.complex128):
+        """
+        Array response vectors of an antenna for the given angles, read from the cache if available.
+
+        Parameters:
+        ----------
+        antenna : Antenna
+            The antenna of the array response.
+        theta : numpy.ndarray
+            Elevation angles of the paths in radians.
+        phi : numpy.ndarray
+            Azimuth angles of the paths in radians, with the same shape as theta.
+        dtype : numpy.dtype, optional
+            Complex type of the array response.
+
+        Returns:
+        -------
+        array_response : numpy.ndarray
+            The array response vector of shape (num_elements, *theta.shape).
+        """
+        theta, phi = np.asarray(theta, dtype=float), np.asarray(phi, dtype=float)
+        shape = theta.shape
+        angles = np.stack([theta.reshape(-1), phi.reshape(-1)], axis=-1)
+        if self._step is not None:
+            angles = np.round(angles / self._step).astype(np.int64)
+        
+        # Deduplicate the angles of the batch
+        unique_angles, inverse = np.unique(angles, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        
+        prefix = antenna.geometry() + (antenna.separable, np.dtype(dtype).str)
+        keys = [prefix + key for key in map(tuple, unique_angles.tolist())]
+        vectors = [self._vectors.get(key) for key in keys]
+        missing = [k for k, vector in enumerate(vectors) if vector is None]
+        
+        if missing:
+            missing_angles = unique_angles[missing].astype(float)
+            if self._step is not None:
+                missing_angles = missing_angles * self._step
+            computed = antenna._array_response_vector(missing_angles[:, 0], missing_angles[:, 1], dtype=dtype)
+            computed = np.ascontiguousarray(computed.T)
+            for n, k in enumerate(missing):
+                vectors[k] = computed[n]
+        
+        self.misses += len(missing)
+        self.hits += len(inverse) - len(missing)
+        self._update(keys, vectors)
+        
+        if len(vectors) == 0:
+            return np.zeros((antenna.num_elements(), ) + shape, dtype=dtype)
+        array_response = np.stack(vectors, axis=-1)[:, inverse]
+        return array_response.reshape((-1, ) + shape)
+    
+    def _update(self, keys, vectors):
+        if self.max_size <= 0:
+            return
+        for key, vector in zip(keys, vectors):
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+            else:
+                self._vectors[key] = vector
+        while len(self._vectors) > self.max_size:
+            self._vectors.popitem(last=False)
+            self.evictions += 1
@@ -2,8 +2,47 @@ import numpy as np
 from tqdm import tqdm
 
 from . import consts as c
-from .utils import OFDM_subcarrier_frequency
-from .Paths import Paths
+from .utils import (OFDM_subcarrier_frequency, precision_dtypes, select_subcarrier_strategy, delay_domain_synthesis,
+                    rx_filter_type, sampled_cir, filtered_subcarrier_synthesis)
+from .Paths import Paths, pad_paths
+
+def joint_array_response(tx_antenna, rx_antenna, DoD_theta, DoD_phi, DoA_theta, DoA_phi, dtype=np.complex128):
+    """
+    Compute the joint RX-TX array response of the paths.
+
+    The array responses of separable antennas are kept factored into their per-axis responses,
+    which are combined with outer products into the joint response.
+
+    Parameters:
+    ----------
+    tx_antenna : Antenna object
+        Transmitting antenna object.
+    rx_antenna : Antenna object
+        Receiving antenna object.
+    DoD_theta, DoD_phi, DoA_theta, DoA_phi : numpy.ndarray
+        Departure and arrival angles of the paths in radians, of the same (any) shape.
+    dtype : numpy.dtype, optional
+        Complex type of the array response.
+
+    Returns:
+    -------
+    array_response : numpy.ndarray
+        Joint array response of shape (N_rx*N_tx, *DoD_theta.shape), with the element
+        index r*N_tx + t for the RX element r and the TX element t.
+    """
+    factors = []
+    for antenna, theta, phi in [(rx_antenna, DoA_theta, DoA_phi), (tx_antenna, DoD_theta, DoD_phi)]:
+        if antenna.separable and antenna.cache is None:
+            e_y, e_z = antenna.array_response_factors(theta, phi, dtype=dtype)
+            factors += [e_z, e_y]
+        else:
+            factors.append(antenna.array_response_vector(theta, phi, dtype=dtype))
+    
+    array_response = factors[0]
+    for factor in factors[1:]:
+        num_elements = array_response.shape[0] * factor.shape[0]
+        array_response = (array_response[:, None] * factor[None, :]).reshape((num_elements, ) + factor.shape[1:])
+    return array_response
 
 class Channel:
     def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth):
@@ -70,7 +109,8 @@ class Channel:
         return info
 
 class OFDMChannel(Channel):
-    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth, num_subcarriers, select_subcarriers, rx_filter, params, doppler_shift=False):
+    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth, num_subcarriers, select_subcarriers, rx_filter, params, doppler_shift=False, precision='double',
+                 strategy='direct', fft_threshold=1., rolloff=0.):
         """
         Initialize the OFDMChannel object.
 
@@ -88,12 +128,28 @@ class OFDMChannel(Channel):
             Bandwidth in Hz.
         params : dict
             Dictionary containing the simulation parameters.
+        precision : str, optional
+            'double' or 'single' precision of the channel generation.
+        strategy : str, optional
+            Computation of the responses over the subcarriers: 'direct' with the (paths x subcarriers)
+            exponentials, 'fft' with the delay-domain synthesis, or 'auto' to select with the cost model.
+        fft_threshold : float, optional
+            Cost ratio of the direct to the FFT method above which 'auto' selects the FFT method.
+        rx_filter : None, bool or str
+            Receive filter of the channels (see utils.rx_filter_type). With the filter, the channels are the
+            DFT of the filtered channel impulse responses sampled at the bandwidth, and strategy is not used.
+        rolloff : float, optional
+            Roll-off factor of the raised cosine receive filter.
         """
         super().__init__(tx_antenna, rx_antenna, paths, carrier_freq, bandwidth)
         self.total_subcarriers = num_subcarriers
         self.subcarriers = select_subcarriers
         self.rx_filter = rx_filter
         self.doppler_shift = doppler_shift
+        self.precision = precision
+        self.strategy = strategy
+        self.fft_threshold = fft_threshold
+        self.rolloff = rolloff
         
         self.subcarrier_freq = OFDM_subcarrier_frequency(self.bandwidth, self.subcarriers, self.total_subcarriers).reshape((1, -1))
         
@@ -117,32 +173,396 @@ class OFDMChannel(Channel):
         
         N_tx = self.tx_antenna.num_elements()
         N_rx = self.rx_antenna.num_elements()
+        real_dtype, complex_dtype = precision_dtypes(self.precision)
 
-        channel = np.zeros((N_rx, N_tx, len(self.subcarriers)), dtype=np.csingle)
+        # Antenna Array - (N_rx*N_tx, P) for matrix multiplication
+        array_response = joint_array_response(self.tx_antenna, self.rx_antenna,
+                                              self.paths.DoD_theta, self.paths.DoD_phi,
+                                              self.paths.DoA_theta, self.paths.DoA_phi, dtype=complex_dtype)
 
-        # Antenna Array
-        array_response_TX = self.tx_antenna.array_response_vector(self.paths.DoD_theta, self.paths.DoD_phi)
-        array_response_RX = self.rx_antenna.array_response_vector(self.paths.DoA_theta, self.paths.DoA_phi)
-        array_response = array_response_RX[:, None, :] * array_response_TX[None, :, :]
+        # Channel Impulse Response
+        a, tau = self.paths.cir(doppler_shift=self.doppler_shift)
         
-        # Reshaping to 2D for matrix multiplication
-        array_response = array_response.reshape((N_rx*N_tx, -1))
+        strategy = select_subcarrier_strategy(self.strategy, len(a), self.subcarriers, N_rx*N_tx, 
+                                              threshold=self.fft_threshold, precision=self.precision)
+        if rx_filter_type(self.rx_filter) is not None:
+            weights = array_response * (a / np.sqrt(self.total_subcarriers)).astype(complex_dtype)
+            channel = filtered_subcarrier_synthesis(weights[None], tau[None], self.subcarriers, self.total_subcarriers, self.bandwidth,
+                                                    self.rx_filter, rolloff=self.rolloff, precision=self.precision)[0]
+        elif strategy == 'direct':
+            a, tau = a.astype(complex_dtype).reshape((-1, 1)), tau.astype(real_dtype).reshape((-1, 1))
+            
+            path_const = a * np.exp(-1j * 2 * np.pi * tau * self.subcarrier_freq.astype(real_dtype)) / real_dtype.type(np.sqrt(self.total_subcarriers))
+            
+            channel = array_response @ path_const
+        else:
+            weights = array_response * (a / np.sqrt(self.total_subcarriers)).astype(complex_dtype)
+            channel = delay_domain_synthesis(weights[None], tau[None], self.subcarriers, self.bandwidth / self.total_subcarriers,
+                                             precision=self.precision)[0]
+        channel = channel.reshape((N_rx, N_tx, -1))
 
-        # Channel Impulse Response
+        self.coeffs = channel
+
+
+class OFDMChannelBatch:
+    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth, num_subcarriers, select_subcarriers, rx_filter, params, doppler_shift=False, precision='double',
+                 strategy='direct', fft_threshold=1., rolloff=0.):
+        """
+        Initialize the OFDMChannelBatch object, generating the OFDM channels of
+        multiple links sharing the same TX and RX antenna geometries at once.
+
+        Parameters:
+        ----------
+        tx_antenna : Antenna object
+            Transmitting antenna object.
+        rx_antenna : Antenna object
+            Receiving antenna object.
+        paths : list of Paths
+            Paths of each link with the antenna parameters already applied.
+        carrier_freq : float
+            Carrier frequency in Hz.
+        bandwidth : float
+            Bandwidth in Hz.
+        params : dict
+            Dictionary containing the simulation parameters.
+        precision : str, optional
+            'double' or 'single' precision of the channel generation.
+        strategy : str, optional
+            Computation of the responses over the subcarriers: 'direct' with the (paths x subcarriers)
+            exponentials, 'fft' with the delay-domain synthesis, or 'auto' to select with the cost model.
+        fft_threshold : float, optional
+            Cost ratio of the direct to the FFT method above which 'auto' selects the FFT method.
+        rx_filter : None, bool or str
+            Receive filter of the channels (see utils.rx_filter_type). With the filter, the channels are the
+            DFT of the filtered channel impulse responses sampled at the bandwidth, and strategy is not used.
+        rolloff : float, optional
+            Roll-off factor of the raised cosine receive filter.
+        """
+        self.tx_antenna = tx_antenna
+        self.rx_antenna = rx_antenna
+        self.paths = paths
+        self.carrier_freq = carrier_freq
+        self.bandwidth = bandwidth
+        self.total_subcarriers = num_subcarriers
+        self.subcarriers = select_subcarriers
+        self.rx_filter = rx_filter
+        self.doppler_shift = doppler_shift
+        self.precision = precision
+        self.strategy = strategy
+        self.fft_threshold = fft_threshold
+        self.rolloff = rolloff
+        
+        self.subcarrier_freq = OFDM_subcarrier_frequency(self.bandwidth, self.subcarriers, self.total_subcarriers).reshape((1, 1, -1))
+        
+        self.params = params
+        
+        self.coeffs = None
+        
+    def __len__(self):
+        return len(self.paths)
+    
+    def __getitem__(self, idx):
+        """
+        Per-link OFDMChannel view over the batched channel coefficients.
+        """
+        channel = OFDMChannel(tx_antenna=self.tx_antenna,
+                              rx_antenna=self.rx_antenna,
+                              paths=self.paths[idx],
+                              carrier_freq=self.carrier_freq,
+                              bandwidth=self.bandwidth,
+                              num_subcarriers=self.total_subcarriers,
+                              select_subcarriers=self.subcarriers,
+                              rx_filter=self.rx_filter,
+                              params=self.params,
+                              doppler_shift=self.doppler_shift,
+                              precision=self.precision,
+                              strategy=self.strategy,
+                              fft_threshold=self.fft_threshold,
+                              rolloff=self.rolloff)
+        if self.coeffs is not None and self.paths[idx].num_paths() > 0:
+            channel.coeffs = self.coeffs[idx]
+        return channel
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def generate(self, out=None):
+        """
+        Generate the OFDM MIMO channels of all links.
+
+        Parameters:
+        ----------
+        out : numpy.ndarray, optional
+            Preallocated (N_links, N_rx, N_tx, N_subcarriers) array, e.g., a memory-mapped
+            array, to write the channels into. The channels are kept in memory if None.
+
+        Returns:
+        -------
+        channel : numpy.ndarray
+            Generated MIMO channels of shape (N_links, N_rx, N_tx, N_subcarriers).
+            The channels of the links without any path are zero.
+        """
+        N_links = len(self.paths)
+        N_tx = self.tx_antenna.num_elements()
+        N_rx = self.rx_antenna.num_elements()
+        real_dtype, complex_dtype = precision_dtypes(self.precision)
+        
+        paths = pad_paths(self.paths, doppler_shift=self.doppler_shift)
+        
+        # Antenna Array - (N_links, N_rx*N_tx, P) for batched matrix multiplication
+        array_response = joint_array_response(self.tx_antenna, self.rx_antenna,
+                                              paths['DoD_theta'], paths['DoD_phi'],
+                                              paths['DoA_theta'], paths['DoA_phi'], dtype=complex_dtype)
+        array_response = np.ascontiguousarray(array_response.transpose(1, 0, 2))
+        
+        channel = self._synthesize(array_response, paths, real_dtype, complex_dtype)
+        channel = channel.reshape((N_links, N_rx, N_tx, -1))
+        
+        if out is not None:
+            out[...] = channel
+            channel = out
+        
+        self.coeffs = channel
+        return channel
+    
+    def generate_beamspace(self, tx_codebook, rx_codebook, power=False):
+        """
+        Generate the beamspace channels of all links for the given codebooks.
+
+        The array responses of the paths are projected onto the beams before they are combined with
+        the path gains, so that the element-domain channels are not computed.
+
+        Parameters:
+        ----------
+        tx_codebook : Codebook object
+            Codebook of the transmitting antenna.
+        rx_codebook : Codebook object
+            Codebook of the receiving antenna.
+        power : bool, optional
+            If True, the received power of each beam pair averaged over the subcarriers is returned
+            instead of the beamspace channels.
+
+        Returns:
+        -------
+        beamspace : numpy.ndarray
+            Beamspace channels W_rx^H H W_tx of shape (N_links, N_rx_beams, N_tx_beams, N_subcarriers),
+            or the beam pair powers of shape (N_links, N_rx_beams, N_tx_beams) if power is True.
+        """
+        N_links = len(self.paths)
+        real_dtype, complex_dtype = precision_dtypes(self.precision)
+        
+        paths = pad_paths(self.paths, doppler_shift=self.doppler_shift)
+        
+        # Beam responses - (N_beams, N_links, P)
+        beams_TX = tx_codebook.beamform(self.tx_antenna.array_response_vector(paths['DoD_theta'], paths['DoD_phi'], dtype=complex_dtype))
+        beams_RX = rx_codebook.combine(self.rx_antenna.array_response_vector(paths['DoA_theta'], paths['DoA_phi'], dtype=complex_dtype))
+        N_tx, N_rx = beams_TX.shape[0], beams_RX.shape[0]
+        beam_response = beams_RX.transpose(1, 0, 2)[:, :, None, :] * beams_TX.transpose(1, 0, 2)[:, None, :, :]
+        beam_response = beam_response.reshape((N_links, N_rx*N_tx, -1))
+        
+        beamspace = self._synthesize(beam_response, paths, real_dtype, complex_dtype)
+        beamspace = beamspace.reshape((N_links, N_rx, N_tx, -1))
+        
+        if power:
+            return np.mean(np.abs(beamspace)**2, axis=-1)
+        return beamspace
+    
+    def _synthesize(self, response, paths, real_dtype, complex_dtype):
+        # Sum of the (N_links, N, P) responses of the paths weighted by the path constants - (N_links, N, N_subcarriers)
+        if rx_filter_type(self.rx_filter) is not None:
+            a = (paths['a'] / np.sqrt(self.total_subcarriers)).astype(complex_dtype)
+            return filtered_subcarrier_synthesis(response * a[:, None, :], paths['ToA'], self.subcarriers, self.total_subcarriers,
+                                                 self.bandwidth, self.rx_filter, rolloff=self.rolloff, precision=self.precision)
+        
+        strategy = select_subcarrier_strategy(self.strategy, response.shape[-1], self.subcarriers, response.shape[1],
+                                              threshold=self.fft_threshold, precision=self.precision)
+        if strategy == 'direct':
+            return response @ self._path_constants(paths, real_dtype, complex_dtype)
+        
+        a = (paths['a'] / np.sqrt(self.total_subcarriers)).astype(complex_dtype)
+        return delay_domain_synthesis(response * a[:, None, :], paths['ToA'], self.subcarriers, 
+                                      self.bandwidth / self.total_subcarriers, precision=self.precision)
+    
+    def _path_constants(self, paths, real_dtype, complex_dtype):
+        # Channel Impulse Response - (N_links, P, 1)
+        a, tau = paths['a'].astype(complex_dtype)[:, :, None], paths['ToA'].astype(real_dtype)[:, :, None]
+        
+        # (N_links, P, N_subcarriers)
+        return a * np.exp(-1j * 2 * np.pi * tau * self.subcarrier_freq.astype(real_dtype)) / real_dtype.type(np.sqrt(self.total_subcarriers))
+
+
+class TDChannel(Channel):
+    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth, num_taps, rx_filter, params, sampling_rate=None, 
+                 rolloff=0., doppler_shift=False, precision='double'):
+        """
+        Initialize the TDChannel object, generating the sampled channel impulse response (CIR) taps.
+
+        Parameters:
+        ----------
+        tx_antenna : Antenna object
+            Transmitting antenna object.
+        rx_antenna : Antenna object
+            Receiving antenna object.
+        paths : Paths
+            Paths of the link with the antenna parameters already applied.
+        carrier_freq : float
+            Carrier frequency in Hz.
+        bandwidth : float
+            Bandwidth in Hz.
+        num_taps : int
+            Number of taps of the sampled CIR.
+        rx_filter : None, bool or str
+            Receive filter shaping the paths over the taps (see utils.rx_filter_type). Without the filter,
+            each path is assigned to its nearest tap.
+        params : dict
+            Dictionary containing the simulation parameters.
+        sampling_rate : float, optional
+            Sampling rate of the taps in Hz. Defaults to the bandwidth.
+        rolloff : float, optional
+            Roll-off factor of the raised cosine receive filter.
+        precision : str, optional
+            'double' or 'single' precision of the channel generation.
+        """
+        super().__init__(tx_antenna, rx_antenna, paths, carrier_freq, bandwidth)
+        self.num_taps = num_taps
+        self.sampling_rate = bandwidth if sampling_rate is None else sampling_rate
+        self.rx_filter = rx_filter
+        self.rolloff = rolloff
+        self.doppler_shift = doppler_shift
+        self.precision = precision
+        
+        self.params = params
+
+    def generate(self):
+        """
+        Generate the sampled CIR taps of the MIMO channel based on the paths.
+
+        Returns:
+        -------
+        channel : numpy.ndarray
+            Generated MIMO channel taps of shape (N_rx, N_tx, num_taps).
+        """
+        if self.paths.num_paths() == 0:
+            return
+        
+        N_tx = self.tx_antenna.num_elements()
+        N_rx = self.rx_antenna.num_elements()
+        _, complex_dtype = precision_dtypes(self.precision)
+        
+        # Antenna Array - (N_rx*N_tx, P)
+        array_response = joint_array_response(self.tx_antenna, self.rx_antenna,
+                                              self.paths.DoD_theta, self.paths.DoD_phi,
+                                              self.paths.DoA_theta, self.paths.DoA_phi, dtype=complex_dtype)
         a, tau = self.paths.cir(doppler_shift=self.doppler_shift)
-        a, tau = a.reshape((-1, 1)), tau.reshape((-1, 1))
         
-        path_const = a * np.exp(-1j * 2 * np.pi * tau * self.subcarrier_freq) / np.sqrt(self.total_subcarriers)
+        channel = sampled_cir((array_response * a.astype(complex_dtype))[None], tau[None], 1 / self.sampling_rate, self.num_taps,
+                              rx_filter=self.rx_filter, rolloff=self.rolloff, precision=self.precision)[0]
+        self.coeffs = channel.reshape((N_rx, N_tx, self.num_taps))
+        return self.coeffs
+
+
+class TDChannelBatch:
+    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, bandwidth, num_taps, rx_filter, params, sampling_rate=None, 
+                 rolloff=0., doppler_shift=False, precision='double'):
+        """
+        Initialize the TDChannelBatch object, generating the sampled CIR taps of
+        multiple links sharing the same TX and RX antenna geometries at once.
+
+        Parameters:
+        ----------
+        paths : list of Paths
+            Paths of each link with the antenna parameters already applied.
         
-        channel = array_response @ path_const
-        channel = channel.reshape((N_rx, N_tx, -1))
+        The other parameters are as in TDChannel.
+        """
+        self.tx_antenna = tx_antenna
+        self.rx_antenna = rx_antenna
+        self.paths = paths
+        self.carrier_freq = carrier_freq
+        self.bandwidth = bandwidth
+        self.num_taps = num_taps
+        self.sampling_rate = bandwidth if sampling_rate is None else sampling_rate
+        self.rx_filter = rx_filter
+        self.rolloff = rolloff
+        self.doppler_shift = doppler_shift
+        self.precision = precision
+        
+        self.params = params
+        
+        self.coeffs = None
+        
+    def __len__(self):
+        return len(self.paths)
+    
+    def __getitem__(self, idx):
+        """
+        Per-link TDChannel view over the batched channel taps.
+        """
+        channel = TDChannel(tx_antenna=self.tx_antenna,
+                            rx_antenna=self.rx_antenna,
+                            paths=self.paths[idx],
+                            carrier_freq=self.carrier_freq,
+                            bandwidth=self.bandwidth,
+                            num_taps=self.num_taps,
+                            rx_filter=self.rx_filter,
+                            params=self.params,
+                            sampling_rate=self.sampling_rate,
+                            rolloff=self.rolloff,
+                            doppler_shift=self.doppler_shift,
+                            precision=self.precision)
+        if self.coeffs is not None and self.paths[idx].num_paths() > 0:
+            channel.coeffs = self.coeffs[idx]
+        return channel
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def generate(self, out=None):
+        """
+        Generate the sampled CIR taps of all links.
 
+        Parameters:
+        ----------
+        out : numpy.ndarray, optional
+            Preallocated (N_links, N_rx, N_tx, num_taps) array to write the channels into.
+            The channels are kept in memory if None.
+
+        Returns:
+        -------
+        channel : numpy.ndarray
+            Generated MIMO channel taps of shape (N_links, N_rx, N_tx, num_taps).
+            The channels of the links without any path are zero.
+        """
+        N_links = len(self.paths)
+        N_tx = self.tx_antenna.num_elements()
+        N_rx = self.rx_antenna.num_elements()
+        _, complex_dtype = precision_dtypes(self.precision)
+        
+        paths = pad_paths(self.paths, doppler_shift=self.doppler_shift)
+        
+        # Antenna Array - (N_links, N_rx*N_tx, P)
+        array_response = joint_array_response(self.tx_antenna, self.rx_antenna,
+                                              paths['DoD_theta'], paths['DoD_phi'],
+                                              paths['DoA_theta'], paths['DoA_phi'], dtype=complex_dtype)
+        weights = array_response.transpose(1, 0, 2) * paths['a'].astype(complex_dtype)[:, None, :]
+        
+        channel = sampled_cir(weights, paths['ToA'], 1 / self.sampling_rate, self.num_taps,
+                              rx_filter=self.rx_filter, rolloff=self.rolloff, precision=self.precision)
+        channel = channel.reshape((N_links, N_rx, N_tx, self.num_taps))
+        
+        if out is not None:
+            out[...] = channel
+            channel = out
+        
         self.coeffs = channel
+        return channel
 
 
 #%%
 class RadarChannel(Channel):
-    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, waveform, params):
+    def __init__(self, tx_antenna, rx_antenna, paths, carrier_freq, waveform, params, max_memory=None, precision='double'):
         """
         Initialize the FMCWChannel object.
 
@@ -158,10 +578,19 @@ class RadarChannel(Channel):
             Carrier frequency in Hz.
         params : dict
             Dictionary containing the simulation parameters.
+        max_memory : float, optional
+            Memory ceiling in bytes for the temporary arrays of the chunked IF signal synthesis.
+        precision : str, optional
+            'double' or 'single' precision of the signal generation.
         """
         super().__init__(tx_antenna, rx_antenna, paths, carrier_freq, bandwidth=None)
         self.waveform = waveform
         self.params = params
+        self.max_memory = max_memory
+        self.precision = precision
+        
+        # Range-Doppler/angle maps, if computed by the radar processing stage
+        self.maps = None
 
     def generate(self):
         """
@@ -172,18 +601,21 @@ class RadarChannel(Channel):
         IF_signal : numpy.ndarray
             Intermediate Frequency (IF) signal for FMCW radar.
         """
-        array_response_TX = self.tx_antenna.array_response_vector(self.paths.DoD_theta, self.paths.DoD_phi)
-        array_response_RX = self.rx_antenna.array_response_vector(self.paths.DoA_theta, self.paths.DoA_phi)
-        
-        # Reshaping to 2D for matrix multiplication
-        array_response = array_response_RX[:, None, :] * array_response_TX[None, :, :]
+        _, complex_dtype = precision_dtypes(self.precision)
         N_tx, N_rx = self.tx_antenna.num_elements(), self.rx_antenna.num_elements()
-        array_response = array_response.reshape((N_rx*N_tx, -1))
         
-        IF_signal = self.waveform.generate_samples(self.paths) # P x T
+        # Antenna Array - (N_rx*N_tx, P) for matrix multiplication
+        array_response = joint_array_response(self.tx_antenna, self.rx_antenna,
+                                              self.paths.DoD_theta, self.paths.DoD_phi,
+                                              self.paths.DoA_theta, self.paths.DoA_phi, dtype=complex_dtype)
         
-        # Sum over paths
-        IF_signal = array_response @ IF_signal
+        # Filter paths with delay larger than chirp duration
+        a, tau = self.paths.cir(doppler_shift=False)
+        path_filter = tau < self.waveform.T_chirp
+        
+        IF_signal = self.waveform.synthesize(array_response[:, path_filter], a[path_filter].astype(complex_dtype), tau[path_filter],
+                                             self.paths.doppler_vel[path_filter], self.paths.doppler_acc[path_filter],
+                                             max_memory=self.max_memory)
         
         # N_rx x N_tx x N_chirps x N_time
         IF_signal = IF_signal.reshape((N_rx, N_tx, 
@@ -193,4 +625,98 @@ class RadarChannel(Channel):
 
         self.coeffs = IF_signal
     
-    
\ No newline at end of file
+    
+
+class RadarChannelBatch:
+    def __init__(self, tx_antennas, rx_antennas, paths, carrier_freq, waveform, params, max_memory=None, precision='double'):
+        """
+        Initialize the RadarChannelBatch object, generating the FMCW radar signals of
+        multiple links sharing the same TX and RX antenna geometries at once.
+
+        Parameters:
+        ----------
+        tx_antennas : list of Antenna objects
+            Transmitting antenna object of each link.
+        rx_antennas : list of Antenna objects
+            Receiving antenna object of each link.
+        paths : list of Paths
+            Paths of each link with the antenna parameters already applied.
+        carrier_freq : float
+            Carrier frequency in Hz.
+        waveform : FMCW object
+            Radar waveform.
+        params : dict
+            Dictionary containing the simulation parameters.
+        max_memory : float, optional
+            Memory ceiling in bytes for the temporary arrays of the chunked IF signal synthesis.
+        precision : str, optional
+            'double' or 'single' precision of the signal generation.
+        """
+        self.tx_antennas = tx_antennas
+        self.rx_antennas = rx_antennas
+        self.paths = paths
+        self.carrier_freq = carrier_freq
+        self.waveform = waveform
+        self.params = params
+        self.max_memory = max_memory
+        self.precision = precision
+        
+        self.coeffs = None
+        
+    def __len__(self):
+        return len(self.paths)
+    
+    def __getitem__(self, idx):
+        """
+        Per-link RadarChannel view over the batched radar signals.
+        """
+        channel = RadarChannel(tx_antenna=self.tx_antennas[idx],
+                               rx_antenna=self.rx_antennas[idx],
+                               paths=self.paths[idx],
+                               carrier_freq=self.carrier_freq,
+                               waveform=self.waveform,
+                               params=self.params,
+                               max_memory=self.max_memory,
+                               precision=self.precision)
+        if self.coeffs is not None:
+            channel.coeffs = self.coeffs[idx]
+        return channel
+    
+    def generate(self):
+        """
+        Generate the FMCW radar signals of all links.
+
+        The IF signal is synthesized over blocks of chirps and accumulated into the output,
+        so that the temporary arrays do not exceed the size of the output or the memory ceiling.
+
+        Returns:
+        -------
+        IF_signal : numpy.ndarray
+            Intermediate Frequency (IF) signals of shape (N_links, N_rx, N_tx, N_samples, N_chirps).
+        """
+        N_links = len(self.paths)
+        N_tx, N_rx = self.tx_antennas[0].num_elements(), self.rx_antennas[0].num_elements()
+        n_chirps, n_samples = self.waveform.n_chirps, self.waveform.n_samples_per_chirp
+        
+        _, complex_dtype = precision_dtypes(self.precision)
+        
+        paths = pad_paths(self.paths, doppler_shift=False)
+        
+        # Filter paths with delay larger than chirp duration
+        a = np.where(paths['ToA'] < self.waveform.T_chirp, paths['a'], 0).astype(complex_dtype)
+        
+        # Antenna Array - (N_links, N_rx*N_tx, P)
+        array_response = joint_array_response(self.tx_antennas[0], self.rx_antennas[0],
+                                              paths['DoD_theta'], paths['DoD_phi'],
+                                              paths['DoA_theta'], paths['DoA_phi'], dtype=complex_dtype)
+        array_response = np.ascontiguousarray(array_response.transpose(1, 0, 2))
+        
+        IF_signal = self.waveform.synthesize(array_response, a, paths['ToA'], paths['doppler_vel'], paths['doppler_acc'],
+                                             max_memory=self.max_memory)
+        
+        # N_links x N_rx x N_tx x N_samples x N_chirps
+        IF_signal = IF_signal.reshape((N_links, N_rx, N_tx, n_chirps, n_samples))
+        IF_signal = np.swapaxes(IF_signal, -1, -2)
+        
+        self.coeffs = IF_signal
+        return IF_signal
@@ -0,0 +1,133 @@
+import numpy as np
+import scipy.fft
+
+class Codebook:
+    """
+    A class for the beam codebooks of an antenna array, given by a matrix of beam vectors.
+    """
+    def __init__(self, vectors):
+        """
+        Initialize the Codebook object.
+
+        Parameters:
+        ----------
+        vectors : numpy.ndarray
+            Beam vectors of shape (num_elements, num_beams).
+        """
+        self.vectors = np.asarray(vectors)
+
+    def num_beams(self):
+        return self.vectors.shape[1]
+
+    def combine(self, array_response):
+        """
+        Project array responses onto the beams for receive combining, i.e., compute W^H a.
+
+        Parameters:
+        ----------
+        array_response : numpy.ndarray
+            Array responses of shape (num_elements, ...).
+
+        Returns:
+        -------
+        numpy.ndarray
+            Beam responses of shape (num_beams, ...).
+        """
+        W = self.vectors.astype(array_response.dtype, copy=False)
+        return np.tensordot(W.conj(), array_response, axes=(0, 0))
+
+    def beamform(self, array_response):
+        """
+        Project array responses onto the beams for transmit beamforming, i.e., compute W^T a.
+
+        Parameters:
+        ----------
+        array_response : numpy.ndarray
+            Array responses of shape (num_elements, ...).
+
+        Returns:
+        -------
+        numpy.ndarray
+            Beam responses of shape (num_beams, ...).
+        """
+        W = self.vectors.astype(array_response.dtype, copy=False)
+        return np.tensordot(W, array_response, axes=(0, 0))
+
+
+class DFTCodebook(Codebook):
+    """
+    An oversampled 2D DFT codebook of a planar antenna array.
+
+    The beam (b_z, b_y) has the weights exp(j 2 pi (y b_y / (N_y O_y) + z b_z / (N_z O_z))) / sqrt(N_y N_z)
+    on the element z * N_y + y, and has the index b_z * N_y O_y + b_y. The projections onto the beams
+    are computed with zero-padded FFTs over the array axes.
+    """
+    def __init__(self, shape, oversampling=(1, 1)):
+        """
+        Initialize the DFTCodebook object.
+
+        Parameters:
+        ----------
+        shape : tuple of int
+            Size of the antenna array (num_rows, num_cols).
+        oversampling : tuple of int, optional
+            Oversampling factors of the DFT along the rows and columns.
+        """
+        self.shape = tuple(int(n) for n in shape)
+        self.oversampling = tuple(int(o) for o in oversampling)
+        self.num_grid = (self.shape[0] * self.oversampling[0], self.shape[1] * self.oversampling[1])
+        self._norm = np.sqrt(np.prod(self.shape))
+
+        y, z = self.shape
+        b_y, b_z = self.num_grid
+        phase = (np.outer(np.arange(y), np.arange(b_y) / b_y)[None, :, None, :] +
+                 np.outer(np.arange(z), np.arange(b_z) / b_z)[:, None, :, None])
+        super().__init__((np.exp(1j * 2 * np.pi * phase) / self._norm).reshape((y*z, b_y*b_z)))
+
+    def _project(self, array_response, transform, norm):
+        # (z, y, ...) element grid to the (b_z, b_y, ...) beam grid
+        y, z = self.shape
+        b_y, b_z = self.num_grid
+        grid = array_response.reshape((z, y) + array_response.shape[1:])
+        beams = transform(grid, s=(b_z, b_y), axes=(0, 1), norm=norm)
+        beams = beams.reshape((b_z * b_y, ) + array_response.shape[1:])
+        return beams / array_response.real.dtype.type(self._norm)
+
+    def combine(self, array_response):
+        return self._project(array_response, scipy.fft.fftn, norm='backward')
+
+    def beamform(self, array_response):
+        # Unscaled inverse FFT for the conjugate DFT weights
+        return self._project(array_response, scipy.fft.ifftn, norm='forward')
+
+
+def create_codebook(codebook_params, antenna):
+    """
+    Create the codebook of an antenna.
+
+    Parameters:
+    ----------
+    codebook_params : None, dict, str or array_like
+        None for the DFT codebook of the antenna, a dictionary with the 'oversampling' factors of the
+        DFT codebook, the path of a .npy file with the beam vectors, or the (num_elements, num_beams)
+        beam vectors.
+    antenna : Antenna object
+        The antenna of the codebook.
+
+    Returns:
+    -------
+    codebook : Codebook
+        The created codebook.
+    """
+    if codebook_params is None:
+        return DFTCodebook(antenna.shape)
+    elif isinstance(codebook_params, dict):
+        return DFTCodebook(antenna.shape, codebook_params.get('oversampling', [1, 1]))
+    elif isinstance(codebook_params, str):
+        codebook = Codebook(np.load(codebook_params))
+    else:
+        codebook = Codebook(codebook_params)
+    
+    if codebook.vectors.ndim != 2 or codebook.vectors.shape[0] != antenna.num_elements():
+        raise ValueError(f"The codebook must be of shape (num_elements={antenna.num_elements()}, num_beams).")
+    return codebook
@@ -1,6 +1,7 @@
 import numpy as np
 
 from . import consts as c
+from .Antenna import AntennaSet
 
 class Paths:
     def __init__(self, path_dict, carrier_freq, max_num_path=None):
@@ -124,4 +125,322 @@ class Paths:
         """
         for key, array in self.__dict__.items():
             if isinstance(array, np.ndarray):  # Ensure it's a NumPy array
-                self.__dict__[key] = array[FoV_filter]  # Apply the filter
\ No newline at end of file
+                self.__dict__[key] = array[FoV_filter]  # Apply the filter
+
+def pad_paths(paths_list, doppler_shift=False):
+    """
+    Stack the paths of multiple links into zero-padded arrays for batched channel generation.
+
+    Parameters:
+    ----------
+    paths_list : list of Paths or PathsBatch
+        Paths of each link. All links are assumed to share the same carrier frequency.
+    doppler_shift : bool
+        If True, the Doppler phase shift is applied to the complex path gains.
+
+    Returns:
+    -------
+    padded : dict
+        Dictionary with DoD_theta, DoD_phi, DoA_theta, DoA_phi, ToA, doppler_vel, doppler_acc and
+        the complex gains 'a', each of shape (num_links, max_num_paths). Padded entries have zero
+        gain and do not contribute to the generated channels.
+    """
+    if isinstance(paths_list, PathsBatch):
+        return paths_list.padded(doppler_shift=doppler_shift)
+    
+    num_paths = np.array([paths.num_paths() for paths in paths_list], dtype=int)
+    num_links = len(paths_list)
+    max_num_paths = num_paths.max() if num_links > 0 else 0
+
+    # Flat position of each path in the padded (num_links, max_num_paths) arrays
+    offsets = np.concatenate(([0], np.cumsum(num_paths)[:-1])) if num_links > 0 else np.zeros(0, dtype=int)
+    rows = np.repeat(np.arange(num_links), num_paths)
+    cols = np.arange(num_paths.sum()) - np.repeat(offsets, num_paths)
+
+    def stack(key):
+        values = [getattr(paths, key) for paths in paths_list]
+        out = np.zeros((num_links, max_num_paths), dtype=float)
+        if len(rows) > 0:
+            out[rows, cols] = np.concatenate(values)
+        return out
+
+    padded = {key: stack(key) for key in ['DoD_theta', 'DoD_phi', 'DoA_theta', 'DoA_phi', 'ToA',
+                                          'power', 'phase', 'doppler_vel', 'doppler_acc']}
+
+    a = np.sqrt(padded.pop('power')) * np.exp(1j*np.radians(padded.pop('phase')))
+    if doppler_shift and num_links > 0:
+        tau = padded['ToA']
+        a *= np.exp(-1j * 2 * np.pi * tau*(padded['doppler_vel'] + tau*padded['doppler_acc']/2) / paths_list[0].wavelength)
+    padded['a'] = a
+    return padded
+
+
+# Per-path fields of the post-processed paths
+PATH_FIELDS = ['DoD_theta', 'DoD_phi', 'DoA_theta', 'DoA_phi', 'ToA', 'power', 'phase', 'doppler_vel', 'doppler_acc']
+
+class PathsBatch:
+    """
+    The paths of multiple links (e.g., all links of a scene) in flat contiguous arrays.
+
+    The paths of the link k are the entries offsets[k]:offsets[k+1] of the flat array of each field.
+    The angles are in radians and the phases in degrees, as in the Paths objects. The ray-tracing
+    parameters are processed (num_paths truncation, antenna rotation, FoV filtering and Doppler) with
+    single vectorized operations over all links, and the Paths of each link is a view into the flat arrays.
+    """
+    def __init__(self, values, offsets, carrier_freq, antenna_applied=False):
+        """
+        Initialize the PathsBatch object.
+
+        Parameters:
+        ----------
+        values : dict
+            Flat array of each field of PATH_FIELDS.
+        offsets : numpy.ndarray
+            Offsets of the paths of the links, of length num_links + 1.
+        carrier_freq : float
+            Carrier frequency in Hz.
+        antenna_applied : bool, optional
+            Whether the antenna parameters are applied to the paths.
+        """
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.carrier_freq = carrier_freq
+        self.wavelength = None if carrier_freq is None else carrier_freq / c.LIGHTSPEED
+        self.antenna_applied = antenna_applied
+    
+    @classmethod
+    def from_ray_data(cls, path_dict, offsets, carrier_freq, max_num_path=None):
+        """
+        Create the batch from the ray-tracing paths of multiple links, as read by the RayTracingLoader.
+
+        Parameters:
+        ----------
+        path_dict : dict
+            Path parameters concatenated over the links, in the format of the Paths path_dict (angles in degrees).
+        offsets : numpy.ndarray
+            Offsets of the first path of each link, with the total number of paths at the end.
+        carrier_freq : float
+            Carrier frequency in Hz.
+        max_num_path : int, optional
+            Maximum number of paths of each link. The strongest (first) paths are kept.
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        num_paths = np.diff(offsets)
+        start, end = offsets[0], offsets[-1]
+        
+        # Truncation of each link to its first max_num_path paths
+        keep = slice(None)
+        if max_num_path is not None:
+            rank = np.arange(end - start) - np.repeat(offsets[:-1] - start, num_paths)
+            keep = rank < max_num_path
+            num_paths = np.minimum(num_paths, max_num_path)
+        
+        def column(key, convert=np.array):
+            return convert(np.asarray(path_dict[key])[start:end])[keep]
+        
+        values = {key: column(key) for key in ['power', 'phase', 'ToA']}
+        values.update({key: column(key, np.radians) for key in ['DoD_theta', 'DoD_phi', 'DoA_theta', 'DoA_phi']})
+        if path_dict.get('Doppler_vel') is not None:
+            values['doppler_vel'] = column('Doppler_vel')
+            values['doppler_acc'] = column('Doppler_acc')
+        else:
+            values['doppler_vel'] = np.zeros_like(values['DoA_phi'])
+            values['doppler_acc'] = np.zeros_like(values['DoA_phi'])
+        return cls(values, np.concatenate(([0], np.cumsum(num_paths))), carrier_freq)
+    
+    @classmethod
+    def from_paths(cls, paths_list, carrier_freq=None):
+        """
+        Create the batch of the paths of a list of links.
+
+        Parameters:
+        ----------
+        paths_list : list of Paths
+            Paths of each link.
+        carrier_freq : float, optional
+            Carrier frequency in Hz. Defaults to the carrier frequency of the paths.
+        """
+        num_paths = [paths.num_paths() for paths in paths_list]
+        offsets = np.concatenate(([0], np.cumsum(num_paths, dtype=np.int64)))
+        values = {key: np.concatenate([getattr(paths, key) for paths in paths_list] + [np.zeros(0)]) 
+                  for key in PATH_FIELDS}
+        if carrier_freq is None and len(paths_list) > 0:
+            carrier_freq = paths_list[0].carrier_freq
+        return cls(values, offsets, carrier_freq, antenna_applied=all(paths.antenna_applied for paths in paths_list))
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def num_paths(self):
+        """
+        Number of paths of each link.
+        """
+        return np.diff(self.offsets)
+    
+    def fields(self, idx):
+        """
+        Fields of the paths of a link as a dictionary of array views.
+        """
+        return {key: array[self.offsets[idx]:self.offsets[idx+1]] for key, array in self.values.items()}
+    
+    def __getitem__(self, idx):
+        """
+        Paths view of a link, or the PathsBatch view of a contiguous range of links.
+        """
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                raise IndexError("Only contiguous ranges of links are supported.")
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop+1]
+            values = {key: array[offsets[0]:offsets[-1]] for key, array in self.values.items()}
+            return PathsBatch(values, offsets - offsets[0], self.carrier_freq, self.antenna_applied)
+        
+        paths = Paths.__new__(Paths)
+        paths.__dict__.update(self.fields(idx))
+        paths.carrier_freq = self.carrier_freq
+        paths.wavelength = self.wavelength
+        paths.antenna_applied = self.antenna_applied
+        return paths
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def _link_index(self):
+        # Link of each path
+        return np.repeat(np.arange(len(self)), self.num_paths())
+    
+    def _antenna_groups(self, antennas):
+        # (antenna, path mask) pairs of the given antenna or per-link list of antennas, with a None mask for all paths
+        if not isinstance(antennas, (list, tuple)):
+            return [(antennas, None)]
+        if len(antennas) != len(self):
+            raise ValueError("An antenna must be given for each link.")
+        link_index = self._link_index()
+        groups = {}
+        for k, antenna in enumerate(antennas):
+            groups.setdefault(id(antenna), (antenna, []))[1].append(k)
+        return [(antenna, np.isin(link_index, links)) for antenna, links in groups.values()]
+    
+    def _device_index(self, antenna_set):
+        # Device of each path, with a device of the antenna set for each link
+        if len(antenna_set) != len(self):
+            raise ValueError("An antenna must be given for each link.")
+        return self._link_index()
+    
+    def _rotate(self, antennas, theta_key, phi_key):
+        theta, phi = self.values[theta_key], self.values[phi_key]
+        if isinstance(antennas, AntennaSet):
+            self.values[theta_key], self.values[phi_key] = antennas.apply_rotation(theta, phi, self._device_index(antennas))
+            return
+        groups = self._antenna_groups(antennas)
+        if len(groups) == 1:
+            if groups[0][0].rotation is not None:
+                self.values[theta_key], self.values[phi_key] = groups[0][0].apply_rotation(theta, phi)
+            return
+        theta, phi = theta.copy(), phi.copy()
+        for antenna, mask in groups:
+            if antenna.rotation is not None:
+                theta[mask], phi[mask] = antenna.apply_rotation(theta[mask], phi[mask])
+        self.values[theta_key], self.values[phi_key] = theta, phi
+    
+    def _in_FoV(self, antennas, theta_key, phi_key):
+        if isinstance(antennas, AntennaSet):
+            return antennas.is_in_FoV(self.values[theta_key], self.values[phi_key], self._device_index(antennas))
+        in_FoV = np.ones(self.offsets[-1], dtype=bool)
+        for antenna, mask in self._antenna_groups(antennas):
+            if antenna.FoV is None:
+                continue
+            if mask is None:
+                in_FoV &= antenna.is_in_FoV(self.values[theta_key], self.values[phi_key])
+            else:
+                in_FoV[mask] &= antenna.is_in_FoV(self.values[theta_key][mask], self.values[phi_key][mask])
+        return in_FoV
+    
+    def apply_antenna_parameters(self, TX_antenna, RX_antenna):
+        """
+        Apply the rotations and the FoVs of the antennas to the paths of all links.
+
+        Parameters:
+        ----------
+        TX_antenna : Antenna object, list of Antenna objects or AntennaSet
+            Transmitting antenna of all links, or of each link.
+        RX_antenna : Antenna object, list of Antenna objects or AntennaSet
+            Receiving antenna of all links, or of each link.
+
+        Returns:
+        -------
+        self : PathsBatch
+        """
+        if self.antenna_applied:
+            raise RuntimeError('Antennas are already applied to the read ray-tracing parameters.')
+        
+        self._rotate(TX_antenna, 'DoD_theta', 'DoD_phi')
+        self._rotate(RX_antenna, 'DoA_theta', 'DoA_phi')
+        
+        in_FoV = self._in_FoV(TX_antenna, 'DoD_theta', 'DoD_phi') & self._in_FoV(RX_antenna, 'DoA_theta', 'DoA_phi')
+        self.apply_FoV_filter(in_FoV)
+        
+        self.antenna_applied = True
+        return self
+    
+    def apply_FoV_filter(self, FoV_filter):
+        """
+        Keep the paths of all links where FoV_filter is True.
+
+        Parameters:
+        ----------
+        FoV_filter : numpy.ndarray
+            A boolean array over the flat paths.
+        """
+        num_paths = np.bincount(self._link_index()[FoV_filter], minlength=len(self))
+        self.values = {key: array[FoV_filter] for key, array in self.values.items()}
+        self.offsets = np.concatenate(([0], np.cumsum(num_paths)))
+    
+    def cir(self, doppler_shift=False):
+        """
+        Complex gains and delays of the flat paths of all links.
+        """
+        v = self.values
+        a = np.sqrt(v['power']) * np.exp(1j*np.radians(v['phase']))
+        if doppler_shift:
+            a *= np.exp(-1j * 2 * np.pi * v['ToA']*(v['doppler_vel'] + v['ToA']*v['doppler_acc']/2) / self.wavelength)
+        return a, v['ToA']
+    
+    def padded(self, doppler_shift=False):
+        """
+        The paths of all links in zero-padded (num_links, max_num_paths) arrays, as returned by pad_paths.
+        """
+        num_paths = self.num_paths()
+        num_links = len(self)
+        max_num_paths = num_paths.max() if num_links > 0 else 0
+        rows = self._link_index()
+        cols = np.arange(self.offsets[-1]) - np.repeat(self.offsets[:-1], num_paths)
+        
+        def scatter(values, dtype=float):
+            out = np.zeros((num_links, max_num_paths), dtype=dtype)
+            out[rows, cols] = values
+            return out
+        
+        padded = {key: scatter(self.values[key]) for key in ['DoD_theta', 'DoD_phi', 'DoA_theta', 'DoA_phi', 'ToA', 
+                                                             'doppler_vel', 'doppler_acc']}
+        padded['a'] = scatter(self.cir(doppler_shift=doppler_shift and num_links > 0)[0], dtype=complex)
+        return padded
+    
+    def nbytes(self):
+        return self.offsets.nbytes + sum(array.nbytes for array in self.values.values())
+    
+    def to_dict(self):
+        """
+        Flat arrays of the batch, e.g., for numpy.savez.
+        """
+        return {**self.values, 'offsets': self.offsets, 'carrier_freq': np.array(self.carrier_freq)}
+    
+    @classmethod
+    def from_dict(cls, arrays):
+        """
+        Create the batch of post-processed paths from the arrays of to_dict.
+        """
+        return cls({key: np.asarray(arrays[key]) for key in PATH_FIELDS}, arrays['offsets'], float(arrays['carrier_freq']),
+                   antenna_applied=True)
@@ -0,0 +1,173 @@
+import numpy as np
+import scipy.fft
+
+from . import consts as c
+
+# Supported maps of the radar processing
+RADAR_MAPS = ['range_doppler', 'range_angle']
+
+WINDOWS = {None: np.ones,
+           'rect': np.ones,
+           'hann': np.hanning,
+           'hamming': np.hamming,
+           'blackman': np.blackman}
+
+class RadarProcessor:
+    """
+    A class to compute the range-Doppler and range-angle maps of FMCW radar IF signals.
+
+    The FFTs are applied over the trailing axes of the IF signals, so that the maps of any number of
+    links and scenes stacked along the leading axes are computed with a single batched FFT.
+    """
+    def __init__(self, window='hann', range_fft=None, doppler_fft=None, angle_fft=None, dtype='float64', workers=1, rx_shape=None):
+        """
+        Initialize the radar processing parameters.
+
+        Parameters:
+        ----------
+        window : str, optional
+            Window applied over the samples, chirps and receive antennas before the FFTs.
+            One of None/'rect', 'hann', 'hamming' or 'blackman'.
+        range_fft : int, optional
+            Size of the range FFT. The samples of each chirp are zero-padded to this size.
+            Defaults to the number of samples per chirp.
+        doppler_fft : int, optional
+            Size of the Doppler FFT. The chirps are zero-padded to this size.
+            Defaults to the number of chirps.
+        angle_fft : int, optional
+            Size of the angle FFT over the receive antennas. Defaults to the number of receive antennas
+            along the angle axis.
+        dtype : str, optional
+            Floating point type of the maps, 'float64' or 'float32'. With 'float32', the FFTs are
+            computed in single precision.
+        workers : int, optional
+            Number of workers of the batched FFTs (-1 for all CPUs).
+        rx_shape : tuple of int, optional
+            Shape (num_rows, num_cols) of the receive antenna array. For a planar array, the angle FFT is
+            taken along the rows (y axis) of the array. Linear arrays are processed over all their elements.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"The radar processing window must be one of {list(WINDOWS.keys())}.")
+        if np.dtype(dtype) not in [np.float32, np.float64]:
+            raise ValueError("The radar processing dtype must be 'float32' or 'float64'.")
+
+        self.window = window
+        self.range_fft = range_fft
+        self.doppler_fft = doppler_fft
+        self.angle_fft = angle_fft
+        self.dtype = np.dtype(dtype)
+        self.complex_dtype = np.result_type(self.dtype, np.complex64)
+        self.workers = workers
+        self.rx_shape = None if rx_shape is None else tuple(int(n) for n in np.ravel(rx_shape))
+
+    def _windowed_fft(self, x, n, axis):
+        # Window and zero-pad the given axis and apply the FFT
+        w_shape = [1] * x.ndim
+        w_shape[axis] = x.shape[axis]
+        w = WINDOWS[self.window](x.shape[axis]).astype(self.dtype).reshape(w_shape)
+        return scipy.fft.fft(x * w, n=n, axis=axis, workers=self.workers)
+
+    def _range_fft(self, IF_signal):
+        IF_signal = np.asarray(IF_signal).astype(self.complex_dtype, copy=False)
+        return self._windowed_fft(IF_signal, n=self.range_fft, axis=-2)
+
+    def range_doppler(self, IF_signal):
+        """
+        Compute the range-Doppler maps of IF signals.
+
+        The power is integrated non-coherently over the transmit and receive antennas.
+
+        Parameters:
+        ----------
+        IF_signal : numpy.ndarray
+            IF signals of shape (..., N_rx, N_tx, N_samples, N_chirps).
+
+        Returns:
+        -------
+        numpy.ndarray
+            Range-Doppler power maps of shape (..., range_fft, doppler_fft), with the zero
+            Doppler at the center.
+        """
+        X = self._windowed_fft(self._range_fft(IF_signal), n=self.doppler_fft, axis=-1)
+        X = scipy.fft.fftshift(X, axes=-1)
+        return np.sum(np.abs(X)**2, axis=(-4, -3)).astype(self.dtype, copy=False)
+
+    def range_angle(self, IF_signal):
+        """
+        Compute the range-angle maps of IF signals.
+
+        The receive antennas are processed as a uniform linear array and the power is integrated
+        non-coherently over the transmit antennas and the chirps. For a planar receive array (see rx_shape),
+        the angle FFT is taken along the y axis and the power is also integrated over the columns of the array.
+
+        Parameters:
+        ----------
+        IF_signal : numpy.ndarray
+            IF signals of shape (..., N_rx, N_tx, N_samples, N_chirps).
+
+        Returns:
+        -------
+        numpy.ndarray
+            Range-angle power maps of shape (..., range_fft, angle_fft), with the broadside
+            direction at the center.
+        """
+        X = self._range_fft(IF_signal)
+        planar = self.rx_shape is not None and min(self.rx_shape) > 1
+        if planar:
+            # Element z * N_y + y of the array to the (z, y) grid
+            N_y, N_z = self.rx_shape
+            if X.shape[-4] != N_y * N_z:
+                raise ValueError(f"The IF signals have {X.shape[-4]} receive antennas instead of {N_y * N_z} of the receive array.")
+            X = X.reshape(X.shape[:-4] + (N_z, N_y) + X.shape[-3:])
+        X = self._windowed_fft(X, n=self.angle_fft, axis=-4)
+        X = scipy.fft.fftshift(X, axes=-4)
+        X = np.sum(np.abs(X)**2, axis=(-5, -3, -1) if planar else (-3, -1))
+        return np.swapaxes(X, -1, -2).astype(self.dtype, copy=False)
+
+    def process(self, IF_signal, maps=RADAR_MAPS):
+        """
+        Compute the selected maps of IF signals.
+
+        Parameters:
+        ----------
+        IF_signal : numpy.ndarray
+            IF signals of shape (..., N_rx, N_tx, N_samples, N_chirps).
+        maps : list of str, optional
+            Maps to compute, among 'range_doppler' and 'range_angle'.
+
+        Returns:
+        -------
+        dict
+            The computed maps, keyed by their names.
+        """
+        for map_type in maps:
+            if map_type not in RADAR_MAPS:
+                raise ValueError(f"The radar map must be one of {RADAR_MAPS}.")
+        return {map_type: getattr(self, map_type)(IF_signal) for map_type in maps}
+
+    def range_axis(self, waveform):
+        """
+        Ranges of the bins of the range FFT for the given FMCW waveform.
+
+        Returns:
+        -------
+        numpy.ndarray
+            Round-trip distance of each range bin divided by two, in meters.
+        """
+        n = self.range_fft or waveform.n_samples_per_chirp
+        f_IF = np.arange(n) * waveform.Fs / n
+        return f_IF / waveform.chirp_slope * c.LIGHTSPEED / 2.
+
+    def velocity_axis(self, waveform):
+        """
+        Doppler velocities of the bins of the (shifted) Doppler FFT for the given FMCW waveform.
+
+        Returns:
+        -------
+        numpy.ndarray
+            Doppler velocity of each Doppler bin in m/s, in the convention of the path Doppler velocities.
+        """
+        n = self.doppler_fft or waveform.n_chirps
+        chirp_spacing = waveform.time[waveform.n_samples_per_chirp] - waveform.time[0] if waveform.n_chirps > 1 else waveform.T_chirp
+        f_D = scipy.fft.fftshift(scipy.fft.fftfreq(n, d=chirp_spacing))
+        return f_D * c.LIGHTSPEED / waveform.f_0
@@ -1,17 +1,39 @@
 import os
 import glob
+import json
+import hashlib
+import tempfile
 import numpy as np
 import scipy.io
 import re
 import pandas as pd
 from . import consts as c
 from .utils import dbm2pow
-from tqdm import tqdm
+
+# Name of the ray-tracing index in the wireless folder of a scenario
+RT_INDEX_FILE = 'ray_tracing_index.json'
+
+# File name formats of the BS-BS and BS-UE ray-tracing files, with the numbers in their names
+RT_FILE_FORMATS = {'tx': ('BS*_BS.mat', ['tx']),
+                   'rx': ('BS*_UE_*-*.mat', ['tx', 'rx_start', 'rx_end'])}
 
 class RayTracingLoader:
-    def __init__(self, directory):
+    def __init__(self, directory, cache_dir=None, files=None):
+        """
+        Initialize the RayTracingLoader object.
+
+        Parameters:
+        - directory (str): The scene folder with the ray-tracing files.
+        - cache_dir (str, optional): Folder of the persistent ray-tracing cache of this scene. The paths
+                                     of each BS are converted to .npy files at their first load and later
+                                     loads memory-map them. The cache is disabled if None.
+        - files (dict, optional): The entry of the scene in the ray-tracing index (see build_ray_tracing_index).
+                                  The scene folder is not listed if given.
+        """
         self.directory = directory
-        self.data_tables = self._get_data_files(directory)
+        self.cache_dir = cache_dir
+        self.data_tables = self._get_data_files(directory, files)
+        self._prefetched = {}
 
         # -- To validate the format --
         # TODO: To be written..
@@ -19,26 +41,74 @@ class RayTracingLoader:
         self.num_bs = len(self.data_tables['tx'])
         self.num_files_per_bs = (self.data_tables['rx']['tx'] == 1).sum() # Pick number of BSs from the BS file
         
+    def prefetch(self, executor, tx_idx, user=True):
+        """
+        Submits the reads of the ray-tracing files of a set of transmitters to an executor, so that the files
+        are read in the background. The later loads of these files wait for the submitted reads. The files are
+        not prefetched with the ray-tracing cache, which is read from its own files.
+
+        Parameters:
+        - executor (concurrent.futures.Executor): The executor of the file reads, e.g., a thread pool.
+        - tx_idx (array-like): Transmitter (BS) indices, starting from 0.
+        - user (bool): Prefetch the BS-UE files if True, and the BS-BS files otherwise.
+        """
+        if self.cache_dir is not None:
+            return
+        df = self.data_tables['rx' if user else 'tx']
+        for file in df[df['tx'].isin(np.ravel(tx_idx))]['file_path']:
+            if file not in self._prefetched:
+                self._prefetched[file] = executor.submit(scipy.io.loadmat, file)
+    
+    @property
+    def num_prefetched(self):
+        # Number of prefetched reads that are not consumed by a load
+        return len(self._prefetched)
+    
+    def release_prefetched(self):
+        """
+        Drops the prefetched reads that are not consumed by a load, cancelling those not started yet.
+        """
+        for future in self._prefetched.values():
+            future.cancel()
+        self._prefetched.clear()
+    
+    def _loadmat(self, file):
+        # Reads a ray-tracing file, or waits for its prefetched read. A prefetched read is consumed by
+        # its first load, so that its data is released with the loaded data.
+        if file in self._prefetched:
+            return self._prefetched.pop(file).result()
+        return scipy.io.loadmat(file)
+    
     def load_data(self, tx_idx, rx_idx=None, user=True):
+        """
+        Loads the ray-tracing paths between a transmitter and a set of receivers.
+
+        Parameters:
+        - tx_idx (int): Transmitter (BS) index, starting from 0.
+        - rx_idx (array-like): Indices of the receivers to be loaded. All UEs are loaded if None.
+        - user (bool): Load the BS-UE paths if True, and the BS-BS paths otherwise.
+
+        Returns:
+        - tuple: A tuple containing the data dictionary and tx_loc. The paths of all receivers are
+                 concatenated in the c.OUT_PATH dictionary of arrays, and the paths of the receiver k
+                 are in the range [offsets[k], offsets[k+1]) with offsets = data[c.OUT_PATH_OFFSETS].
+        """
         if rx_idx is None:
             rx_idx = np.arange(self.num_ue)
-        ray_data, rx_locs, tx_loc = self._load_ray_data(bs_id=tx_idx, 
-                                                        generation_idx=rx_idx, 
-                                                        df=self.data_tables['rx' if user else 'tx'])
+        df = self.data_tables['rx' if user else 'tx']
+        if self.cache_dir is None:
+            path_params, offsets, rx_locs, tx_loc = self._load_ray_data(bs_id=tx_idx, 
+                                                                        generation_idx=np.asarray(rx_idx), 
+                                                                        df=df)
+        else:
+            cache = self._load_cache(bs_id=tx_idx, df=df, name='BS%i_%s' % (tx_idx+1, 'UE' if user else 'BS'))
+            path_params, offsets, rx_locs, tx_loc = select_cached_ray_data(cache, np.asarray(rx_idx))
         
-        path_list = []
-        for user in tqdm(range(len(ray_data)), desc='Reading ray-tracing', leave=False):
-            path_dict = raydata_matrix_to_dictionary(ray_data[user][0], num_max_paths=None, power_normalization_factor=30)
-            path_list.append(path_dict)
-            
-        data = {c.OUT_LOC: [],
-                c.OUT_DIST: [],
-                c.OUT_PL: []}
-        data[c.OUT_PATH] = path_list
-        if len(rx_locs)>0:
-            data[c.OUT_LOC] = rx_locs[:, :3]
-            data[c.OUT_DIST] = rx_locs[:, 3]
-            data[c.OUT_PL] = rx_locs[:, 4]
+        data = {c.OUT_PATH: raydata_matrix_to_dictionary(path_params, num_max_paths=None, power_normalization_factor=30),
+                c.OUT_PATH_OFFSETS: offsets,
+                c.OUT_LOC: rx_locs[:, :3],
+                c.OUT_DIST: rx_locs[:, 3],
+                c.OUT_PL: rx_locs[:, 4]}
         return data, tx_loc
         
     def _load_ray_data(self, bs_id, generation_idx, df):
@@ -51,39 +121,84 @@ class RayTracingLoader:
         - df (pd.DataFrame): DataFrame containing file paths.
 
         Returns:
-        - tuple: A tuple containing ray_data, rx_locs, and tx_loc.
+        - tuple: A tuple containing path_params, offsets, rx_locs, and tx_loc. path_params is the
+                 (num_features, total_num_paths) concatenation of the paths of the loaded receivers
+                 in the order of generation_idx, and offsets holds the first path of each receiver.
+                 Receivers not available in any of the files are skipped.
         """
-        ray_data = []
-        rx_locs = []
-
         # Filter ue_df for the specified base station
-        filtered_df = df[df['tx'] == bs_id]
-
-        # Filter further based on generation_idx
-        filtered_df = filtered_df[
-            filtered_df.apply(lambda row: np.any((generation_idx >= row['rx_start']) & (generation_idx <= row['rx_end'])), axis=1)
-        ]
+        filtered_df = df[df['tx'] == bs_id].sort_values('rx_start')
+        rx_start = filtered_df['rx_start'].to_numpy()
+        rx_end = filtered_df['rx_end'].to_numpy()
+        
+        # Assign each requested receiver to the file covering it
+        file_idx = np.searchsorted(rx_start, generation_idx, side='right') - 1
+        available = (file_idx >= 0)
+        available[available] = generation_idx[available] <= rx_end[file_idx[available]]
+        generation_idx, file_idx = generation_idx[available], file_idx[available]
+        
+        ray_data = [None] * len(generation_idx)
+        rx_locs = np.zeros((len(generation_idx), 5))
         
-        ray_data = [] # May be converted to np.array
-        # Process each row in the filtered UE DataFrame
+        # Load each file with a requested receiver once
         file_data = None
-        for idx, row in filtered_df.iterrows():
-            file_path = row['file_path']
-            rx_start = row['rx_start']
-            rx_end = row['rx_end']
+        for i in np.unique(file_idx):
+            in_file = np.flatnonzero(file_idx == i)
+            rx_in_file = generation_idx[in_file] - rx_start[i]
+            file_data = self._loadmat(filtered_df['file_path'].iloc[i])
             
-            rx_in_file = generation_idx[(generation_idx >= rx_start) & (generation_idx <= rx_end)]
-            file_data = scipy.io.loadmat(file_path)
-            # TODO: somehow clean the next for loop
-            for rx in rx_in_file:
-                rx_data = file_data['channels'][0][rx-rx_start][0][0]
-                ray_data.append(rx_data)
-                rx_locs.append(file_data['rx_locs'][rx-rx_start])
-        ray_data = np.array(ray_data)
-        rx_locs = np.array(rx_locs)
+            for k, rx_data in zip(in_file, file_data['channels'][0][rx_in_file]):
+                ray_data[k] = rx_data[0, 0][0]
+            rx_locs[in_file] = file_data['rx_locs'][rx_in_file]
+        
+        num_paths = np.array([rx_data.shape[1] for rx_data in ray_data], dtype=int)
+        offsets = np.concatenate(([0], np.cumsum(num_paths)))
+        path_params = np.concatenate(ray_data, axis=1) if len(ray_data) > 0 else np.zeros((8, 0))
         tx_loc = self._get_tx_location(file_data, bs_id) # Sth better here would be good
 
-        return ray_data, rx_locs, tx_loc
+        return path_params, offsets, rx_locs, tx_loc
+
+    def _load_cache(self, bs_id, df, name):
+        """
+        Loads the memory-mapped ray-tracing cache of a BS, (re)building it from the source files if needed.
+
+        Parameters:
+        - bs_id (int): Base station ID.
+        - df (pd.DataFrame): DataFrame containing file paths.
+        - name (str): Name of the cache entry.
+
+        Returns:
+        - dict: A dictionary with the path_params, offsets, rx_locs, tx_loc and rx_idx arrays. rx_idx
+                holds the sorted indices of the receivers in the cache.
+        """
+        filtered_df = df[df['tx'] == bs_id]
+        sources = sorted([os.path.basename(file), os.stat(file).st_mtime_ns, os.stat(file).st_size]
+                         for file in filtered_df['file_path'])
+        
+        cache_folder = os.path.join(self.cache_dir, name)
+        sources_file = os.path.join(cache_folder, 'sources.json')
+        if os.path.exists(sources_file):
+            with open(sources_file, 'r') as file:
+                cached_sources = json.load(file)
+            if cached_sources == sources:
+                return {key: np.load(os.path.join(cache_folder, key + '.npy'), mmap_mode='r') 
+                        for key in RAY_CACHE_KEYS}
+        
+        rx_idx = [np.arange(row['rx_start'], row['rx_end']+1) for _, row in filtered_df.iterrows()]
+        rx_idx = np.unique(np.concatenate(rx_idx)) if len(rx_idx) > 0 else np.zeros(0, dtype=int)
+        path_params, offsets, rx_locs, tx_loc = self._load_ray_data(bs_id=bs_id, generation_idx=rx_idx, df=df)
+        cache = {'path_params': path_params, 'offsets': offsets, 'rx_locs': rx_locs,
+                 'tx_loc': tx_loc, 'rx_idx': rx_idx}
+        
+        # The sources file is written last to mark the cache entry as complete
+        os.makedirs(cache_folder, exist_ok=True)
+        if os.path.exists(sources_file):
+            os.remove(sources_file)
+        for key, value in cache.items():
+            np.save(os.path.join(cache_folder, key + '.npy'), value)
+        with open(sources_file, 'w') as file:
+            json.dump(sources, file)
+        return cache
 
     def _get_tx_location(self, file_data, bs_id):
             if file_data is not None and 'tx_loc' in file_data:
@@ -92,35 +207,37 @@ class RayTracingLoader:
             # pull it from the BS-BS file
             else:
                 file = os.path.join(self.directory, 'BS%i_BS.mat'%(bs_id+1))
-                file_data = scipy.io.loadmat(file)
+                file_data = self._loadmat(file)
                 tx_loc = file_data['rx_locs'][bs_id][:3]
             return tx_loc
 
-    def _get_data_files(self, directory):
+    def _get_data_files(self, directory, files=None):
         """
         Finds files in the specified directory, extracts numbers based on predefined regex patterns, and returns pandas DataFrames.
 
         Parameters:
         - directory (str): The directory to search for files.
+        - files (dict, optional): The entry of the scene in the ray-tracing index, used instead of listing the directory.
 
         Returns:
         - dict of DataFrames: Dictionary with keys as 'bs' and 'ue' and values as DataFrames with extracted file paths and numbers.
         """
-        def process_files(format, column_names):
-            format_regex = format.replace('*', r'(\d+)')
-            files = glob.glob(os.path.join(directory, format))
-            data = return_numbers_from_filelist(files, format_regex)
-            df = pd.DataFrame(data, columns=['file_path'] + column_names)
+        if files is None:
+            files = scan_ray_tracing_files(directory)
+        
+        def process_files(key):
+            data = [(os.path.join(directory, file[0]),) + tuple(file[1:]) for file in files[key]]
+            df = pd.DataFrame(data, columns=['file_path'] + RT_FILE_FORMATS[key][1])
             return df
 
         # Define file format strings and regex patterns
-        bs_df = process_files(format='BS*_BS.mat', column_names=['tx'])
+        bs_df = process_files('tx')
         # To match the format of BS-UE dictionaries
         bs_df['tx'] = bs_df['tx'] - 1
         bs_df['rx_start'] = bs_df['tx'].min()
         bs_df['rx_end'] = bs_df['tx'].max()
         
-        ue_df = process_files(format='BS*_UE_*-*.mat', column_names=['tx', 'rx_start', 'rx_end'])
+        ue_df = process_files('rx')
         ue_df['tx'] = ue_df['tx'] - 1
 
         return {'tx': bs_df, 'rx': ue_df}
@@ -160,6 +277,75 @@ class RayTracingLoader:
         except Exception as e:
             raise RuntimeError(f"An error occurred while loading scenario parameters: {e}")
 
+def scan_ray_tracing_files(directory):
+    """
+    Lists the ray-tracing files of a scene folder.
+
+    Parameters:
+    - directory (str): The scene folder.
+
+    Returns:
+    - dict: The 'tx' (BS-BS) and 'rx' (BS-UE) files, as lists of [file name, numbers...] with the
+            numbers of RT_FILE_FORMATS extracted from the file names.
+    """
+    files = {}
+    for key, (format, _) in RT_FILE_FORMATS.items():
+        format_regex = format.replace('*', r'(\d+)')
+        file_list = return_numbers_from_filelist(glob.glob(os.path.join(directory, format)), format_regex)
+        files[key] = sorted([os.path.basename(file[0])] + list(file[1:]) for file in file_list)
+    return files
+
+def build_ray_tracing_index(wireless_folder, index_file=None):
+    """
+    Scans the scene folders of a scenario once and writes the ray-tracing index, so that the scene
+    loaders do not list the scene folders. The index must be rebuilt if the ray-tracing files change.
+
+    Parameters:
+    - wireless_folder (str): The wireless folder of the scenario with the scene_* folders.
+    - index_file (str, optional): Path of the JSON index. Defaults to RT_INDEX_FILE in the wireless folder.
+
+    Returns:
+    - dict: The index, with the 'scenes' entry mapping each scene folder name to its 'tx' and 'rx'
+            files (see scan_ray_tracing_files) and its 'num_ue' and 'num_bs' counts.
+    """
+    if index_file is None:
+        index_file = os.path.join(wireless_folder, RT_INDEX_FILE)
+    
+    scenes = {}
+    with os.scandir(wireless_folder) as entries:
+        for entry in entries:
+            if entry.is_dir() and re.fullmatch(r'scene_\d+', entry.name):
+                files = scan_ray_tracing_files(entry.path)
+                scenes[entry.name] = {'tx': files['tx'], 
+                                      'rx': files['rx'],
+                                      'num_ue': max([file[3] for file in files['rx']], default=0),
+                                      'num_bs': len(files['tx'])}
+    index = {'scenes': dict(sorted(scenes.items(), key=lambda scene: int(scene[0][6:])))}
+    
+    # The index is written to a temporary file and moved in place, so that it is never read partially written
+    fd, temp_file = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(index_file)))
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(index, file, separators=(',', ':'))
+        os.replace(temp_file, index_file)
+    except BaseException:
+        os.remove(temp_file)
+        raise
+    return index
+
+def load_ray_tracing_index(index_file):
+    """
+    Loads a ray-tracing index written by build_ray_tracing_index.
+
+    Parameters:
+    - index_file (str): Path of the JSON index.
+
+    Returns:
+    - dict: The index.
+    """
+    with open(index_file, 'r') as file:
+        return json.load(file)
+
 def return_numbers_from_filelist(file_list, pattern_str):
     """
     Processes a list of file paths, extracts matches based on a predefined regex pattern, and returns a dictionary
@@ -250,6 +436,72 @@ def raydata_matrix_to_dictionary(path_params, num_max_paths=None, power_normaliz
 
     return user_data
 
+RAY_CACHE_KEYS = ['path_params', 'offsets', 'rx_locs', 'tx_loc', 'rx_idx']
+
+def select_cached_ray_data(cache, generation_idx):
+    """
+    Selects the ray-tracing data of a set of receivers from a ray-tracing cache entry.
+
+    Parameters:
+    - cache (dict): Cache entry with the path_params, offsets, rx_locs, tx_loc and rx_idx arrays.
+    - generation_idx (np.array): Indices of the receivers to be selected.
+
+    Returns:
+    - tuple: A tuple containing path_params, offsets, rx_locs, and tx_loc in the format of
+             RayTracingLoader._load_ray_data. Receivers not available in the cache are skipped.
+    """
+    rx_idx = cache['rx_idx']
+    if len(rx_idx) > 0:
+        pos = np.minimum(np.searchsorted(rx_idx, generation_idx), len(rx_idx)-1)
+        pos = pos[rx_idx[pos] == generation_idx]
+    else:
+        pos = np.zeros(0, dtype=int)
+    
+    # Column indices of the paths of the selected receivers
+    starts, ends = cache['offsets'][pos], cache['offsets'][pos+1]
+    num_paths = ends - starts
+    offsets = np.concatenate(([0], np.cumsum(num_paths)))
+    path_idx = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], num_paths)
+    
+    path_params = np.asarray(cache['path_params'][:, path_idx])
+    rx_locs = np.asarray(cache['rx_locs'][pos])
+    return path_params, offsets, rx_locs, np.asarray(cache['tx_loc'])
+
+def ray_data_hash(data):
+    """
+    Computes the content hash of the paths loaded by RayTracingLoader.load_data, so that identical
+    ray-tracing data, e.g., the BS-BS paths of static BSs in different scenes, can be detected.
+
+    Parameters:
+    - data (dict): The data dictionary returned by load_data.
+
+    Returns:
+    - str: The hexadecimal hash of the path offsets and the path parameters.
+    """
+    content = hashlib.blake2b(digest_size=16)
+    content.update(np.ascontiguousarray(data[c.OUT_PATH_OFFSETS], dtype=np.int64).tobytes())
+    for key in sorted(data[c.OUT_PATH]):
+        value = data[c.OUT_PATH][key]
+        if value is not None:
+            content.update(key.encode())
+            content.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+    return content.hexdigest()
+
+def slice_path_dict(path_dict, offsets, idx):
+    """
+    Returns the path dictionary of a single receiver from the concatenated paths of multiple receivers.
+
+    Parameters:
+    - path_dict (dict): Dictionary of path parameter arrays concatenated over the receivers.
+    - offsets (np.array): Offsets of the first path of each receiver, with the total number of paths at the end.
+    - idx (int): Index of the receiver.
+
+    Returns:
+    - dict: A dictionary with the path parameters of the receiver.
+    """
+    start, end = offsets[idx], offsets[idx+1]
+    return {key: None if value is None else value[start:end] for key, value in path_dict.items()}
+
 if __name__ == '__main__':
     x = RayTracingLoader(r'C:\Users\Umt\Documents\GitHub\DeepMIMO-python\raytracing_scenarios\city_4_phoenix')
     
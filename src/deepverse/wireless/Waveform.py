@@ -4,6 +4,9 @@ import numpy as np
 from .utils import format_with_si_prefix
 from . import consts as c
 
+# Approximate size of the temporary arrays per path and sample in the IF signal synthesis
+IF_BYTES_PER_SAMPLE = 64
+
 class Waveform:
     """
     A base class for waveform generation.
@@ -64,6 +67,9 @@ class FMCW(Waveform):
         self.time = self.time_fast[None, :] + np.arange(n_chirps)[:, None] * self.T_chirp
         self.time = self.time.reshape((-1, ))
         
+        # Fast time of each sample of the frame
+        self.time_fast_frame = np.tile(self.time_fast, n_chirps)
+        
         self.bandwidth = self.chirp_slope * self.T_chirp
         
     def __str__(self):
@@ -85,15 +91,6 @@ class FMCW(Waveform):
         numpy.ndarray
             FMCW waveform samples.
         """     
-        
-        # t = self.time.reshape((1, -1)) # Sampling times
-        # t_fast = t[0, None, :self.n_samples_per_chirp]
-        # t_fast = np.tile(t_fast, (1, self.n_chirps))
-
-        t = self.time.reshape((1, -1))
-        t_fast = self.time_fast.reshape((1, -1))
-        t_fast = np.tile(t_fast, (1, self.n_chirps))
-        
         # Adjusted time for path and chirp
         a, tau = paths.cir(doppler_shift=False)
         doppler_vel = paths.doppler_vel
@@ -101,32 +98,114 @@ class FMCW(Waveform):
         
         # Filter paths with delay larger than chirp duration
         path_filter = tau < self.T_chirp
-        a = a[path_filter].reshape((-1, 1))
-        tau = tau[path_filter].reshape((-1, 1))
-        doppler_vel = doppler_vel[path_filter].reshape((-1, 1))
-        doppler_acc = doppler_acc[path_filter].reshape((-1, 1))
         
+        # IF signal: P x T (chirp time samples)
+        return self.generate_IF_block(a[path_filter], tau[path_filter], 
+                                      doppler_vel[path_filter], doppler_acc[path_filter],
+                                      chirp_start=0, chirp_end=self.n_chirps)
+    
+    def generate_IF_block(self, a, tau, doppler_vel, doppler_acc, chirp_start, chirp_end):
+        """
+        Generate the IF signal samples of a block of chirps.
+        
+        Parameters:
+        ----------
+        a : numpy.ndarray
+            Complex path gains of shape (..., P). The IF signal is generated in single precision
+            if the gains are complex64.
+        tau : numpy.ndarray
+            Path delays at the start of the frame of shape (..., P). Paths with delays larger than
+            the chirp duration must be filtered (or have zero gain).
+        doppler_vel : numpy.ndarray
+            Doppler velocities of the paths of shape (..., P).
+        doppler_acc : numpy.ndarray
+            Doppler accelerations of the paths of shape (..., P).
+        chirp_start : int
+            Index of the first chirp of the block.
+        chirp_end : int
+            Index after the last chirp of the block.
+        
+        Returns:
+        -------
+        numpy.ndarray
+            IF signal of shape (..., P, T_block) with T_block = (chirp_end-chirp_start) * n_samples_per_chirp.
+        """
+        block = slice(chirp_start * self.n_samples_per_chirp, chirp_end * self.n_samples_per_chirp)
+        t = self.time[block]
+        t_fast = self.time_fast_frame[block]
+        
+        a, tau = a[..., None], tau[..., None]
+        doppler_vel, doppler_acc = doppler_vel[..., None], doppler_acc[..., None]
+        
+        # A sample receives either the echo of the current chirp or the late echo of the previous chirp
         not_first_chirp = t_fast > tau
         next_chirp = t_fast < (tau-self.T_pause)
-
         
         velocity_term     = doppler_vel * t    / c.LIGHTSPEED 
         acceleration_term = doppler_acc * t**2 / c.LIGHTSPEED / 2. # This should be very small (may be removed)
         tau = tau + velocity_term + acceleration_term
         
+        # Late echoes are delayed by one chirp period
+        tau = tau - self.T_period * next_chirp
+        
         f_IF = self.chirp_slope * tau
         phi_IF = (self.f_0 - 0.5 * self.chirp_slope * tau) * tau # Second term may be removed
-        IF_signal1 = np.exp(1j * 2 * np.pi * (f_IF * t_fast + phi_IF))
- 
-        tau_minus_pri = tau - self.T_period
-        f_IF_late = self.chirp_slope * tau_minus_pri
-        phi_IF_late = (self.f_0 - 0.5 * self.chirp_slope * tau_minus_pri) * tau_minus_pri # Second term may be removedIF_signal1
-        IF_signal2 = np.exp(1j * 2 * np.pi * (f_IF_late * t_fast + phi_IF_late))
-
-        # IF signal: P x T (chirp time samples)
+        if a.dtype == np.complex64:
+            # Wrap the phase cycles, dominated by the carrier, before dropping to single precision
+            IF_signal = np.exp(1j * 2 * np.pi * ((f_IF * t_fast + phi_IF) % 1.).astype(np.float32))
+        else:
+            IF_signal = np.exp(1j * 2 * np.pi * (f_IF * t_fast + phi_IF))
+        
         # Conjugate to make it cir e^(-j phase)
-        IF_signal = np.conj(a) * (IF_signal1 * not_first_chirp + IF_signal2 * next_chirp)
-
+        IF_signal *= np.conj(a) * (not_first_chirp | next_chirp)
         
         return IF_signal
-    
\ No newline at end of file
+
+    def synthesize(self, array_response, a, tau, doppler_vel, doppler_acc, max_memory=None):
+        """
+        Synthesize the received FMCW signal over blocks of chirps.
+        
+        The IF signal of each block of chirps is combined with the array response and accumulated
+        into a preallocated output, so that the full paths x samples IF signal is never materialized.
+        
+        Parameters:
+        ----------
+        array_response : numpy.ndarray
+            Array response of the paths of shape (..., N, P), with N antenna element pairs.
+        a : numpy.ndarray
+            Complex path gains of shape (..., P). Paths with delays larger than the chirp duration
+            must have zero gain.
+        tau : numpy.ndarray
+            Path delays at the start of the frame of shape (..., P).
+        doppler_vel : numpy.ndarray
+            Doppler velocities of the paths of shape (..., P).
+        doppler_acc : numpy.ndarray
+            Doppler accelerations of the paths of shape (..., P).
+        max_memory : float, optional
+            Memory ceiling in bytes for the temporary arrays of each block. If None, the blocks
+            are limited to the size of the output.
+        
+        Returns:
+        -------
+        numpy.ndarray
+            Received signal of shape (..., N, n_chirps * n_samples_per_chirp).
+        """
+        N, num_paths = array_response.shape[-2], max(a.shape[-1], 1)
+        num_links = int(np.prod(a.shape[:-1]))
+        
+        if max_memory is None:
+            chirps_per_block = N * self.n_chirps // num_paths
+        else:
+            bytes_per_chirp = num_links * num_paths * self.n_samples_per_chirp * IF_BYTES_PER_SAMPLE
+            chirps_per_block = int(max_memory // bytes_per_chirp)
+        chirps_per_block = int(np.clip(chirps_per_block, 1, self.n_chirps))
+        
+        signal = np.zeros(array_response.shape[:-1] + (self.n_chirps*self.n_samples_per_chirp, ), dtype=np.result_type(array_response, a))
+        for chirp_start in range(0, self.n_chirps, chirps_per_block):
+            chirp_end = min(chirp_start + chirps_per_block, self.n_chirps)
+            IF_block = self.generate_IF_block(a, tau, doppler_vel, doppler_acc,
+                                              chirp_start=chirp_start, chirp_end=chirp_end)
+            # Sum over paths
+            block = slice(chirp_start*self.n_samples_per_chirp, chirp_end*self.n_samples_per_chirp)
+            np.matmul(array_response, IF_block, out=signal[..., block])
+        return signal
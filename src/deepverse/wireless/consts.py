@@ -28,7 +28,34 @@ PARAMSET_POLAR_EN = 'enable_dual_polar'
 PARAMSET_DOPPLER_EN = 'enable_doppler'
 
 PARAMSET_BS2BS = 'enable_BS2BS'
-PARAMSET_FDTD = 'OFDM_channels' # TD/OFDM
+PARAMSET_NUM_WORKERS = 'num_workers'
+PARAMSET_SEED = 'seed'
+PARAMSET_RT_CACHE = 'raytracing_cache'
+PARAMSET_RT_INDEX = 'raytracing_index'
+PARAMSET_PREFETCH = 'prefetch_scenes'
+PARAMSET_PREFETCH_WORKERS = 'prefetch_workers'
+PARAMSET_STORAGE = 'storage' # memory/memmap
+PARAMSET_STORAGE_PATH = 'storage_path'
+PARAMSET_STORAGE_DTYPE = 'storage_dtype'
+PARAMSET_MAX_MEMORY = 'max_memory' # Bytes
+PARAMSET_PRECISION = 'precision' # double/single
+PARAMSET_STEERING_CACHE = 'steering_cache'
+PARAMSET_BEAMSPACE = 'beamspace'
+PARAMSET_BEAM_SWEEP = 'beam_sweep'
+PARAMSET_SC_STRATEGY = 'subcarrier_strategy' # auto/direct/fft
+PARAMSET_FFT_THRESHOLD = 'fft_threshold'
+PARAMSET_RADAR_PROCESSING = 'processing'
+PARAMSET_PATHS_ONLY = 'paths_only'
+PARAMSET_BS_DEDUP = 'deduplicate_bs_links'
+PARAMSET_UE_ORIENTATION = 'ue_orientation' # static/mobility
+PARAMSET_ON_DEMAND = 'on_demand'
+PARAMSET_ON_DEMAND_CACHE = 'cache_size'
+PARAMSET_ON_DEMAND_SCENES = 'scene_cache_size'
+PARAMSET_FDTD = 'generate_OFDM_channels' # TD/OFDM
+
+PARAMSET_TD = 'TD'
+PARAMSET_TD_TAPS = 'num_taps'
+PARAMSET_TD_FS = 'sampling_rate' # GHz, as the bandwidth
 
 PARAMSET_OFDM = 'OFDM'
 PARAMSET_OFDM_SC_NUM = 'subcarriers'
@@ -36,7 +63,8 @@ PARAMSET_OFDM_SC_NUM = 'subcarriers'
 PARAMSET_OFDM_SC_SAMP = 'selected_subcarriers'
 PARAMSET_OFDM_BW = 'bandwidth'
 PARAMSET_OFDM_BW_MULT = 1e9 # Bandwidth input is GHz, multiply by this
-PARAMSET_OFDM_LPF = 'RX_filter'
+PARAMSET_OFDM_LPF = 'activate_RX_filter' # 0/1 or 'sinc'/'raised_cosine'
+PARAMSET_OFDM_LPF_ROLLOFF = 'RX_filter_rolloff'
 
 PARAMSET_ANT_BS = 'bs_antenna'
 PARAMSET_ANT_UE = 'ue_antenna'
@@ -68,6 +96,7 @@ PARAMSET_SCENARIO_PARAMS_PATH = 'scenario_params_path'
 # OUTPUT VARIABLES
 OUT_CHANNEL = 'channel'
 OUT_PATH = 'paths'
+OUT_PATH_OFFSETS = 'path_offsets'
 OUT_LOS = 'LoS'
 OUT_LOC = 'location'
 OUT_DIST = 'distance'
@@ -1,68 +1,61 @@
 from . import consts as c
-from .Antenna import Antenna
+from .Antenna import Antenna, AntennaSet, SteeringVectorCache
 
 import numpy as np
-import copy
 
-def create_antennas(ant_params, n_ant):
+def create_antennas(ant_params, n_ant, rng=np.random):
     """
-    Create base station antennas based on the given parameters.
+    Create the antennas of multiple devices based on the given parameters.
 
     Parameters:
     ----------
-    n_active_BS : int
-        Number of active base stations.
     ant_params : dict or list of dict
         Antenna parameters. Can be a single dictionary or a list of dictionaries
         where each dictionary contains parameters for one antenna.
+    n_ant : int
+        Number of devices, e.g., the number of active base stations.
+    rng : numpy.random.Generator, optional
+        Random generator of the random rotations. Defaults to the global numpy generator.
 
     Returns:
     -------
-    tx_ant : list of Antenna
-        List of created Antenna objects for each active base station.
+    antennas : AntennaSet
+        The antennas of the devices, indexed by the device.
     """
     
     # Check the type of antenna parameters and create antennas accordingly
     if isinstance(ant_params, dict):
-        # If antenna parameters are given as a single dictionary
+        # If antenna parameters are given as a single dictionary, the devices share the antenna
+        # and only differ by their rotations
+        ant_params = dict(ant_params)
+        rotation = ant_params['rotation']
+        ant_params['rotation'] = None
+        antenna = Antenna(**ant_params)
+        device_antenna = np.zeros(n_ant, dtype=int)
         
         # Rotation Modes
-        if ant_params['rotation'] is not None:
-            if isinstance(ant_params['rotation'], list):
-                ant_params['rotation'] = np.array(ant_params['rotation'])
-            rotation_shape = ant_params['rotation'].shape
+        if rotation is None:
+            rotations = np.full((n_ant, 3), np.nan)
+        else:
+            rotation = np.array(rotation)
+            rotation_shape = rotation.shape
             rotation_shape_len = len(rotation_shape)
 
             if rotation_shape_len == 1 and rotation_shape[0] == 3:
                 # If rotation is a single 3D vector, replicate it for each antenna
-                antennas = [Antenna(**ant_params)] * n_ant
+                antenna.rotation = rotation
+                rotations = None
             elif rotation_shape_len == 2 and rotation_shape[0] == 3 and rotation_shape[1] == 2:
                 # If rotation is a 3 x 2 matrix, generate random rotations within the given ranges
-                rotations = np.random.uniform(ant_params['rotation'][:, 0],
-                                              ant_params['rotation'][:, 1],
-                                              (n_ant, 3))
-                ant_params['rotation'] = None
-                antenna = Antenna(**ant_params)
-                antennas = []
-                for i in range(n_ant):
-                    ant_i = copy.copy(antenna)
-                    ant_i.rotation = rotations[i]
-                    antennas.append(ant_i)
-                    
-            elif rotation_shape[0] == n_ant:
-                # If rotation is already defined for each antenna, ensure it's in array form
-                rotations = ant_params['rotation']
-                ant_params['rotation'] = None
-                antenna = Antenna(**ant_params)
-                antennas = []
-                for i in range(n_ant):
-                    ant_i = copy.copy(antenna)
-                    ant_i.rotation = rotations[i]
-                    antennas.append(ant_i)
+                rotations = rng.uniform(rotation[:, 0], rotation[:, 1], (n_ant, 3))
+            elif rotation_shape_len == 2 and rotation_shape[0] == n_ant and rotation_shape[1] == 3:
+                # If rotation is already defined for each antenna
+                rotations = rotation
             else:
                 # Raise a TypeError if the rotation parameters are not in a supported format
                 raise TypeError('The UE antenna rotation must either be a 3D vector for constant values or 3 x 2 matrix for random values')
-
+        
+        return AntennaSet([antenna], device_antenna, rotations=rotations)
         
     elif isinstance(ant_params, list):
         # If antenna parameters are given as a list, create an antenna for each set of parameters
@@ -70,16 +63,46 @@ def create_antennas(ant_params, n_ant):
         antennas = [Antenna(**ant_params[i]) for i in range(num_ant_params)]
         # If only one set of antenna parameters is provided, replicate it for each active BS
         if num_ant_params == 1 and n_ant > 1:
-            ant = antennas * n_ant
+            return AntennaSet(antennas, np.zeros(n_ant, dtype=int))
         else:
             assert num_ant_params == n_ant, '# of BS antenna parameters is not equivalent to # of active BSs.'
+            return AntennaSet(antennas)
     else:
         # Raise a TypeError if the antenna parameters are not in a supported format
         raise TypeError('Antenna type must be a dictionary or list of dictionaries')
+
+
+def create_steering_cache(cache_params, antennas):
+    """
+    Create a steering vector cache shared by the given antennas.
+
+    Parameters:
+    ----------
+    cache_params : bool or dict
+        True for the default cache, or a dictionary with the optional 'size' (maximum number of
+        cached vectors) and 'resolution' (angle quantization step in degrees) entries.
+        The cache is disabled if None or False.
+    antennas : list of Antenna or AntennaSet
+        Antennas using the cache.
+
+    Returns:
+    -------
+    cache : SteeringVectorCache or None
+        The created cache.
+    """
+    if not cache_params:
+        return None
+    if cache_params is True:
+        cache_params = {}
     
-    
-    # Return the list of created antennas
-    return antennas
+    cache = SteeringVectorCache(max_size=cache_params.get('size', 100000),
+                                resolution=cache_params.get('resolution'))
+    for antenna in antennas:
+        if isinstance(antenna, AntennaSet):
+            antenna.set_cache(cache)
+        else:
+            antenna.cache = cache
+    return cache
 
 
 # Generate the set of users to be activated
@@ -10,6 +10,8 @@ Date: 12/10/2021
 
 import time
 import numpy as np
+import scipy.fft
+import scipy.sparse
 
 from . import consts as c
 
@@ -87,6 +89,271 @@ def OFDM_subcarrier_frequency(bandwidth, sampled_subcarriers, total_subcarriers)
 
     return frequencies
 
+def precision_dtypes(precision):
+    """
+    Floating point types of the channel generation for a precision setting.
+
+    Parameters:
+    ----------
+    precision : str
+        'double' or 'single'.
+
+    Returns:
+    -------
+    tuple of numpy.dtype
+        The real and complex types of the precision.
+    """
+    if precision == 'double':
+        return np.dtype(np.float64), np.dtype(np.complex128)
+    elif precision == 'single':
+        return np.dtype(np.float32), np.dtype(np.complex64)
+    raise ValueError("The precision must be 'double' or 'single'.")
+
+# Relative costs of a complex exponential and of an FFT butterfly per point to a (BLAS) complex
+# multiply-add in the subcarrier strategy cost model
+EXP_COST = 90
+FFT_COST = 6
+
+def nufft_spread_width(precision):
+    # Half-width of the Gaussian spreading kernel for ~1e-12 (double) and ~1e-6 (single) accuracy
+    return 12 if precision == 'double' else 6
+
+def select_subcarrier_strategy(strategy, num_paths, subcarriers, num_elements, threshold=1., precision='double'):
+    """
+    Select the method computing the channel frequency responses over the subcarriers.
+
+    The cost of the direct method, with the (paths x subcarriers) exponentials and their product with the
+    responses of the elements, is compared to the cost of the delay-domain synthesis of
+    delay_domain_synthesis. The FFT method is selected if the direct method is more than threshold
+    times as expensive.
+
+    Parameters:
+    ----------
+    strategy : str
+        'auto', 'direct' or 'fft'. Only 'auto' is resolved with the cost model.
+    num_paths : int
+        Number of paths (per link).
+    subcarriers : numpy.ndarray
+        Indices of the selected subcarriers.
+    num_elements : int
+        Number of responses combined with the path constants, e.g., the number of antenna element pairs.
+    threshold : float, optional
+        Cost ratio above which the FFT method is selected.
+    precision : str, optional
+        'double' or 'single' precision of the synthesis.
+
+    Returns:
+    -------
+    str
+        'direct' or 'fft'.
+    """
+    if strategy not in ['auto', 'direct', 'fft']:
+        raise ValueError("The subcarrier strategy must be 'auto', 'direct' or 'fft'.")
+    if strategy != 'auto':
+        return strategy
+    
+    num_selected = len(subcarriers)
+    if num_paths == 0 or num_selected == 0:
+        return 'direct'
+    grid_size = 2 * (int(np.max(subcarriers)) - int(np.min(subcarriers)) + 2)
+    width = 2 * nufft_spread_width(precision)
+    
+    direct_cost = num_paths * num_selected * (num_elements + EXP_COST)
+    fft_cost = num_elements * (width * num_paths + FFT_COST * grid_size * np.log2(grid_size) + num_selected) + width * num_paths * EXP_COST
+    return 'fft' if direct_cost > threshold * fft_cost else 'direct'
+
+def delay_domain_synthesis(weights, tau, subcarriers, subcarrier_bw, precision='double'):
+    """
+    Compute the frequency responses sum_p weights[..., p] exp(-j 2 pi tau_p k subcarrier_bw) at the subcarriers k.
+
+    The sum is computed as a type-1 non-uniform FFT: The weighted paths are spread onto an oversampled
+    delay grid with a Gaussian kernel (as a sparse spreading matrix), transformed with an FFT, and the
+    kernel is deconvolved at the selected subcarriers.
+
+    Parameters:
+    ----------
+    weights : numpy.ndarray
+        Complex weights of the paths of shape (N_links, N, P), e.g., the array responses multiplied by the path gains.
+    tau : numpy.ndarray
+        Delays of the paths of shape (N_links, P) in seconds.
+    subcarriers : numpy.ndarray
+        Indices of the selected subcarriers.
+    subcarrier_bw : float
+        Subcarrier spacing in Hz.
+    precision : str, optional
+        'double' or 'single'. Sets the accuracy (kernel width) and the floating point types.
+
+    Returns:
+    -------
+    numpy.ndarray
+        Frequency responses of shape (N_links, N, N_subcarriers).
+    """
+    real_dtype, complex_dtype = precision_dtypes(precision)
+    N_links, N, P = weights.shape
+    subcarriers = np.asarray(subcarriers, dtype=int)
+    
+    # Modes relative to the center of the selected band
+    k_min, k_max = int(subcarriers.min()), int(subcarriers.max())
+    k_center = (k_min + k_max + 1) // 2
+    M_s = 2 * (max(k_center - k_min, k_max - k_center) + 1)
+    M_r = scipy.fft.next_fast_len(2 * M_s)
+    R = M_r / M_s
+    spread = nufft_spread_width(precision)
+    gauss_tau = np.pi * spread / (M_s**2 * R * (R - 0.5))
+    
+    # Path positions on the periodic [0, 2 pi) delay grid
+    x = np.mod(2 * np.pi * subcarrier_bw * np.asarray(tau, dtype=float), 2 * np.pi)
+    weights = weights * np.exp(-1j * k_center * x).astype(complex_dtype)[:, None, :]
+    
+    # Sparse (N_links*M_r, N_links*P) Gaussian spreading matrix
+    offsets = np.arange(-spread + 1, spread + 1)
+    m = np.floor(x * M_r / (2 * np.pi)).astype(int)[..., None] + offsets
+    kernel = np.exp(-(2 * np.pi * m / M_r - x[..., None])**2 / (4 * gauss_tau)).astype(real_dtype)
+    rows = np.arange(N_links)[:, None, None] * M_r + np.mod(m, M_r)
+    cols = np.broadcast_to(np.arange(N_links * P).reshape((N_links, P, 1)), m.shape)
+    spreading = scipy.sparse.csr_matrix((kernel.ravel(), (rows.ravel(), cols.ravel())), shape=(N_links * M_r, N_links * P))
+    
+    grid = spreading @ weights.transpose(0, 2, 1).reshape((N_links * P, N))
+    spectrum = scipy.fft.fft(grid.reshape((N_links, M_r, N)), axis=1)
+    
+    # Deconvolution at the selected subcarriers
+    k = subcarriers - k_center
+    deconvolution = (np.sqrt(np.pi / gauss_tau) * np.exp(k**2 * gauss_tau) / M_r).astype(real_dtype)
+    responses = spectrum[:, np.mod(k, M_r), :] * deconvolution[None, :, None]
+    return responses.transpose(0, 2, 1).astype(complex_dtype, copy=False)
+
+# Pulse shapes of the receive filter
+RX_FILTERS = [None, 'sinc', 'raised_cosine']
+
+def rx_filter_type(rx_filter):
+    """
+    Resolve a receive filter setting to one of RX_FILTERS.
+    0/False/None deactivate the filter and 1/True select the ideal low-pass (sinc) filter.
+    """
+    if isinstance(rx_filter, str):
+        if rx_filter not in RX_FILTERS:
+            raise ValueError(f"The RX filter must be one of {RX_FILTERS}.")
+        return rx_filter
+    return 'sinc' if rx_filter else None
+
+def pulse_shape(t, rx_filter, rolloff=0.):
+    """
+    Evaluate the pulse of the receive filter.
+
+    Parameters:
+    ----------
+    t : numpy.ndarray
+        Time instants normalized by the sampling period.
+    rx_filter : str
+        'sinc' or 'raised_cosine'.
+    rolloff : float, optional
+        Roll-off factor of the raised cosine pulse in [0, 1].
+
+    Returns:
+    -------
+    numpy.ndarray
+        Pulse values at t.
+    """
+    if rx_filter == 'sinc' or rolloff == 0:
+        return np.sinc(t)
+    if rx_filter != 'raised_cosine':
+        raise ValueError(f"The RX filter must be one of {RX_FILTERS}.")
+    denominator = 1 - (2 * rolloff * t)**2
+    singular = np.abs(denominator) < 1e-8
+    # Limit at t = +-1/(2 rolloff)
+    return np.where(singular, np.pi / 4 * np.sinc(1 / (2 * rolloff)),
+                    np.sinc(t) * np.cos(np.pi * rolloff * t) / np.where(singular, 1., denominator))
+
+def sampled_cir(weights, tau, sampling_period, num_taps, rx_filter=None, rolloff=0., precision='double'):
+    """
+    Compute the sampled channel impulse responses sum_p weights[..., p] g(n Ts - tau_p) at the taps n.
+
+    With the receive filter g, the paths are spread over the taps with the pulse of the filter.
+    Without the filter, each path is assigned to the tap nearest to its delay.
+    The paths beyond the last tap are clipped.
+
+    Parameters:
+    ----------
+    weights : numpy.ndarray
+        Complex weights of the paths of shape (N_links, N, P), e.g., the array responses multiplied by the path gains.
+    tau : numpy.ndarray
+        Delays of the paths of shape (N_links, P) in seconds.
+    sampling_period : float
+        Sampling period Ts of the taps in seconds.
+    num_taps : int
+        Number of taps.
+    rx_filter : None or str, optional
+        None, 'sinc' or 'raised_cosine' (see rx_filter_type).
+    rolloff : float, optional
+        Roll-off factor of the raised cosine filter.
+    precision : str, optional
+        'double' or 'single' precision of the taps.
+
+    Returns:
+    -------
+    numpy.ndarray
+        Channel taps of shape (N_links, N, num_taps).
+    """
+    real_dtype, complex_dtype = precision_dtypes(precision)
+    rx_filter = rx_filter_type(rx_filter)
+
+    # (N_links, P, num_taps) pulse samples of the paths
+    delay = np.asarray(tau, dtype=float)[..., None] / sampling_period
+    taps = np.arange(num_taps)
+    if rx_filter is None:
+        pulses = (np.round(delay) == taps).astype(real_dtype)
+    else:
+        pulses = pulse_shape(taps - delay, rx_filter, rolloff).astype(real_dtype)
+    return np.matmul(weights.astype(complex_dtype, copy=False), pulses.astype(complex_dtype))
+
+# Maximum number of (links x paths x taps) pulse samples evaluated at once by filtered_subcarrier_synthesis
+FILTER_CHUNK_SIZE = 2**22
+
+def filtered_subcarrier_synthesis(weights, tau, subcarriers, num_subcarriers, bandwidth, rx_filter, rolloff=0., precision='double'):
+    """
+    Compute the frequency responses at the subcarriers through the receive filter, as the DFT
+    of the num_subcarriers taps of the sampled channel impulse responses (see sampled_cir).
+
+    The filtered channels are always synthesized from the taps, i.e., the subcarrier strategy does not
+    apply. The links are processed in chunks of at most FILTER_CHUNK_SIZE pulse samples so that the
+    (links x paths x taps) pulses are never built for all the links at once.
+
+    Parameters:
+    ----------
+    weights : numpy.ndarray
+        Complex weights of the paths of shape (N_links, N, P).
+    tau : numpy.ndarray
+        Delays of the paths of shape (N_links, P) in seconds.
+    subcarriers : numpy.ndarray
+        Indices of the selected subcarriers.
+    num_subcarriers : int
+        Total number of subcarriers.
+    bandwidth : float
+        Bandwidth in Hz, i.e., the sampling rate of the taps.
+    rx_filter : str
+        'sinc' or 'raised_cosine'.
+    rolloff : float, optional
+        Roll-off factor of the raised cosine filter.
+    precision : str, optional
+        'double' or 'single'.
+
+    Returns:
+    -------
+    numpy.ndarray
+        Frequency responses of shape (N_links, N, N_subcarriers).
+    """
+    complex_dtype = precision_dtypes(precision)[1]
+    subcarriers = np.asarray(subcarriers, dtype=int)
+    N_links, N, P = weights.shape
+    responses = np.empty((N_links, N, len(subcarriers)), dtype=complex_dtype)
+    
+    chunk = max(1, FILTER_CHUNK_SIZE // max(1, P * num_subcarriers))
+    for start in range(0, N_links, chunk):
+        links = slice(start, start + chunk)
+        taps = sampled_cir(weights[links], tau[links], 1 / bandwidth, num_subcarriers, rx_filter=rx_filter, rolloff=rolloff, precision=precision)
+        responses[links] = scipy.fft.fft(taps, axis=-1)[..., subcarriers]
+    return responses
+
 def format_with_si_prefix(value, unit):
     """
     Print the numerical value with an appropriate SI prefix and specified unit.
@@ -0,0 +1,110 @@
+# tests/test_antenna.py
+import unittest
+import numpy as np
+from deepverse.wireless.Antenna import Antenna, AntennaSet, SteeringVectorCache
+from deepverse.wireless.process_params import create_antennas
+
+
+class TestSteeringVectorCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.antenna = Antenna(shape=[8, 4], rotation=[0, 0, 0], FoV=None, spacing=0.5)
+        self.theta = rng.uniform(0, np.pi, (5, 30))
+        self.phi = rng.uniform(-np.pi, np.pi, (5, 30))
+        # Padded paths repeat the same angles
+        self.theta[:, 20:], self.phi[:, 20:] = 0, 0
+        self.reference = self.antenna.array_response_vector(self.theta, self.phi)
+    
+    def test_exact_mode(self):
+        self.antenna.cache = SteeringVectorCache()
+        np.testing.assert_array_equal(self.antenna.array_response_vector(self.theta, self.phi), self.reference)
+        # 100 distinct angles and the padded angle are computed once
+        self.assertEqual(self.antenna.cache.stats()['misses'], 101)
+        np.testing.assert_array_equal(self.antenna.array_response_vector(self.theta, self.phi), self.reference)
+        stats = self.antenna.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (199, 101))
+        self.assertAlmostEqual(stats['hit_rate'], 199/300)
+    
+    def test_lru_eviction(self):
+        self.antenna.cache = SteeringVectorCache(max_size=25)
+        for k in [0, 1]:
+            self.antenna.array_response_vector(self.theta[k, :20], self.phi[k, :20])
+        stats = self.antenna.cache.stats()
+        self.assertEqual((stats['size'], stats['evictions']), (25, 15))
+        # The vectors of the most recent batch are kept
+        self.antenna.array_response_vector(self.theta[1, :20], self.phi[1, :20])
+        self.assertEqual(self.antenna.cache.stats()['hits'] - stats['hits'], 20)
+        self.antenna.array_response_vector(self.theta[0, :20], self.phi[0, :20])
+        self.assertEqual(self.antenna.cache.stats()['hits'] - stats['hits'], 25)
+    
+    def test_quantized_angles(self):
+        self.antenna.cache = SteeringVectorCache(resolution=0.01)
+        array_response = self.antenna.array_response_vector(self.theta, self.phi)
+        self.assertEqual(array_response.shape, (32, 5, 30))
+        np.testing.assert_allclose(array_response, self.reference, atol=1e-2)
+    
+    def test_shared_between_geometries(self):
+        cache = SteeringVectorCache()
+        other = Antenna(shape=[4, 1], rotation=[0, 0, 0], FoV=None, spacing=0.5)
+        self.antenna.cache = other.cache = cache
+        self.antenna.array_response_vector(self.theta, self.phi)
+        np.testing.assert_array_equal(other.array_response_vector(self.theta, self.phi),
+                                      Antenna(shape=[4, 1], rotation=[0, 0, 0], FoV=None, spacing=0.5).array_response_vector(self.theta, self.phi))
+        self.assertEqual(len(cache), 202)
+
+
+
+class TestSeparableAntenna(unittest.TestCase):
+    def test_matches_dense_array_response(self):
+        rng = np.random.default_rng(1)
+        theta, phi = rng.uniform(0, np.pi, (3, 7)), rng.uniform(-np.pi, np.pi, (3, 7))
+        dense = Antenna(shape=[32, 8], rotation=[0, 0, 0], FoV=None, spacing=0.5)
+        separable = Antenna(shape=[32, 8], rotation=[0, 0, 0], FoV=None, spacing=0.5, separable=True)
+        e_y, e_z = separable.array_response_factors(theta, phi)
+        self.assertEqual((e_y.shape, e_z.shape), ((32, 3, 7), (8, 3, 7)))
+        for dtype, tol in [(np.complex128, 1e-12), (np.complex64, 1e-4)]:
+            array_response = separable.array_response_vector(theta, phi, dtype=dtype)
+            self.assertEqual(array_response.dtype, dtype)
+            np.testing.assert_allclose(array_response, dense.array_response_vector(theta, phi), atol=tol)
+
+
+class TestAntennaSet(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.theta = rng.uniform(0, np.pi, 40)
+        self.phi = rng.uniform(-np.pi, np.pi, 40)
+        self.device = rng.integers(0, 3, 40)
+        self.antennas = AntennaSet([Antenna(shape=[4, 1], rotation=None, FoV=None, spacing=0.5)], np.zeros(3, dtype=int),
+                                   rotations=[[10, 20, 30], [np.nan]*3, [-5, 0, 90]], FoVs=[[180, 120], [360, 180], [np.nan]*2])
+    
+    def test_matches_per_device_antennas(self):
+        theta, phi = self.antennas.apply_rotation(self.theta, self.phi, self.device)
+        in_FoV = self.antennas.is_in_FoV(theta, phi, self.device)
+        for k in range(3):
+            antenna, paths = self.antennas[k], self.device == k
+            expected_theta, expected_phi = self.theta[paths], self.phi[paths]
+            if antenna.rotation is not None:
+                expected_theta, expected_phi = antenna.apply_rotation(expected_theta, expected_phi)
+            np.testing.assert_array_equal(theta[paths], expected_theta)
+            np.testing.assert_array_equal(phi[paths], expected_phi)
+            expected_in_FoV = True if antenna.FoV is None else antenna.is_in_FoV(expected_theta, expected_phi)
+            np.testing.assert_array_equal(in_FoV[paths], expected_in_FoV)
+        self.assertIs(self.antennas[2], self.antennas[2])
+        self.assertEqual(len(self.antennas[1:]), 2)
+    
+    def test_create_antennas(self):
+        params = {'shape': [2, 1], 'rotation': [[0, 10], [0, 0], [-90, 90]], 'spacing': 0.5, 'FoV': None}
+        antennas = create_antennas(params, 5, rng=np.random.default_rng(7))
+        self.assertEqual(antennas.rotations.shape, (5, 3))
+        self.assertTrue(np.all((antennas.rotations[:, 2] >= -90) & (antennas.rotations[:, 2] <= 90)))
+        np.testing.assert_array_equal(create_antennas(params, 5, rng=np.random.default_rng(7)).rotations, antennas.rotations)
+        self.assertEqual(len(params['rotation']), 3)
+        
+        self.assertIsNone(create_antennas(dict(params, rotation=None), 2)[1].rotation)
+        antennas = create_antennas([{'shape': [4, 2], 'rotation': [0, 0, 0], 'spacing': 0.5, 'FoV': None}], 3)
+        self.assertEqual(len(antennas), 3)
+        np.testing.assert_array_equal(antennas.shapes, [[4, 2]] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
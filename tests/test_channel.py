@@ -0,0 +1,231 @@
+# tests/test_channel.py
+import unittest
+import numpy as np
+from deepverse.wireless.Antenna import Antenna
+from deepverse.wireless.Paths import Paths
+from deepverse.wireless.Channel import OFDMChannel, OFDMChannelBatch, TDChannel, TDChannelBatch, RadarChannel, RadarChannelBatch
+from deepverse.wireless.Waveform import FMCW
+from deepverse.wireless.Codebook import DFTCodebook
+from unittest import mock
+from deepverse.wireless import utils
+from deepverse.wireless.utils import select_subcarrier_strategy, pulse_shape, filtered_subcarrier_synthesis
+
+
+def random_path_dict(rng, num_paths):
+    return {'power': rng.uniform(1e-12, 1e-9, num_paths),
+            'phase': rng.uniform(-180, 180, num_paths),
+            'ToA': rng.uniform(1e-7, 8e-7, num_paths),
+            'DoD_theta': rng.uniform(30, 150, num_paths),
+            'DoD_phi': rng.uniform(-180, 180, num_paths),
+            'DoA_theta': rng.uniform(30, 150, num_paths),
+            'DoA_phi': rng.uniform(-180, 180, num_paths),
+            'Doppler_vel': rng.uniform(-20, 20, num_paths),
+            'Doppler_acc': rng.uniform(-2, 2, num_paths)}
+
+
+class TestOFDMChannelBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.tx_antenna = Antenna(shape=[4, 2], rotation=[0, 10, -90], FoV=None, spacing=0.5)
+        self.rx_antenna = Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        self.paths = [Paths(random_path_dict(rng, n), 28e9).apply_antenna_parameters(self.tx_antenna, self.rx_antenna)
+                      for n in [5, 0, 12, 1]]
+        self.ofdm = dict(carrier_freq=28e9, bandwidth=50e6, num_subcarriers=64,
+                         select_subcarriers=np.arange(0, 64, 4), rx_filter=None, params={}, doppler_shift=True)
+
+    def test_matches_per_link_generation(self):
+        batch = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, **self.ofdm)
+        coeffs = batch.generate()
+        self.assertEqual(coeffs.shape, (4, 2, 8, 16))
+        for j, paths in enumerate(self.paths):
+            channel = OFDMChannel(self.tx_antenna, self.rx_antenna, paths, **self.ofdm)
+            channel.generate()
+            if paths.num_paths() == 0:
+                self.assertIsNone(batch[j].coeffs)
+                np.testing.assert_array_equal(coeffs[j], 0)
+            else:
+                np.testing.assert_allclose(batch[j].coeffs, channel.coeffs, rtol=1e-10, atol=1e-20)
+
+    def test_separable_antennas(self):
+        tx_antenna = Antenna(shape=[4, 2], rotation=[0, 10, -90], FoV=None, spacing=0.5, separable=True)
+        rx_antenna = Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5, separable=True)
+        coeffs = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, **self.ofdm).generate()
+        separable = OFDMChannelBatch(tx_antenna, rx_antenna, self.paths, **self.ofdm).generate()
+        np.testing.assert_allclose(separable, coeffs, rtol=1e-10, atol=1e-12*np.abs(coeffs).max())
+
+    def test_beamspace_matches_projected_channels(self):
+        batch = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, **self.ofdm)
+        coeffs = batch.generate()
+        tx_codebook, rx_codebook = DFTCodebook([4, 2], oversampling=[2, 2]), DFTCodebook([2, 1], oversampling=[4, 1])
+        W_tx, W_rx = tx_codebook.vectors, rx_codebook.vectors
+        expected = np.einsum('rb,lrts,tc->lbcs', W_rx.conj(), coeffs, W_tx)
+        
+        beamspace = batch.generate_beamspace(tx_codebook, rx_codebook)
+        self.assertEqual(beamspace.shape, (4, 8, 32, 16))
+        np.testing.assert_allclose(beamspace, expected, rtol=1e-10, atol=1e-12*np.abs(expected).max())
+        power = batch.generate_beamspace(tx_codebook, rx_codebook, power=True)
+        np.testing.assert_allclose(power, np.mean(np.abs(expected)**2, axis=-1), rtol=1e-10, atol=1e-20)
+
+
+class TestSubcarrierStrategy(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.tx_antenna = Antenna(shape=[2, 2], rotation=[0, 0, -90], FoV=None, spacing=0.5)
+        self.rx_antenna = Antenna(shape=[1, 1], rotation=[0, 0, -90], FoV=None, spacing=0.5)
+        self.paths = [Paths(random_path_dict(rng, n), 28e9).apply_antenna_parameters(self.tx_antenna, self.rx_antenna)
+                      for n in [25, 3, 0]]
+        self.ofdm = dict(carrier_freq=28e9, bandwidth=100e6, num_subcarriers=2048,
+                         select_subcarriers=np.arange(10, 2000), rx_filter=None, params={}, doppler_shift=True)
+    
+    def reference(self, paths):
+        # Per-path sum of the channel definition
+        f = self.ofdm['bandwidth'] / self.ofdm['num_subcarriers'] * self.ofdm['select_subcarriers']
+        a, tau = paths.cir(doppler_shift=True)
+        a_rx = self.rx_antenna.array_response_vector(paths.DoA_theta, paths.DoA_phi)
+        a_tx = self.tx_antenna.array_response_vector(paths.DoD_theta, paths.DoD_phi)
+        return sum(a[p] * np.multiply.outer(np.outer(a_rx[:, p], a_tx[:, p]), np.exp(-1j * 2 * np.pi * tau[p] * f))
+                   for p in range(len(a))) / np.sqrt(self.ofdm['num_subcarriers'])
+    
+    def test_strategies_match_reference(self):
+        for strategy, precision, tol in [('direct', 'double', 1e-10), ('fft', 'double', 1e-10), ('fft', 'single', 1e-4)]:
+            batch = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, precision=precision, strategy=strategy, **self.ofdm)
+            coeffs = batch.generate()
+            for j in range(2):
+                expected = self.reference(self.paths[j])
+                np.testing.assert_allclose(coeffs[j], expected, atol=tol*np.abs(expected).max())
+                channel = OFDMChannel(self.tx_antenna, self.rx_antenna, self.paths[j], precision=precision, strategy=strategy, **self.ofdm)
+                channel.generate()
+                np.testing.assert_allclose(channel.coeffs, expected, atol=tol*np.abs(expected).max())
+            np.testing.assert_array_equal(coeffs[2], 0)
+    
+    def test_auto_selection(self):
+        # Few element pairs over a wide band favour the FFT method
+        self.assertEqual(select_subcarrier_strategy('auto', 25, np.arange(4096), 1), 'fft')
+        self.assertEqual(select_subcarrier_strategy('auto', 25, np.arange(0, 64, 4), 64), 'direct')
+        self.assertEqual(select_subcarrier_strategy('auto', 25, np.arange(4096), 1, threshold=100), 'direct')
+        self.assertEqual(select_subcarrier_strategy('direct', 25, np.arange(4096), 1), 'direct')
+
+
+class TestTDChannel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.tx_antenna = Antenna(shape=[4, 1], rotation=[0, 0, -90], FoV=None, spacing=0.5)
+        self.rx_antenna = Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=None, spacing=0.5)
+        self.path_dicts = [random_path_dict(rng, n) for n in [6, 0, 9]]
+        # Delays on the sampling grid of the 50 MHz bandwidth
+        for path_dict in self.path_dicts:
+            path_dict['ToA'] = rng.integers(0, 40, len(path_dict['ToA'])) / 50e6
+        self.paths = [Paths(path_dict, 28e9).apply_antenna_parameters(self.tx_antenna, self.rx_antenna)
+                      for path_dict in self.path_dicts]
+        self.ofdm = dict(carrier_freq=28e9, bandwidth=50e6, num_subcarriers=64,
+                         select_subcarriers=np.arange(0, 64, 4), params={}, doppler_shift=True)
+        self.td = dict(carrier_freq=28e9, bandwidth=50e6, num_taps=64, params={}, doppler_shift=True)
+    
+    def test_matches_per_link_generation(self):
+        batch = TDChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, rx_filter='raised_cosine', 
+                               sampling_rate=80e6, rolloff=0.3, **self.td)
+        coeffs = batch.generate()
+        self.assertEqual(coeffs.shape, (3, 2, 4, 64))
+        np.testing.assert_array_equal(coeffs[1], 0)
+        for j in [0, 2]:
+            channel = TDChannel(self.tx_antenna, self.rx_antenna, self.paths[j], rx_filter='raised_cosine', 
+                                sampling_rate=80e6, rolloff=0.3, **self.td)
+            np.testing.assert_allclose(batch[j].coeffs, channel.generate(), rtol=1e-10, atol=1e-20)
+    
+    def test_on_grid_taps_match_ofdm(self):
+        # Nyquist pulses sample the on-grid paths into single taps, whose DFT is the OFDM channel
+        ofdm = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, rx_filter=None, **self.ofdm).generate()
+        for rx_filter, rolloff in [(None, 0.), ('sinc', 0.), ('raised_cosine', 0.5)]:
+            taps = TDChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, rx_filter=rx_filter, rolloff=rolloff, **self.td).generate()
+            spectrum = np.fft.fft(taps, axis=-1)[..., self.ofdm['select_subcarriers']] / np.sqrt(64)
+            np.testing.assert_allclose(spectrum, ofdm, rtol=1e-8, atol=1e-10*np.abs(ofdm).max())
+            
+            filtered = OFDMChannelBatch(self.tx_antenna, self.rx_antenna, self.paths, rx_filter=rx_filter, rolloff=rolloff, **self.ofdm).generate()
+            np.testing.assert_allclose(filtered, ofdm, rtol=1e-8, atol=1e-10*np.abs(ofdm).max())
+    
+    def test_filtered_synthesis_chunks(self):
+        rng = np.random.default_rng(1)
+        weights = rng.standard_normal((5, 3, 7)) + 1j * rng.standard_normal((5, 3, 7))
+        tau = rng.uniform(1e-7, 8e-7, (5, 7))
+        subcarriers = np.arange(0, 64, 4)
+        full = filtered_subcarrier_synthesis(weights, tau, subcarriers, 64, 50e6, 'raised_cosine', rolloff=0.3)
+        # Two links of 7 paths x 64 taps per chunk
+        with mock.patch.object(utils, 'FILTER_CHUNK_SIZE', 2 * 7 * 64):
+            chunked = filtered_subcarrier_synthesis(weights, tau, subcarriers, 64, 50e6, 'raised_cosine', rolloff=0.3)
+        self.assertEqual(chunked.shape, (5, 3, 16))
+        np.testing.assert_allclose(chunked, full, rtol=1e-12, atol=1e-12)
+    
+    def test_pulse_shapes(self):
+        t = np.linspace(-8, 8, 1601)
+        np.testing.assert_allclose(pulse_shape(t, 'raised_cosine', 0.), np.sinc(t))
+        pulse = pulse_shape(t, 'raised_cosine', 0.5)
+        self.assertTrue(np.all(np.isfinite(pulse)))
+        # Continuity at the removable singularity t = 1/(2 rolloff)
+        self.assertAlmostEqual(pulse[900], pulse_shape(np.array([1.001]), 'raised_cosine', 0.5)[0], places=2)
+
+
+class TestRadarChannelBatch(unittest.TestCase):
+    def test_matches_per_link_generation(self):
+        rng = np.random.default_rng(1)
+        tx_antenna = Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        rx_antenna = Antenna(shape=[4, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        waveform = FMCW(n_chirps=16, n_samples_per_chirp=32, chirp_slope=15e12, Fs=4e6, f_0=28e9, T_period=1e-5)
+        # Enough paths to split the synthesis into multiple chirp blocks
+        paths = []
+        for n in [60, 0, 3]:
+            path_dict = random_path_dict(rng, n)
+            path_dict['ToA'] = rng.uniform(1e-7, 1.2e-5, n)
+            paths.append(Paths(path_dict, 28e9).apply_antenna_parameters(tx_antenna, rx_antenna))
+        
+        batch = RadarChannelBatch([tx_antenna]*3, [rx_antenna]*3, paths, carrier_freq=28e9, waveform=waveform, params={})
+        coeffs = batch.generate()
+        self.assertEqual(coeffs.shape, (3, 4, 2, 32, 16))
+        for j in range(3):
+            channel = RadarChannel(tx_antenna, rx_antenna, paths[j], carrier_freq=28e9, waveform=waveform, params={})
+            channel.generate()
+            np.testing.assert_allclose(batch[j].coeffs, channel.coeffs, rtol=1e-9, atol=1e-9*np.abs(coeffs).max())
+
+    
+    def test_memory_ceiling(self):
+        rng = np.random.default_rng(2)
+        antenna = Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        waveform = FMCW(n_chirps=8, n_samples_per_chirp=16, chirp_slope=15e12, Fs=4e6, f_0=28e9, T_period=1e-5)
+        path_dict = random_path_dict(rng, 5)
+        path_dict['ToA'] = rng.uniform(1e-7, 1.2e-5, 5)
+        paths = Paths(path_dict, 28e9).apply_antenna_parameters(antenna, antenna)
+        
+        # A ceiling below the size of a single chirp synthesizes one chirp per block
+        chunked = RadarChannel(antenna, antenna, paths, carrier_freq=28e9, waveform=waveform, params={}, max_memory=1)
+        chunked.generate()
+        channel = RadarChannel(antenna, antenna, paths, carrier_freq=28e9, waveform=waveform, params={})
+        channel.generate()
+        np.testing.assert_allclose(chunked.coeffs, channel.coeffs, rtol=1e-12, atol=1e-12*np.abs(channel.coeffs).max())
+
+
+
+class TestSinglePrecision(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.antenna = Antenna(shape=[4, 2], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        self.paths = [Paths(random_path_dict(rng, n), 28e9).apply_antenna_parameters(self.antenna, self.antenna)
+                      for n in [7, 2]]
+    
+    def test_ofdm_channels(self):
+        ofdm = dict(carrier_freq=28e9, bandwidth=50e6, num_subcarriers=64, select_subcarriers=np.arange(64),
+                    rx_filter=None, params={}, doppler_shift=True)
+        single = OFDMChannelBatch(self.antenna, self.antenna, self.paths, precision='single', **ofdm).generate()
+        double = OFDMChannelBatch(self.antenna, self.antenna, self.paths, **ofdm).generate()
+        self.assertEqual(single.dtype, np.complex64)
+        np.testing.assert_allclose(single, double, atol=1e-4*np.abs(double).max())
+    
+    def test_radar_channels(self):
+        waveform = FMCW(n_chirps=8, n_samples_per_chirp=16, chirp_slope=15e12, Fs=4e6, f_0=28e9)
+        radar = dict(carrier_freq=28e9, waveform=waveform, params={})
+        single = RadarChannelBatch([self.antenna]*2, [self.antenna]*2, self.paths, precision='single', **radar).generate()
+        double = RadarChannelBatch([self.antenna]*2, [self.antenna]*2, self.paths, **radar).generate()
+        self.assertEqual(single.dtype, np.complex64)
+        np.testing.assert_allclose(single, double, atol=1e-4*np.abs(double).max())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# tests/test_dataset.py
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from deepverse.datasets.dataset import Dataset
+from test_wireless_datasets import comm_params, create_scenario, radar_params
+
+
+class TestLazyDataset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        create_scenario(cls.folder)
+        os.makedirs(os.path.join(cls.folder, 'synthetic', 'param'))
+        with open(os.path.join(cls.folder, 'synthetic', 'param', 'scenario.yaml'), 'w') as file:
+            file.write('modalities: []\n')
+        comm = comm_params(cls.folder, enable=True)
+        radar = radar_params(cls.folder, enable=True, scenes=[0, 1, 2])
+        params = {key: comm.pop(key) for key in ['basestations', 'dataset_folder', 'scenario', 'scenes']}
+        for key in params:
+            radar.pop(key)
+        params.update({'camera': False, 'lidar': False, 'position': False, 'comm': comm, 'radar': radar})
+        cls.config = os.path.join(cls.folder, 'config.json')
+        with open(cls.config, 'w') as file:
+            json.dump(params, file)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.folder)
+
+    def test_modalities_generated_on_first_access(self):
+        eager = Dataset(self.config)
+        dataset = Dataset(self.config, lazy=True)
+        self.assertNotIn('comm_dataset', dataset.__dict__)
+        self.assertNotIn('radar_dataset', dataset.__dict__)
+        
+        np.testing.assert_array_equal(dataset.get_sample('comm-ue', 1, ue_idx=3, bs_idx=0).coeffs,
+                                      eager.get_sample('comm-ue', 1, ue_idx=3, bs_idx=0).coeffs)
+        self.assertIn('comm_dataset', dataset.__dict__)
+        self.assertNotIn('radar_dataset', dataset.__dict__)
+        self.assertIs(dataset.get_modality('comm'), dataset.comm_dataset)
+        self.assertFalse(hasattr(dataset, 'mobility_dataset'))
+        with self.assertRaises(KeyError):
+            dataset.get_modality('cam')
+
+    def test_prefetch(self):
+        dataset = Dataset(self.config, lazy=True, prefetch=True)
+        radar = dataset.get_modality('radar')
+        dataset.wait_prefetch()
+        self.assertIs(dataset.get_modality('radar'), radar)
+        self.assertIn('comm_dataset', dataset.__dict__)
+
+    def test_prefetch_error_raised_on_access(self):
+        with mock.patch('deepverse.datasets.dataset.RadarDataset', side_effect=ValueError('radar failed')):
+            dataset = Dataset(self.config, lazy=True, prefetch=True)
+            dataset.wait_prefetch()
+        self.assertIn('comm_dataset', dataset.__dict__)
+        with self.assertRaisesRegex(ValueError, 'radar failed'):
+            dataset.radar_dataset
+        with self.assertRaisesRegex(ValueError, 'radar failed'):
+            dataset.get_modality('radar')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# tests/test_paths.py
+import unittest
+import numpy as np
+from deepverse.wireless.Antenna import Antenna
+from deepverse.wireless.Paths import Paths, PathsBatch, PATH_FIELDS, pad_paths
+
+
+def random_ray_data(rng, num_paths):
+    num_total = int(np.sum(num_paths))
+    path_dict = {'power': rng.uniform(1e-12, 1e-9, num_total),
+                 'phase': rng.uniform(-180, 180, num_total),
+                 'ToA': rng.uniform(1e-7, 8e-7, num_total),
+                 'DoD_theta': rng.uniform(0, 180, num_total),
+                 'DoD_phi': rng.uniform(-180, 180, num_total),
+                 'DoA_theta': rng.uniform(0, 180, num_total),
+                 'DoA_phi': rng.uniform(-180, 180, num_total),
+                 'Doppler_vel': rng.uniform(-20, 20, num_total),
+                 'Doppler_acc': rng.uniform(-2, 2, num_total)}
+    return path_dict, np.concatenate(([0], np.cumsum(num_paths)))
+
+
+class TestPathsBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.path_dict, self.offsets = random_ray_data(rng, [7, 0, 15, 3])
+        self.tx_antenna = Antenna(shape=[4, 1], rotation=[10, 20, -90], FoV=[180, 120], spacing=0.5)
+        self.rx_antennas = [Antenna(shape=[2, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5),
+                            Antenna(shape=[2, 1], rotation=[30, -10, 45], FoV=[240, 150], spacing=0.5)]
+        self.rx_of_link = [self.rx_antennas[k] for k in [0, 1, 1, 0]]
+
+    def per_link_paths(self):
+        return [Paths({key: value[self.offsets[j]:self.offsets[j+1]] for key, value in self.path_dict.items()}, 28e9, 10)
+                .apply_antenna_parameters(self.tx_antenna, self.rx_of_link[j]) for j in range(4)]
+
+    def test_matches_per_link_paths(self):
+        batch = PathsBatch.from_ray_data(self.path_dict, self.offsets, 28e9, 10)
+        batch.apply_antenna_parameters(self.tx_antenna, self.rx_of_link)
+        expected = self.per_link_paths()
+        np.testing.assert_array_equal(batch.num_paths(), [paths.num_paths() for paths in expected])
+        for j, paths in enumerate(expected):
+            for key in PATH_FIELDS:
+                np.testing.assert_array_equal(getattr(batch[j], key), getattr(paths, key))
+            np.testing.assert_array_equal(batch[j].cir(doppler_shift=True)[0], paths.cir(doppler_shift=True)[0])
+        with self.assertRaises(RuntimeError):
+            batch.apply_antenna_parameters(self.tx_antenna, self.rx_of_link)
+
+    def test_padded_and_slices(self):
+        batch = PathsBatch.from_ray_data(self.path_dict, self.offsets, 28e9, 10)
+        batch.apply_antenna_parameters(self.tx_antenna, self.rx_of_link)
+        expected = pad_paths(self.per_link_paths(), doppler_shift=True)
+        padded = pad_paths(batch, doppler_shift=True)
+        for key in expected:
+            np.testing.assert_array_equal(padded[key], expected[key])
+
+        links = batch[1:3]
+        self.assertEqual(len(links), 2)
+        np.testing.assert_array_equal(links[1].ToA, batch[2].ToA)
+        restored = PathsBatch.from_dict(batch.to_dict())
+        np.testing.assert_array_equal(restored[3].DoA_phi, batch[3].DoA_phi)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# tests/test_radar_processing.py
+import unittest
+import numpy as np
+from deepverse.wireless.Antenna import Antenna
+from deepverse.wireless.Paths import Paths
+from deepverse.wireless.Channel import RadarChannel
+from deepverse.wireless.Waveform import FMCW
+from deepverse.wireless.RadarProcessing import RadarProcessor
+
+
+class TestRadarProcessor(unittest.TestCase):
+    def setUp(self):
+        self.waveform = FMCW(n_chirps=32, n_samples_per_chirp=64, chirp_slope=15e12, Fs=4e6, f_0=28e9)
+        antenna = Antenna(shape=[4, 1], rotation=[0, 0, -90], FoV=[360, 180], spacing=0.5)
+        # Single target at 30 m moving at 10 m/s
+        self.distance, self.velocity = 30., 10.
+        path_dict = {'power': np.array([1e-9]), 'phase': np.array([0.]),
+                     'ToA': np.array([2*self.distance/299792458]),
+                     'DoD_theta': np.array([90.]), 'DoD_phi': np.array([0.]),
+                     'DoA_theta': np.array([90.]), 'DoA_phi': np.array([0.]),
+                     'Doppler_vel': np.array([self.velocity]), 'Doppler_acc': np.array([0.])}
+        paths = Paths(path_dict, 28e9).apply_antenna_parameters(antenna, antenna)
+        self.channel = RadarChannel(antenna, antenna, paths, carrier_freq=28e9, waveform=self.waveform, params={})
+        self.channel.generate()
+
+    def test_range_doppler_peak(self):
+        processor = RadarProcessor(window='hann', range_fft=128, doppler_fft=64)
+        rd_map = processor.range_doppler(self.channel.coeffs)
+        self.assertEqual(rd_map.shape, (128, 64))
+        r, v = np.unravel_index(np.argmax(rd_map), rd_map.shape)
+        range_axis, velocity_axis = processor.range_axis(self.waveform), processor.velocity_axis(self.waveform)
+        self.assertLessEqual(abs(range_axis[r] - self.distance), range_axis[1])
+        self.assertLessEqual(abs(velocity_axis[v] - self.velocity), velocity_axis[1] - velocity_axis[0])
+
+    def test_batched_single_precision(self):
+        processor = RadarProcessor(window='hamming', angle_fft=16, dtype='float32')
+        reference = RadarProcessor(window='hamming', angle_fft=16)
+        IF_signal = np.stack([self.channel.coeffs, 2*self.channel.coeffs])
+        maps = processor.process(IF_signal)
+        self.assertEqual(maps['range_angle'].shape, (2, 64, 16))
+        self.assertEqual(maps['range_doppler'].dtype, np.float32)
+        for map_type, X in reference.process(self.channel.coeffs).items():
+            np.testing.assert_allclose(maps[map_type][0], X, rtol=1e-3, atol=1e-4*X.max())
+            np.testing.assert_allclose(maps[map_type][1], 4*X, rtol=1e-3, atol=4e-4*X.max())
+
+
+    def test_planar_range_angle(self):
+        # Target at 30 degrees in azimuth in the horizontal plane of a 4x2 panel, where the columns of the
+        # panel receive the same signals, so that the map is twice the map of a 4-element ULA
+        waveform = FMCW(n_chirps=4, n_samples_per_chirp=64, chirp_slope=15e12, Fs=4e6, f_0=28e9)
+        path_dict = {'power': np.array([1e-9]), 'phase': np.array([0.]), 'ToA': np.array([2*self.distance/299792458]),
+                     'DoD_theta': np.array([90.]), 'DoD_phi': np.array([30.]),
+                     'DoA_theta': np.array([90.]), 'DoA_phi': np.array([30.]),
+                     'Doppler_vel': np.array([0.]), 'Doppler_acc': np.array([0.])}
+        tx_antenna = Antenna(shape=[1, 1], rotation=[0, 0, 0], FoV=[360, 180], spacing=0.5)
+        IF_signals = []
+        for shape in [[4, 2], [4, 1]]:
+            rx_antenna = Antenna(shape=shape, rotation=[0, 0, 0], FoV=[360, 180], spacing=0.5)
+            paths = Paths(path_dict, 28e9).apply_antenna_parameters(tx_antenna, rx_antenna)
+            channel = RadarChannel(tx_antenna, rx_antenna, paths, carrier_freq=28e9, waveform=waveform, params={})
+            channel.generate()
+            IF_signals.append(channel.coeffs)
+        
+        ra_map = RadarProcessor(window='hann', angle_fft=64, rx_shape=[4, 2]).range_angle(np.stack([IF_signals[0]]*2))
+        reference = RadarProcessor(window='hann', angle_fft=64, rx_shape=[4, 1]).range_angle(IF_signals[1])
+        self.assertEqual(ra_map.shape, (2, 64, 64))
+        np.testing.assert_allclose(ra_map[0], 2*reference, rtol=1e-10, atol=1e-12*reference.max())
+        np.testing.assert_allclose(ra_map[1], ra_map[0])
+        with self.assertRaises(ValueError):
+            RadarProcessor(rx_shape=[2, 2]).range_angle(IF_signals[0])
+
+if __name__ == '__main__':
+    unittest.main()
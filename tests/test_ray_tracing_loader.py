@@ -0,0 +1,160 @@
+# tests/test_ray_tracing_loader.py
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.io
+from deepverse.wireless import consts as c
+from deepverse.datasets.wireless_datasets import CommunicationDataset
+from deepverse.wireless.RayTracingLoader import RayTracingLoader, RT_INDEX_FILE, build_ray_tracing_index, slice_path_dict
+from test_wireless_datasets import comm_params, create_scenario
+
+
+class TestRayTracingLoader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        create_scenario(cls.folder, scenes=(0,))
+        cls.scene_folder = os.path.join(cls.folder, 'synthetic', 'wireless', 'scene_0')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.folder)
+
+    def expected_paths(self, bs, ue):
+        file = 'BS%i_UE_0-9.mat' % (bs+1) if ue <= 9 else 'BS%i_UE_10-14.mat' % (bs+1)
+        rx_start = 0 if ue <= 9 else 10
+        file_data = scipy.io.loadmat(os.path.join(self.scene_folder, file))
+        return file_data['channels'][0][ue-rx_start][0][0][0], file_data['rx_locs'][ue-rx_start]
+
+    def test_load_users_across_files(self):
+        loader = RayTracingLoader(self.scene_folder)
+        rx_idx = np.array([12, 3, 0, 14, 9])
+        data, tx_loc = loader.load_data(tx_idx=1, rx_idx=rx_idx)
+        offsets = data[c.OUT_PATH_OFFSETS]
+        self.assertEqual(len(offsets), len(rx_idx) + 1)
+        self.assertEqual(offsets[-1], len(data[c.OUT_PATH][c.OUT_PATH_TOA]))
+        for k, ue in enumerate(rx_idx):
+            path_params, rx_loc = self.expected_paths(1, ue)
+            path_dict = slice_path_dict(data[c.OUT_PATH], offsets, k)
+            np.testing.assert_array_equal(path_dict[c.OUT_PATH_TOA], path_params[1])
+            np.testing.assert_array_equal(path_dict[c.OUT_PATH_DOP_ACC], path_params[9])
+            np.testing.assert_array_equal(data[c.OUT_LOC][k], rx_loc[:3])
+        self.assertEqual(tx_loc.shape, (3,))
+
+    def test_prefetched_files_are_not_read_again(self):
+        expected, expected_tx_loc = RayTracingLoader(self.scene_folder).load_data(tx_idx=0, rx_idx=np.array([3, 12]))
+        loader = RayTracingLoader(self.scene_folder)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            loader.prefetch(executor, [0], user=True)
+        with mock.patch('scipy.io.loadmat', side_effect=AssertionError('Prefetched files are read again')):
+            data, tx_loc = loader.load_data(tx_idx=0, rx_idx=np.array([3, 12]))
+        # The reads are released by their load
+        self.assertEqual(loader.num_prefetched, 0)
+        np.testing.assert_array_equal(data[c.OUT_PATH][c.OUT_PATH_PHASE], expected[c.OUT_PATH][c.OUT_PATH_PHASE])
+        np.testing.assert_array_equal(tx_loc, expected_tx_loc)
+
+    def test_unavailable_users_are_skipped(self):
+        loader = RayTracingLoader(self.scene_folder)
+        data, _ = loader.load_data(tx_idx=0, rx_idx=np.array([2, 100]))
+        self.assertEqual(len(data[c.OUT_PATH_OFFSETS]), 2)
+        self.assertEqual(data[c.OUT_LOC].shape, (1, 3))
+
+
+class TestRayTracingCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        create_scenario(self.folder, scenes=(0,))
+        self.scene_folder = os.path.join(self.folder, 'synthetic', 'wireless', 'scene_0')
+        self.cache_dir = os.path.join(self.folder, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def assert_same_data(self, data, expected):
+        for key in [c.OUT_PATH_OFFSETS, c.OUT_LOC, c.OUT_PL]:
+            np.testing.assert_array_equal(data[key], expected[key])
+        for key, value in expected[c.OUT_PATH].items():
+            np.testing.assert_array_equal(data[c.OUT_PATH][key], value)
+
+    def test_cached_load_matches_direct_load(self):
+        rx_idx = np.array([14, 2, 7])
+        expected, expected_tx_loc = RayTracingLoader(self.scene_folder).load_data(tx_idx=0, rx_idx=rx_idx)
+        RayTracingLoader(self.scene_folder, cache_dir=self.cache_dir).load_data(tx_idx=0, rx_idx=rx_idx)
+        
+        # The second load must be served from the cache without reading the .mat files
+        with mock.patch('scipy.io.loadmat', side_effect=AssertionError('Cache is not used')):
+            loader = RayTracingLoader(self.scene_folder, cache_dir=self.cache_dir)
+            data, tx_loc = loader.load_data(tx_idx=0, rx_idx=rx_idx)
+            other_data, _ = loader.load_data(tx_idx=0, rx_idx=np.array([0, 1]))
+        self.assert_same_data(data, expected)
+        np.testing.assert_array_equal(tx_loc, expected_tx_loc)
+        self.assertEqual(len(other_data[c.OUT_PATH_OFFSETS]), 3)
+
+    def test_cache_is_invalidated_by_source_changes(self):
+        loader = RayTracingLoader(self.scene_folder, cache_dir=self.cache_dir)
+        loader.load_data(tx_idx=0)
+        
+        file = os.path.join(self.scene_folder, 'BS1_UE_10-14.mat')
+        file_data = scipy.io.loadmat(file)
+        file_data['rx_locs'] = file_data['rx_locs'] + 1.
+        scipy.io.savemat(file, {key: file_data[key] for key in ['channels', 'rx_locs', 'tx_loc']})
+        os.utime(file, ns=(0, 0))
+        
+        expected, _ = RayTracingLoader(self.scene_folder).load_data(tx_idx=0)
+        data, _ = RayTracingLoader(self.scene_folder, cache_dir=self.cache_dir).load_data(tx_idx=0)
+        self.assert_same_data(data, expected)
+
+
+class TestRayTracingIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        create_scenario(self.folder, scenes=(0, 1, 2))
+        self.wireless_folder = os.path.join(self.folder, 'synthetic', 'wireless')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_index_matches_scene_folders(self):
+        index = build_ray_tracing_index(self.wireless_folder)
+        self.assertEqual(list(index['scenes']), ['scene_0', 'scene_1', 'scene_2'])
+        self.assertTrue(os.path.exists(os.path.join(self.wireless_folder, RT_INDEX_FILE)))
+        
+        scene_folder = os.path.join(self.wireless_folder, 'scene_1')
+        expected = RayTracingLoader(scene_folder)
+        with mock.patch('glob.glob', side_effect=AssertionError('Index is not used')):
+            loader = RayTracingLoader(scene_folder, files=index['scenes']['scene_1'])
+            data, tx_loc = loader.load_data(tx_idx=1, rx_idx=np.array([4, 11]))
+        self.assertEqual((loader.num_ue, loader.num_bs), (expected.num_ue, expected.num_bs))
+        self.assertEqual((index['scenes']['scene_1']['num_ue'], index['scenes']['scene_1']['num_bs']), (14, 2))
+        expected_data, expected_tx_loc = expected.load_data(tx_idx=1, rx_idx=np.array([4, 11]))
+        np.testing.assert_array_equal(data[c.OUT_PATH][c.OUT_PATH_TOA], expected_data[c.OUT_PATH][c.OUT_PATH_TOA])
+        np.testing.assert_array_equal(tx_loc, expected_tx_loc)
+
+    def test_dataset_builds_and_uses_index(self):
+        expected = CommunicationDataset(comm_params(self.folder))
+        dataset = CommunicationDataset(comm_params(self.folder, raytracing_index=True))
+        self.assertTrue(os.path.exists(os.path.join(self.wireless_folder, RT_INDEX_FILE)))
+        with mock.patch('glob.glob', side_effect=AssertionError('Index is not used')):
+            streamed = CommunicationDataset(comm_params(self.folder, raytracing_index=True), generate=False)
+            scenes = [scene for _, scene in streamed.iter_scenes()]
+        for t in range(3):
+            for bs in range(2):
+                np.testing.assert_array_equal(dataset.data[t][bs]['ue'].coeffs, expected.data[t][bs]['ue'].coeffs)
+                np.testing.assert_array_equal(scenes[t][bs]['ue'].coeffs, expected.data[t][bs]['ue'].coeffs)
+
+    def test_index_is_built_once_before_the_workers(self):
+        index_file = os.path.join(self.folder, 'index', 'rt_index.json')
+        os.makedirs(os.path.dirname(index_file))
+        with mock.patch('deepverse.datasets.wireless_datasets.build_ray_tracing_index', wraps=build_ray_tracing_index) as build:
+            dataset = CommunicationDataset(comm_params(self.folder, raytracing_index=index_file, num_workers=2))
+        build.assert_called_once()
+        self.assertEqual(os.listdir(os.path.dirname(index_file)), ['rt_index.json'])
+        self.assertEqual(len(dataset.data), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,468 @@
+# tests/test_wireless_datasets.py
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+import scipy.io
+from deepverse.datasets.wireless_datasets import BeamSweepDataset, CommunicationDataset, RadarDataset
+from deepverse.wireless.Channel import OFDMChannel, RadarChannel
+from deepverse.wireless.Paths import PathsBatch
+from deepverse.wireless.RayTracingLoader import RayTracingLoader
+
+
+def random_ray_data(rng, num_paths):
+    # phase, ToA, power, DoA_phi, DoA_theta, DoD_phi, DoD_theta, LoS, Doppler_vel, Doppler_acc
+    return np.array([rng.uniform(-180, 180, num_paths), rng.uniform(1e-7, 8e-7, num_paths),
+                     rng.uniform(-120, -70, num_paths), rng.uniform(-180, 180, num_paths),
+                     rng.uniform(30, 150, num_paths), rng.uniform(-180, 180, num_paths),
+                     rng.uniform(30, 150, num_paths), rng.integers(0, 2, num_paths),
+                     rng.uniform(-20, 20, num_paths), rng.uniform(-2, 2, num_paths)])
+
+
+def save_ray_file(path, rng, num_paths, rx_locs, **kwargs):
+    channels = np.empty((1, len(num_paths)), dtype=object)
+    for k, n in enumerate(num_paths):
+        channels[0, k] = {'p': random_ray_data(rng, n)}
+    scipy.io.savemat(path, {'channels': channels, 'rx_locs': rx_locs, **kwargs})
+
+
+def create_scenario(folder, scenes=(0, 1, 2), num_bs=2, ue_files=((0, 9), (10, 14)), seed=0):
+    """
+    Writes a small synthetic ray-tracing scenario in the DeepVerse6G file format.
+    """
+    rng = np.random.default_rng(seed)
+    wireless_folder = os.path.join(folder, 'synthetic', 'wireless')
+    os.makedirs(wireless_folder)
+    scipy.io.savemat(os.path.join(wireless_folder, 'params.mat'),
+                     {'carrier_freq': 28e9, 'transmit_power': 0., 'num_BS': num_bs,
+                      'user_grids': np.array([[1, 1, 1]]), 'doppler_available': 1, 'dual_polar_available': 0})
+    bs_locs = rng.uniform(0, 100, (num_bs, 5))
+    for scene in scenes:
+        scene_folder = os.path.join(wireless_folder, f'scene_{scene}')
+        os.makedirs(scene_folder)
+        for bs in range(num_bs):
+            for rx_start, rx_end in ue_files:
+                n_ue = rx_end - rx_start + 1
+                save_ray_file(os.path.join(scene_folder, f'BS{bs+1}_UE_{rx_start}-{rx_end}.mat'), rng,
+                              rng.integers(0, 12, n_ue), rng.uniform(0, 100, (n_ue, 5)), tx_loc=bs_locs[bs, :3])
+            save_ray_file(os.path.join(scene_folder, f'BS{bs+1}_BS.mat'), rng,
+                          rng.integers(1, 6, num_bs), bs_locs)
+
+
+def comm_params(folder, **kwargs):
+    params = {'basestations': [1, 2], 'dataset_folder': folder, 'scenario': 'synthetic', 'scenes': [0, 1, 2],
+              'bs_antenna': {'shape': [4, 2], 'rotation': [0, 10, -90], 'spacing': 0.5, 'FoV': None},
+              'ue_antenna': {'shape': [2, 1], 'rotation': [0, 0, -90], 'spacing': 0.5, 'FoV': [360, 180]},
+              'OFDM': {'bandwidth': 0.05, 'subcarriers': 64, 'selected_subcarriers': list(range(0, 64, 4))},
+              'num_paths': 8, 'enable_Doppler': 1}
+    params.update(kwargs)
+    return params
+
+
+def radar_params(folder, **kwargs):
+    params = {'basestations': [1, 2], 'dataset_folder': folder, 'scenario': 'synthetic', 'scenes': [0, 1],
+              'tx_antenna': {'shape': [2, 1], 'rotation': [0, 0, -90], 'spacing': 0.5, 'FoV': [360, 180]},
+              'rx_antenna': {'shape': [4, 1], 'rotation': [0, 0, -90], 'spacing': 0.5, 'FoV': [360, 180]},
+              'FMCW': {'chirp_slope': 15e12, 'Fs': 4e6, 'n_samples_per_chirp': 64, 'n_chirps': 16},
+              'num_paths': 100}
+    params.update(kwargs)
+    return params
+
+
+class WirelessDatasetTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        create_scenario(cls.folder)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.folder)
+
+
+class TestParallelGeneration(WirelessDatasetTestCase):
+    def test_comm_parallel_matches_serial(self):
+        serial = CommunicationDataset(comm_params(self.folder))
+        parallel = CommunicationDataset(comm_params(self.folder, num_workers=2))
+        self.assertEqual(len(serial.data), len(parallel.data))
+        for t in range(len(serial.data)):
+            for bs in range(2):
+                for ue in range(len(serial.data[t][bs]['ue'])):
+                    np.testing.assert_array_equal(parallel.get_ue_channel(ue, bs, t).coeffs,
+                                                  serial.get_ue_channel(ue, bs, t).coeffs)
+                for rx in range(2):
+                    np.testing.assert_array_equal(parallel.get_bs_channel(bs, rx, t).coeffs,
+                                                  serial.get_bs_channel(bs, rx, t).coeffs)
+
+    def test_dataset_is_sent_once_per_worker(self):
+        submitted = []
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(args)
+                return super().submit(fn, *args, **kwargs)
+        
+        serial = CommunicationDataset(comm_params(self.folder))
+        with mock.patch('deepverse.datasets.wireless_datasets.ProcessPoolExecutor', RecordingExecutor):
+            parallel = CommunicationDataset(comm_params(self.folder, num_workers=2))
+        self.assertEqual(submitted, [(0, ), (1, ), (2, )])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            external = CommunicationDataset(comm_params(self.folder), executor=executor)
+        for t in range(3):
+            np.testing.assert_array_equal(parallel.data[t][1]['ue'].coeffs, serial.data[t][1]['ue'].coeffs)
+            np.testing.assert_array_equal(external.data[t][1]['ue'].coeffs, serial.data[t][1]['ue'].coeffs)
+
+    def test_radar_parallel_matches_serial(self):
+        serial = RadarDataset(radar_params(self.folder))
+        parallel = RadarDataset(radar_params(self.folder, num_workers=2))
+        for t in range(len(serial.data)):
+            for tx in range(2):
+                for rx in range(2):
+                    np.testing.assert_array_equal(parallel.get_sample(tx, rx, t).coeffs,
+                                                  serial.get_sample(tx, rx, t).coeffs)
+
+
+class TestRadarProcessing(WirelessDatasetTestCase):
+    def test_cached_maps_match_on_the_fly_maps(self):
+        processing = {'window': 'hann', 'range_fft': 64, 'doppler_fft': 16}
+        dataset = RadarDataset(radar_params(self.folder, processing=processing))
+        cached = RadarDataset(radar_params(self.folder, processing=dict(processing, cache=True)))
+        for map_type in ['range_doppler', 'range_angle']:
+            maps = dataset.get_maps(map_type)
+            self.assertEqual(maps.shape[:3], (2, 2, 2))
+            np.testing.assert_allclose(cached.get_maps(map_type), maps, rtol=1e-10)
+            np.testing.assert_allclose(dataset.get_map(map_type, 1, 0, 1), maps[1, 1, 0], rtol=1e-10)
+
+
+class TestBeamspace(WirelessDatasetTestCase):
+    def test_beam_power_output(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        dataset = CommunicationDataset(comm_params(self.folder, beamspace={'output': 'power', 'bs_oversampling': [2, 1]}))
+        W_bs, W_ue = dataset.params['bs_codebooks'][0].vectors, dataset.params['ue_codebook'].vectors
+        for t in range(len(reference.data)):
+            for i in range(len(reference.data[t])):
+                self.assertNotIn('ue', dataset.data[t][i])
+                for j, channel in enumerate(reference.data[t][i]['ue']):
+                    power = dataset.get_ue_beamspace(j, i, t)
+                    if channel.coeffs is None:
+                        np.testing.assert_array_equal(power, 0)
+                        continue
+                    expected = np.mean(np.abs(np.einsum('rb,rts,tc->bcs', W_ue.conj(), channel.coeffs, W_bs))**2, axis=-1)
+                    np.testing.assert_allclose(power, expected, rtol=1e-9, atol=1e-12*expected.max())
+        with self.assertRaises(RuntimeError):
+            dataset.get_ue_channel(0, 0, 0)
+
+
+class TestBeamSweep(WirelessDatasetTestCase):
+    def test_top_beams_match_channels(self):
+        rng = np.random.default_rng(0)
+        bs_codebook = rng.normal(size=(8, 12)) + 1j*rng.normal(size=(8, 12))
+        sweep = {'bs_codebook': bs_codebook, 'ue_codebook': {'oversampling': [2, 1]},
+                 'subcarriers': [0, 8], 'reduction': 'max', 'top_k': 5, 'batch_size': 3}
+        reference = CommunicationDataset(comm_params(self.folder))
+        dataset = BeamSweepDataset(comm_params(self.folder, beam_sweep=sweep))
+        W_ue = dataset.params['ue_codebook'].vectors
+        selected = [list(reference.params['OFDM']['selected_subcarriers']).index(k) for k in [0, 8]]
+        for t, scene_idx in enumerate(reference.params['scenes']):
+            scene = dataset.get_scene(scene_idx)
+            for i in range(len(scene)):
+                self.assertEqual(scene[i]['beams'].dtype, np.int16)
+                self.assertEqual(scene[i]['power'].dtype, np.float16)
+                for j, channel in enumerate(reference.data[t][i]['ue']):
+                    if channel.coeffs is None:
+                        continue
+                    beamspace = np.einsum('rb,rts,tc->bcs', W_ue.conj(), channel.coeffs[..., selected], bs_codebook)
+                    power = np.max(np.abs(beamspace)**2, axis=-1)
+                    beams, beam_power = dataset.get_top_beams(j, i, t)
+                    expected = np.sort(power.reshape(-1))[::-1][:5]
+                    np.testing.assert_allclose(power[beams[:, 0], beams[:, 1]], expected, rtol=1e-9)
+                    np.testing.assert_allclose(beam_power, 10*np.log10(expected), rtol=1e-3)
+
+
+class TestTimeDomain(WirelessDatasetTestCase):
+    def test_sampled_cir_taps(self):
+        dataset = CommunicationDataset(comm_params(self.folder, generate_OFDM_channels=0, activate_RX_filter='raised_cosine',
+                                                   RX_filter_rolloff=0.25, TD={'num_taps': 32, 'sampling_rate': 0.1}))
+        for t in range(3):
+            for bs in range(2):
+                for channel in dataset.data[t][bs]['ue']:
+                    self.assertEqual(channel.sampling_rate, 0.1e9)
+                    if channel.coeffs is not None:
+                        self.assertEqual(channel.coeffs.shape, (2, 8, 32))
+                self.assertEqual(dataset.get_bs_channel(bs, 1-bs, t).coeffs.shape, (8, 8, 32))
+        with self.assertRaises(ValueError):
+            CommunicationDataset(comm_params(self.folder, generate_OFDM_channels=0, beamspace=True))
+
+
+class TestUEOrientations(WirelessDatasetTestCase):
+    def test_seeded_random_ue_rotations(self):
+        ue_antenna = {'shape': [2, 1], 'rotation': [[0, 0], [0, 30], [-180, 180]], 'spacing': 0.5, 'FoV': [180, 180]}
+        serial = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna, seed=3))
+        parallel = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna, seed=3, num_workers=2))
+        for t in range(3):
+            for bs in range(2):
+                np.testing.assert_array_equal(parallel.data[t][bs]['ue'].coeffs, serial.data[t][bs]['ue'].coeffs)
+        rotations = serial._ue_antennas(1, 15).rotations
+        self.assertEqual(len(np.unique(rotations[:, 2])), 15)
+        self.assertFalse(np.array_equal(serial._ue_antennas(2, 15).rotations, rotations))
+
+    def test_unseeded_random_ue_rotations(self):
+        ue_antenna = {'shape': [2, 1], 'rotation': [[0, 0], [0, 30], [-180, 180]], 'spacing': 0.5, 'FoV': [180, 180]}
+        np.random.seed(5)
+        serial = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna))
+        np.random.seed(5)
+        parallel = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna, num_workers=3))
+        for t in range(3):
+            np.testing.assert_array_equal(parallel.data[t][0]['ue'].coeffs, serial.data[t][0]['ue'].coeffs)
+        self.assertFalse(np.array_equal(serial._ue_antennas(0, 15).rotations, serial._ue_antennas(1, 15).rotations))
+
+    def test_seeded_device_groups_are_independent(self):
+        antenna = {'shape': [2, 1], 'rotation': [[0, 0], [-30, 30], [-180, 180]], 'spacing': 0.5, 'FoV': [360, 180]}
+        radar = RadarDataset(radar_params(self.folder, tx_antenna=antenna, rx_antenna=antenna, seed=3, paths_only=True))
+        self.assertFalse(np.array_equal(radar.params['tx_ant_objs'].rotations, radar.params['rx_ant_objs'].rotations))
+        comm = CommunicationDataset(comm_params(self.folder, bs_antenna=dict(antenna, shape=[4, 2]), ue_antenna=antenna, seed=3))
+        np.testing.assert_array_equal(comm.params['tx_ant_objs'].rotations, radar.params['tx_ant_objs'].rotations)
+        for t in range(3):
+            self.assertFalse(np.array_equal(comm._ue_antennas(t, 2).rotations, comm.params['tx_ant_objs'].rotations))
+
+    def test_mobility_ue_rotations(self):
+        ue_antenna = {'shape': [2, 1], 'rotation': [0, 10, -90], 'spacing': 0.5, 'FoV': [180, 180]}
+        moving_objects = {7: SimpleNamespace(time=[0, 1], object_scene_id=[3, 12], angle=[45., 90.], slope=[0., 5.]),
+                          8: SimpleNamespace(time=[1], object_scene_id=[0], angle=[-30.], slope=[2.])}
+        static = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna))
+        dataset = CommunicationDataset(comm_params(self.folder, ue_antenna=ue_antenna, ue_orientation='mobility'),
+                                       moving_objects=moving_objects)
+        rotations = dataset._ue_antennas(1, 15).rotations
+        np.testing.assert_array_equal(rotations[12], [0, 15, 0])
+        np.testing.assert_array_equal(rotations[0], [0, 12, -120])
+        np.testing.assert_array_equal(rotations[1], [0, 10, -90])
+        np.testing.assert_array_equal(dataset._ue_antennas(2, 15).rotations, static._ue_antennas(2, 15).rotations)
+        np.testing.assert_array_equal(dataset.data[2][0]['ue'].coeffs, static.data[2][0]['ue'].coeffs)
+        self.assertFalse(np.array_equal(dataset.data[1][0]['ue'].coeffs, static.data[1][0]['ue'].coeffs))
+        with self.assertRaises(ValueError):
+            CommunicationDataset(comm_params(self.folder, ue_orientation='mobility'))
+
+    def test_mobility_scenes_not_zero_based(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        create_scenario(folder, scenes=(5, 6, 7))
+        ue_antenna = {'shape': [2, 1], 'rotation': [0, 10, -90], 'spacing': 0.5, 'FoV': [180, 180]}
+        moving_objects = {7: SimpleNamespace(time=[5, 6, 7], object_scene_id=[1, 4, 2], angle=[10., 20., 30.], slope=[1., 2., 3.])}
+        static = CommunicationDataset(comm_params(folder, scenes=[6, 7], ue_antenna=ue_antenna))
+        dataset = CommunicationDataset(comm_params(folder, scenes=[6, 7], ue_antenna=ue_antenna, ue_orientation='mobility'),
+                                       moving_objects=moving_objects)
+        self.assertEqual(sorted(dataset._orientation_index), [6, 7])
+        np.testing.assert_array_equal(dataset._ue_antennas(6, 14).rotations[4], [0, 12, -70])
+        np.testing.assert_array_equal(dataset._ue_antennas(7, 14).rotations[2], [0, 13, -60])
+        for t in range(2):
+            self.assertFalse(np.array_equal(dataset.data[t][0]['ue'].coeffs, static.data[t][0]['ue'].coeffs))
+        
+        moving_objects[8] = SimpleNamespace(time=[6], object_scene_id=[14], angle=[0.], slope=[0.])
+        with self.assertRaises(ValueError):
+            CommunicationDataset(comm_params(folder, scenes=[6, 7], ue_orientation='mobility'), moving_objects=moving_objects)
+        moving_objects[8] = SimpleNamespace(time=[6], object_scene_id=[4], angle=[0.], slope=[0.])
+        with self.assertRaises(ValueError):
+            CommunicationDataset(comm_params(folder, scenes=[6, 7], ue_orientation='mobility'), moving_objects=moving_objects)
+
+
+class TestPathsOnly(WirelessDatasetTestCase):
+    def test_comm_paths_regenerate_channels(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        dataset = CommunicationDataset(comm_params(self.folder, paths_only=True))
+        self.assertNotIn('ue', dataset.data[0][0])
+        for t in range(3):
+            for bs in range(2):
+                table = PathsBatch.from_dict(dataset.data[t][bs]['ue_paths'].to_dict())
+                self.assertEqual(len(table), len(reference.data[t][bs]['ue']))
+                for ue, expected in enumerate(reference.data[t][bs]['ue']):
+                    channel = OFDMChannel(paths=table[ue], **dataset._ofdm_channel_params(dataset.params),
+                                          tx_antenna=dataset.params['tx_ant_objs'][bs], rx_antenna=dataset.params['rx_ant_objs'][0])
+                    channel.generate()
+                    if expected.coeffs is None:
+                        self.assertIsNone(channel.coeffs)
+                    else:
+                        np.testing.assert_allclose(channel.coeffs, expected.coeffs, rtol=1e-10, atol=1e-20)
+                paths = dataset.get_bs_paths(bs, 1-bs, t)
+                self.assertEqual(paths.num_paths(), reference.get_bs_channel(bs, 1-bs, t).paths.num_paths())
+        with self.assertRaises(RuntimeError):
+            dataset.get_ue_channel(0, 0, 0)
+
+    def test_radar_paths_regenerate_channels(self):
+        reference = RadarDataset(radar_params(self.folder))
+        dataset = RadarDataset(radar_params(self.folder, paths_only=True))
+        for t in range(2):
+            for tx in range(2):
+                for rx in range(2):
+                    expected = reference.get_sample(tx, rx, t)
+                    channel = RadarChannel(tx_antenna=expected.tx_antenna, rx_antenna=expected.rx_antenna,
+                                           paths=dataset.get_paths(tx, rx, t), carrier_freq=expected.carrier_freq,
+                                           waveform=expected.waveform, params=dataset.params)
+                    channel.generate()
+                    np.testing.assert_allclose(channel.coeffs, expected.coeffs, rtol=1e-9, atol=1e-12*np.abs(expected.coeffs).max())
+
+
+class TestOnDemand(WirelessDatasetTestCase):
+    def test_on_demand_links_match_generated_links(self):
+        reference = CommunicationDataset(comm_params(self.folder, seed=1))
+        dataset = CommunicationDataset(comm_params(self.folder, seed=1, on_demand={'cache_size': 2}))
+        self.assertIsNone(dataset.data)
+        for t, bs, ue in [(0, 0, 3), (2, 1, 12), (0, 0, 3), (1, 0, 13)]:
+            expected = reference.get_ue_channel(ue, bs, t)
+            channel = dataset.get_ue_channel(ue, bs, t)
+            if expected.coeffs is None:
+                self.assertIsNone(channel.coeffs)
+            else:
+                np.testing.assert_allclose(channel.coeffs, expected.coeffs, rtol=1e-10, atol=1e-20)
+            np.testing.assert_array_equal(dataset.get_ue_location(ue, bs, t), reference.get_ue_location(ue, bs, t))
+        # The locations are read without generating the channels
+        self.assertEqual(dataset.cache_info(), {'hits': 1, 'misses': 3, 'size': 2, 'max_size': 2})
+        with mock.patch.object(dataset, '_generate_ue_link') as generate:
+            np.testing.assert_array_equal(dataset.get_ue_location(5, 1, 2), reference.get_ue_location(5, 1, 2))
+        generate.assert_not_called()
+        
+        # (2, 1, 12) is the least recently used link evicted by (1, 0, 13)
+        dataset.get_ue_channel(3, 0, 0)
+        self.assertEqual(dataset.cache_info()['misses'], 3)
+        dataset.get_ue_channel(12, 1, 2)
+        self.assertEqual(dataset.cache_info()['misses'], 4)
+        np.testing.assert_allclose(dataset.get_bs_channel(0, 1, 2).coeffs, reference.get_bs_channel(0, 1, 2).coeffs, rtol=1e-10)
+        np.testing.assert_array_equal(dataset.get_bs_location(1, 0), reference.get_bs_location(1, 0))
+        self.assertLessEqual(len(dataset._on_demand_scenes), 4)
+        with self.assertRaises(IndexError):
+            dataset.get_ue_channel(14, 0, 0)
+        
+        # The scenes beyond the scene cache size are evicted, the regenerated links are unchanged
+        dataset = CommunicationDataset(comm_params(self.folder, seed=1, on_demand={'cache_size': 1, 'scene_cache_size': 1}))
+        for t in [0, 1, 2, 0]:
+            np.testing.assert_array_equal(dataset.get_ue_channel(2, 1, t).coeffs, reference.get_ue_channel(2, 1, t).coeffs)
+            self.assertEqual(list(dataset._on_demand_scenes), [t])
+        with self.assertRaises(ValueError):
+            CommunicationDataset(comm_params(self.folder, on_demand=True, paths_only=True))
+
+
+class TestStreaming(WirelessDatasetTestCase):
+    def test_streamed_scenes_match_generated_scenes(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        dataset = CommunicationDataset(comm_params(self.folder), generate=False)
+        self.assertIsNone(dataset.data)
+        scenes = []
+        for t, (scene_idx, scene_data) in enumerate(dataset.iter_scenes()):
+            scenes.append(scene_idx)
+            for bs in range(2):
+                np.testing.assert_array_equal(scene_data[bs]['ue'].coeffs, reference.data[t][bs]['ue'].coeffs)
+        self.assertEqual(scenes, [0, 1, 2])
+
+
+class TestPrefetch(WirelessDatasetTestCase):
+    def test_prefetched_scenes_match_generated_scenes(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        dataset = CommunicationDataset(comm_params(self.folder, prefetch_scenes=1, prefetch_workers=2))
+        streamed = CommunicationDataset(comm_params(self.folder, prefetch_scenes=2), generate=False)
+        for t, (scene_idx, scene) in enumerate(streamed.iter_scenes()):
+            for bs in range(2):
+                np.testing.assert_array_equal(dataset.data[t][bs]['ue'].coeffs, reference.data[t][bs]['ue'].coeffs)
+                np.testing.assert_array_equal(scene[bs]['ue'].coeffs, reference.data[t][bs]['ue'].coeffs)
+                np.testing.assert_array_equal(scene[bs]['bs'][1-bs].coeffs, reference.data[t][bs]['bs'][1-bs].coeffs)
+        
+        reference = RadarDataset(radar_params(self.folder))
+        dataset = RadarDataset(radar_params(self.folder, prefetch_scenes=1))
+        np.testing.assert_array_equal(dataset.get_sample(0, 1, 1).coeffs, reference.get_sample(0, 1, 1).coeffs)
+
+    def test_prefetch_depth_is_bounded(self):
+        dataset = CommunicationDataset(comm_params(self.folder, prefetch_scenes=1), generate=False)
+        submitted = []
+        prefetch_scene = dataset._prefetch_scene
+        def record_prefetch(rt_loader, executor):
+            prefetch_scene(rt_loader, executor)
+            submitted.append(rt_loader)
+        dataset._prefetch_scene = record_prefetch
+        for k, (scene_idx, rt_loader) in enumerate(dataset._scene_loaders([0, 1, 2])):
+            self.assertIs(rt_loader, submitted[k])
+            self.assertEqual(len(submitted), min(k + 2, 3))
+            # BS-UE and BS-BS files of the two active BSs
+            self.assertEqual(rt_loader.num_prefetched, 6)
+            if k > 0:
+                self.assertEqual(submitted[k-1].num_prefetched, 0)
+        
+        # The reads of the generated scenes are consumed by the generation
+        dataset = CommunicationDataset(comm_params(self.folder, prefetch_scenes=2), generate=False)
+        for scene_idx, rt_loader in dataset._scene_loaders([0, 1, 2]):
+            dataset._generate_scene_data(scene_idx, rt_loader)
+            self.assertEqual(rt_loader.num_prefetched, 0)
+
+
+class TestSharedBSLinks(unittest.TestCase):
+    def setUp(self):
+        # The BS-BS files of the scene 1 are the files of the scene 0
+        self.folder = tempfile.mkdtemp()
+        create_scenario(self.folder)
+        wireless_folder = os.path.join(self.folder, 'synthetic', 'wireless')
+        for bs in range(2):
+            shutil.copy(os.path.join(wireless_folder, 'scene_0', f'BS{bs+1}_BS.mat'), os.path.join(wireless_folder, 'scene_1'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_comm_static_bs_links_are_shared(self):
+        reference = CommunicationDataset(comm_params(self.folder, deduplicate_bs_links=False))
+        dataset = CommunicationDataset(comm_params(self.folder))
+        for bs in range(2):
+            self.assertIs(dataset.get_bs_channel(bs, 1-bs, 1), dataset.get_bs_channel(bs, 1-bs, 0))
+            self.assertIsNot(dataset.get_bs_channel(bs, 1-bs, 2), dataset.get_bs_channel(bs, 1-bs, 1))
+            self.assertIsNot(reference.get_bs_channel(bs, 1-bs, 1), reference.get_bs_channel(bs, 1-bs, 0))
+            for t in range(3):
+                np.testing.assert_array_equal(dataset.get_bs_channel(bs, 1-bs, t).coeffs, reference.get_bs_channel(bs, 1-bs, t).coeffs)
+
+    def test_radar_static_bs_links_are_shared(self):
+        params = dict(scenes=[0, 1, 2], FMCW={'chirp_slope': 15e12, 'Fs': 4e6, 'n_samples_per_chirp': 16, 'n_chirps': 4})
+        reference = RadarDataset(radar_params(self.folder, deduplicate_bs_links=False, **params))
+        dataset = RadarDataset(radar_params(self.folder, **params))
+        paths = RadarDataset(radar_params(self.folder, paths_only=True, **params))
+        for tx in range(2):
+            self.assertIs(dataset.data[1][tx], dataset.data[0][tx])
+            self.assertIs(paths.data[1][tx], paths.data[0][tx])
+            self.assertIsNot(dataset.data[2][tx], dataset.data[1][tx])
+            for t in range(3):
+                for rx in range(2):
+                    np.testing.assert_array_equal(dataset.get_sample(tx, rx, t).coeffs, reference.get_sample(tx, rx, t).coeffs)
+
+
+class TestMemmapStorage(WirelessDatasetTestCase):
+    def test_memmap_matches_memory(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        storage_path = os.path.join(self.folder, 'storage')
+        dataset = CommunicationDataset(comm_params(self.folder, storage='memmap', storage_path=storage_path))
+        self.assertEqual(dataset.storage['ue_channels'].shape, (3, 2, 14, 2, 8, 16))
+        for t in range(3):
+            for bs in range(2):
+                for ue in range(14):
+                    channel = dataset.get_ue_channel(ue, bs, t)
+                    self.assertIsInstance(channel, np.memmap)
+                    expected = reference.get_ue_channel(ue, bs, t).coeffs
+                    if expected is None:
+                        np.testing.assert_array_equal(channel, 0)
+                    else:
+                        np.testing.assert_allclose(channel, expected, rtol=1e-5, atol=1e-6*np.abs(expected).max())
+                np.testing.assert_array_equal(dataset.get_ue_location(3, bs, t), reference.get_ue_location(3, bs, t))
+        with self.assertRaises(IndexError):
+            dataset.get_ue_channel(14, 0, 0)
+
+    def test_memmap_dtype_follows_precision(self):
+        reference = CommunicationDataset(comm_params(self.folder))
+        storage_path = os.path.join(self.folder, 'storage_double')
+        index_file = os.path.join(self.folder, 'rt_index.json')
+        self.addCleanup(os.remove, index_file)
+        with mock.patch('deepverse.datasets.wireless_datasets.RayTracingLoader', wraps=RayTracingLoader) as loader:
+            dataset = CommunicationDataset(comm_params(self.folder, storage='memmap', storage_path=storage_path, raytracing_index=index_file))
+        # The loaders are only created for the scene generation, the UE counts are read from the index
+        self.assertEqual(loader.call_count, 3)
+        self.assertEqual(dataset.storage['ue_channels'].dtype, np.complex128)
+        np.testing.assert_array_equal(dataset.get_ue_channel(5, 1, 2), reference.get_ue_channel(5, 1, 2).coeffs)
+        single = CommunicationDataset(comm_params(self.folder, storage='memmap', storage_path=storage_path + '_single', precision='single'))
+        self.assertEqual(single.storage['ue_channels'].dtype, np.complex64)
+
+if __name__ == '__main__':
+    unittest.main()